@@ -243,7 +243,8 @@ Focus on high-quality evidence (RCTs, meta-analyses) when available."""
                 pubmed_results = await self._pubmed_service.search_cancer_treatment(
                     cancer_type=cancer_type or "cancer",
                     biomarker=biomarker,
-                    max_results=5
+                    max_results=5,
+                    fetch_mode="full"
                 )
 
                 for pub in pubmed_results:
@@ -262,7 +263,8 @@ Focus on high-quality evidence (RCTs, meta-analyses) when available."""
             if not biomarkers and cancer_type:
                 pubmed_results = await self._pubmed_service.search_cancer_treatment(
                     cancer_type=cancer_type,
-                    max_results=10
+                    max_results=10,
+                    fetch_mode="full"
                 )
                 for pub in pubmed_results[:5]:
                     publications.append(Publication(
@@ -140,15 +140,19 @@ Always note the level of evidence for each recommendation."""
             # Check if mutation is actionable
             if mutation.gene in self.ACTIONABLE_MUTATIONS:
                 gene_mutations = self.ACTIONABLE_MUTATIONS[mutation.gene]
+                annotated = None
                 for pattern, therapies in gene_mutations.items():
                     if pattern.lower() in mutation.variant.lower():
-                        mutation.therapies = [
+                        # Annotate a copy; the caller's report must stay untouched
+                        annotated = mutation.model_copy(update={"therapies": [
                             Therapy(drug_name=t, fda_approved=True)
                             for t in therapies
-                        ]
-                        if mutation not in actionable_mutations:
-                            actionable_mutations.append(mutation)
+                        ]})
                         therapy_candidates.extend(therapies)
+                if annotated is not None:
+                    mutation = annotated
+                    if mutation not in actionable_mutations:
+                        actionable_mutations.append(mutation)
 
             # Check for resistance mutations
             if mutation.gene in self.RESISTANCE_MUTATIONS:
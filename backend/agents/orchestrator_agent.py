@@ -7,6 +7,7 @@ from enum import Enum
 import asyncio
 import logging
 
+from config import settings
 from services.tracing import get_tracer, trace, agent_span
 from .base_agent import BaseAgent
 from .medical_history_agent import MedicalHistoryAgent, MedicalHistoryInput, MedicalHistoryOutput, ClinicalNoteInfo
@@ -125,6 +126,14 @@ class OrchestratorAgent(BaseAgent[OrchestratorInput, OrchestratorOutput]):
         self.evidence_agent = EvidenceAgent(llm_service, use_mock)
         self.treatment_agent = TreatmentAgent(llm_service, use_mock)
 
+    async def _mock_pause(self, seconds: float) -> None:
+        """Pause between steps in mock mode so progress streams visibly.
+
+        Disabled with MOCK_STEP_DELAYS=false (the test suite does this).
+        """
+        if self._use_mock and settings.MOCK_STEP_DELAYS:
+            await asyncio.sleep(seconds)
+
     def get_system_prompt(self) -> str:
         return """You are an orchestrator AI that coordinates a multi-agent analysis system.
 Your role is to:
@@ -321,8 +330,7 @@ Ensure each agent receives proper input and handle any failures gracefully."""
         state.progress_percent = self.STEP_WEIGHTS[AnalysisStep.INITIALIZING]
 
         # Small delay for mock mode
-        if self._use_mock:
-            await asyncio.sleep(0.5)
+        await self._mock_pause(0.5)
 
         return state
 
@@ -361,8 +369,7 @@ Ensure each agent receives proper input and handle any failures gracefully."""
         state.steps_remaining.remove("medical_history")
         state.progress_percent += self.STEP_WEIGHTS[AnalysisStep.MEDICAL_HISTORY]
 
-        if self._use_mock:
-            await asyncio.sleep(0.5)
+        await self._mock_pause(0.5)
 
         return state
 
@@ -391,8 +398,7 @@ Ensure each agent receives proper input and handle any failures gracefully."""
         state.steps_remaining.remove("genomics")
         state.progress_percent += self.STEP_WEIGHTS[AnalysisStep.GENOMICS]
 
-        if self._use_mock:
-            await asyncio.sleep(0.5)
+        await self._mock_pause(0.5)
 
         return state
 
@@ -547,8 +553,7 @@ Ensure each agent receives proper input and handle any failures gracefully."""
         state.steps_remaining.remove("clinical_trials")
         state.progress_percent += self.STEP_WEIGHTS[AnalysisStep.CLINICAL_TRIALS]
 
-        if self._use_mock:
-            await asyncio.sleep(0.5)
+        await self._mock_pause(0.5)
 
         return state
 
@@ -577,8 +582,7 @@ Ensure each agent receives proper input and handle any failures gracefully."""
         state.steps_remaining.remove("evidence")
         state.progress_percent += self.STEP_WEIGHTS[AnalysisStep.EVIDENCE]
 
-        if self._use_mock:
-            await asyncio.sleep(0.5)
+        await self._mock_pause(0.5)
 
         return state
 
@@ -600,8 +604,7 @@ Ensure each agent receives proper input and handle any failures gracefully."""
         state.steps_remaining.remove("treatment")
         state.progress_percent += self.STEP_WEIGHTS[AnalysisStep.TREATMENT]
 
-        if self._use_mock:
-            await asyncio.sleep(0.5)
+        await self._mock_pause(0.5)
 
         return state
 
@@ -692,8 +695,7 @@ Ensure each agent receives proper input and handle any failures gracefully."""
         state.current_step = AnalysisStep.COMPLETED
         state.progress_percent = 100
 
-        if self._use_mock:
-            await asyncio.sleep(0.3)
+        await self._mock_pause(0.3)
 
         return state
 
@@ -33,10 +33,15 @@ class Settings:
     USE_MOCK_LLM: bool = os.getenv("USE_MOCK_LLM", "false").lower() == "true"
     USE_MOCK_VECTOR_STORE: bool = os.getenv("USE_MOCK_VECTOR_STORE", "false").lower() == "true"
     USE_MOCK_TRIALS_API: bool = os.getenv("USE_MOCK_TRIALS_API", "false").lower() == "true"
+    # Mock-mode orchestrator pauses between steps so the progress UI animates
+    MOCK_STEP_DELAYS: bool = os.getenv("MOCK_STEP_DELAYS", "true").lower() == "true"
 
     # Database Settings
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./cancer_care.db")
 
+    # Redis Settings (optional PubMed result cache; empty disables it)
+    REDIS_URL: str = os.getenv("REDIS_URL", "")
+
     # ChromaDB Settings
     CHROMA_PERSIST_DIR: str = os.getenv("CHROMA_PERSIST_DIR", "./chroma_db")
 
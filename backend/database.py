@@ -4,7 +4,10 @@ from sqlalchemy import create_engine
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, declarative_base
 from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Optional
 import logging
+import orjson
 
 from config import settings
 
@@ -42,12 +45,20 @@ ASYNC_DATABASE_URL = get_async_database_url(DATABASE_URL)
 # Determine database type for connection args
 is_sqlite = "sqlite" in DATABASE_URL.lower()
 
+
+def _json_serializer(value) -> str:
+    """Serialize JSON columns with orjson (engines expect a str)."""
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
 # Sync engine for migrations and testing
 sync_engine = create_engine(
     SYNC_DATABASE_URL,
     echo=settings.DEBUG,
     connect_args={"check_same_thread": False} if is_sqlite else {},
     pool_pre_ping=True if not is_sqlite else False,
+    json_serializer=_json_serializer,
+    json_deserializer=orjson.loads,
 )
 
 # Async engine for production use
@@ -56,6 +67,8 @@ async_engine = create_async_engine(
     echo=settings.DEBUG,
     connect_args={"check_same_thread": False} if is_sqlite else {},
     pool_pre_ping=True if not is_sqlite else False,
+    json_serializer=_json_serializer,
+    json_deserializer=orjson.loads,
 )
 
 # Session factories
@@ -165,6 +178,68 @@ async def get_db_session():
             raise
 
 
+# Session shared by everything that runs inside one HTTP request
+_request_session: ContextVar[Optional[AsyncSession]] = ContextVar("request_session", default=None)
+
+
+@asynccontextmanager
+async def request_session():
+    """Open a session that session_scope() reuses for the rest of the request."""
+    async with AsyncSessionLocal() as session:
+        token = _request_session.set(session)
+        try:
+            yield session
+        finally:
+            session.info["closed"] = True
+            _request_session.reset(token)
+
+
+@asynccontextmanager
+async def session_scope():
+    """Get the current request's session, or a new one outside a request.
+
+    A fresh session is opened when the request session is already busy
+    (concurrent use within the request) or has been closed (background
+    tasks that outlive their request), since AsyncSession is not safe for
+    concurrent use.
+
+    The shared session's transaction is ended when the block exits, so it
+    only holds a pooled connection while a call is using it.
+    """
+    session = _request_session.get()
+    if session is None or session.info.get("in_use") or session.info.get("closed"):
+        async with AsyncSessionLocal() as session:
+            yield session
+        return
+
+    session.info["in_use"] = True
+    try:
+        yield session
+    except Exception:
+        await session.rollback()
+        raise
+    finally:
+        # End a read's autobegun transaction so the pooled connection goes back
+        # now, not when the whole response has been sent; writes commit themselves
+        if session.in_transaction():
+            await session.rollback()
+        session.info["in_use"] = False
+
+
+class RequestSessionMiddleware:
+    """ASGI middleware that shares one database session per HTTP request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        async with request_session():
+            await self.app(scope, receive, send)
+
+
 def get_sync_session():
     """Get sync database session for testing."""
     session = SyncSessionLocal()
@@ -7,6 +7,7 @@ from fastapi.responses import JSONResponse
 import logging
 
 from config import settings
+from database import RequestSessionMiddleware
 
 # Configure logging
 logging.basicConfig(
@@ -64,6 +65,9 @@ app = FastAPI(
     redoc_url="/redoc",
 )
 
+# Share one database session across each request's service calls
+app.add_middleware(RequestSessionMiddleware)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
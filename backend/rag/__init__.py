@@ -6,6 +6,7 @@ This module provides:
 - Retriever: Retrieve relevant documents
 - Reranker: Re-rank search results
 - DataIngestion: Load and index documents
+- ProximityCache: Approximate semantic cache of search results
 """
 
 from .embeddings import EmbeddingService
@@ -13,6 +14,7 @@ from .vector_store import VectorStore, SearchResult
 from .retriever import Retriever
 from .reranker import Reranker
 from .ingestion import DataIngestion
+from .query_cache import ProximityCache
 
 __all__ = [
     "EmbeddingService",
@@ -21,4 +23,5 @@ __all__ = [
     "Retriever",
     "Reranker",
     "DataIngestion",
+    "ProximityCache",
 ]
@@ -1,33 +1,66 @@
 """Embedding service for generating text vectors."""
 
+import asyncio
 import hashlib
-import math
-from typing import List, Optional
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple, Union
 import logging
 
+import numpy as np
+
 from config import settings
 
+# Linear congruential generator behind the mock embeddings
+_LCG_MULTIPLIER = 1103515245
+_LCG_INCREMENT = 12345
+_LCG_MODULUS = 2 ** 31
+
+
+@lru_cache(maxsize=None)
+def _lcg_coefficients(length: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Closed-form coefficients for the first ``length`` LCG states.
+
+    State n is ``(a**n * x0 + c * (1 + a + ... + a**(n-1))) mod 2**31``.
+    uint64 arithmetic wraps modulo 2**64, a multiple of 2**31, so computing
+    both terms with wrapping cumprod/cumsum and reducing at the end is exact.
+    The arrays are shared by every caller, so they are made read-only.
+    """
+    powers = np.cumprod(np.full(length, _LCG_MULTIPLIER, dtype=np.uint64))
+    offsets = _LCG_INCREMENT * (np.cumsum(powers) - powers + 1)
+    powers.flags.writeable = False
+    offsets.flags.writeable = False
+    return powers, offsets
+
 
 class EmbeddingService:
     """Service for generating text embeddings.
 
     In mock mode, generates deterministic hash-based vectors.
     In production mode, uses OpenAI embedding API.
+
+    Embeddings are kept in an LRU cache keyed by a BLAKE2b digest of the
+    text, so repeated queries and repeated document content (templated
+    adverse events, recurring mutations) are not re-embedded. Cached vectors
+    are shared between callers and must not be mutated.
     """
 
     # Standard embedding dimensions
     EMBEDDING_DIM = 1536  # OpenAI ada-002/text-embedding-3-small dimension
 
-    def __init__(self, use_mock: bool = None):
+    def __init__(self, use_mock: bool = None, cache_size: int = 1024):
         """Initialize embedding service.
 
         Args:
             use_mock: Whether to use mock embeddings (defaults to config setting)
+            cache_size: Max cached embeddings (0 disables the cache)
         """
         self.use_mock = use_mock if use_mock is not None else settings.USE_MOCK_VECTOR_STORE
         self.logger = logging.getLogger("rag.embeddings")
         self._client = None
         self._model = settings.EMBEDDING_MODEL
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[bytes, List[float]]" = OrderedDict()
 
         if not self.use_mock:
             self._init_client()
@@ -51,42 +84,114 @@ class EmbeddingService:
         Returns:
             List of floats representing the embedding vector
         """
+        key = None
+        if self.cache_size > 0:
+            key = self._cache_key(text)
+            cached = self._cache_get(key)
+            if cached is not None:
+                return cached
+
         if self.use_mock:
-            return self._mock_embedding(text)
+            embedding = self._mock_embedding(text)
+        else:
+            try:
+                response = self._client.embeddings.create(
+                    model=self._model,
+                    input=text
+                )
+                embedding = response.data[0].embedding
+            except Exception as e:
+                # Fallback vectors are not cached so the next call retries the API
+                self.logger.error(f"Embedding failed, using mock: {e}")
+                return self._mock_embedding(text)
+
+        if key is not None:
+            self._cache_put(key, embedding)
+        return embedding
 
-        try:
-            response = self._client.embeddings.create(
-                model=self._model,
-                input=text
-            )
-            return response.data[0].embedding
-        except Exception as e:
-            self.logger.error(f"Embedding failed, using mock: {e}")
-            return self._mock_embedding(text)
+    @staticmethod
+    def _cache_key(text: str) -> bytes:
+        """Content hash used to key the embedding cache."""
+        return hashlib.blake2b(text.encode(), digest_size=16).digest()
+
+    def _cache_get(self, key: bytes) -> Optional[List[float]]:
+        """Return a cached embedding and mark it as recently used."""
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+        return cached
+
+    def _cache_put(self, key: bytes, embedding: List[float]):
+        """Cache an embedding, evicting the least recently used entry when full."""
+        self._cache[key] = embedding
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def clear_cache(self):
+        """Drop all cached embeddings."""
+        self._cache.clear()
 
     async def embed_batch(self, texts: List[str]) -> List[List[float]]:
         """Generate embeddings for multiple texts.
 
+        Only texts that are neither cached nor repeated earlier in the batch
+        are sent to the embedding model.
+
         Args:
             texts: List of texts to embed
 
         Returns:
             List of embedding vectors
         """
+        if self.cache_size <= 0:
+            embeddings, _ = await self._embed_batch_uncached(texts)
+            return embeddings
+
+        embeddings: List[Optional[List[float]]] = [None] * len(texts)
+        # Content hash -> positions of the texts still to embed
+        missing: Dict[bytes, List[int]] = {}
+        for i, text in enumerate(texts):
+            key = self._cache_key(text)
+            cached = self._cache_get(key)
+            if cached is not None:
+                embeddings[i] = cached
+            else:
+                missing.setdefault(key, []).append(i)
+
+        if missing:
+            unique_texts = [texts[positions[0]] for positions in missing.values()]
+            fresh, cacheable = await self._embed_batch_uncached(unique_texts)
+            for (key, positions), embedding in zip(missing.items(), fresh):
+                for i in positions:
+                    embeddings[i] = embedding
+                if cacheable:
+                    self._cache_put(key, embedding)
+
+        return embeddings
+
+    async def _embed_batch_uncached(self, texts: List[str]) -> Tuple[List[List[float]], bool]:
+        """Embed texts without consulting the cache.
+
+        Returns:
+            The embeddings, and whether they may be cached (False for the
+            mock fallback after an API error)
+        """
         if self.use_mock:
-            return [self._mock_embedding(t) for t in texts]
+            return [self._mock_embedding(t) for t in texts], True
 
         try:
-            response = self._client.embeddings.create(
+            # Run the blocking client call off the event loop so concurrent batches overlap
+            response = await asyncio.to_thread(
+                self._client.embeddings.create,
                 model=self._model,
                 input=texts
             )
             # Sort by index to maintain order
             sorted_data = sorted(response.data, key=lambda x: x.index)
-            return [d.embedding for d in sorted_data]
+            return [d.embedding for d in sorted_data], True
         except Exception as e:
             self.logger.error(f"Batch embedding failed, using mock: {e}")
-            return [self._mock_embedding(t) for t in texts]
+            return [self._mock_embedding(t) for t in texts], False
 
     def _mock_embedding(self, text: str) -> List[float]:
         """Generate deterministic mock embedding from text hash.
@@ -106,26 +211,26 @@ class EmbeddingService:
         # Generate hash
         hash_bytes = hashlib.md5(text.encode()).digest()
 
-        # Extend hash to full embedding dimension
-        vector = []
-        seed_value = int.from_bytes(hash_bytes, byteorder='big')
-
-        for i in range(self.EMBEDDING_DIM):
-            # Use hash-based pseudo-random generation
-            seed_value = (seed_value * 1103515245 + 12345) % (2 ** 31)
-            # Normalize to [-1, 1]
-            value = (seed_value / (2 ** 30)) - 1.0
-            vector.append(value)
+        # Extend hash to full embedding dimension with the hash-seeded LCG,
+        # computing every state at once instead of stepping through them
+        seed_value = int.from_bytes(hash_bytes, byteorder='big') % _LCG_MODULUS
+        powers, offsets = _lcg_coefficients(self.EMBEDDING_DIM)
+        states = (powers * seed_value + offsets) % _LCG_MODULUS
+        # Normalize to [-1, 1]
+        vector = states / (2 ** 30) - 1.0
 
         # Normalize vector to unit length
-        magnitude = math.sqrt(sum(v * v for v in vector))
+        magnitude = np.linalg.norm(vector)
         if magnitude > 0:
-            vector = [v / magnitude for v in vector]
+            vector = vector / magnitude
 
-        return vector
+        return vector.tolist()
 
     @staticmethod
-    def cosine_similarity(vec1: List[float], vec2: List[float]) -> float:
+    def cosine_similarity(
+        vec1: Union[Sequence[float], np.ndarray],
+        vec2: Union[Sequence[float], np.ndarray]
+    ) -> float:
         """Compute cosine similarity between two vectors.
 
         Args:
@@ -135,17 +240,32 @@ class EmbeddingService:
         Returns:
             Cosine similarity score [-1, 1]
         """
-        if len(vec1) != len(vec2):
+        a = np.asarray(vec1, dtype=np.float32)
+        b = np.asarray(vec2, dtype=np.float32)
+        if a.shape != b.shape:
             raise ValueError("Vectors must have same dimension")
 
-        dot_product = sum(a * b for a, b in zip(vec1, vec2))
-        magnitude1 = math.sqrt(sum(a * a for a in vec1))
-        magnitude2 = math.sqrt(sum(b * b for b in vec2))
-
-        if magnitude1 == 0 or magnitude2 == 0:
+        magnitude = float(np.linalg.norm(a) * np.linalg.norm(b))
+        if magnitude == 0:
             return 0.0
 
-        return dot_product / (magnitude1 * magnitude2)
+        return float(a @ b) / magnitude
+
+    def _cached_mock_embedding(self, text: str) -> List[float]:
+        """Mock embedding for text, shared with embed_text's cache in mock mode.
+
+        In production mode the cache holds API embeddings, which must not be
+        mixed with mock vectors, so the embedding is computed directly.
+        """
+        if not self.use_mock or self.cache_size <= 0:
+            return self._mock_embedding(text)
+
+        key = self._cache_key(text)
+        embedding = self._cache_get(key)
+        if embedding is None:
+            embedding = self._mock_embedding(text)
+            self._cache_put(key, embedding)
+        return embedding
 
     def text_similarity(self, text1: str, text2: str) -> float:
         """Compute similarity between two texts using mock embeddings.
@@ -157,7 +277,7 @@ class EmbeddingService:
         Returns:
             Similarity score [0, 1]
         """
-        vec1 = self._mock_embedding(text1)
-        vec2 = self._mock_embedding(text2)
+        vec1 = self._cached_mock_embedding(text1)
+        vec2 = vec1 if text2 == text1 else self._cached_mock_embedding(text2)
         # Convert from [-1, 1] to [0, 1]
         return (self.cosine_similarity(vec1, vec2) + 1) / 2
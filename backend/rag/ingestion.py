@@ -1,5 +1,6 @@
 """Data ingestion for RAG pipeline."""
 
+import asyncio
 import json
 import os
 from typing import List, Dict, Any, Optional
@@ -50,35 +51,53 @@ class DataIngestion:
     async def load_all_mock_data(self) -> Dict[str, int]:
         """Load all mock data files into vector stores.
 
+        Namespaces are loaded concurrently.
+
         Returns:
             Dict mapping namespace to number of documents indexed
         """
-        results = {}
-
-        # Load each data source
-        data_sources = [
-            ("evidence", "mock_pubmed_articles.json", self._process_pubmed_article),
-            ("trials", "mock_clinical_trials.json", self._process_clinical_trial),
-            ("genomics", "mock_oncokb_mutations.json", self._process_mutation_entry),
-            ("guidelines", "mock_nccn_guidelines.json", self._process_guideline),
-        ]
-
-        for namespace, filename, processor in data_sources:
+        namespaces = []
+        for namespace in self._mock_data_sources():
             if namespace not in self.vector_stores:
                 self.logger.warning(f"No vector store for namespace: {namespace}")
                 continue
+            namespaces.append(namespace)
 
-            filepath = self.data_dir / filename
-            if not filepath.exists():
-                self.logger.warning(f"Data file not found: {filepath}")
-                results[namespace] = 0
-                continue
+        counts = await asyncio.gather(*(self.load_namespace(namespace) for namespace in namespaces))
+        return dict(zip(namespaces, counts))
+
+    async def load_namespace(self, namespace: str) -> int:
+        """Load one namespace's mock data file into its vector store.
+
+        Args:
+            namespace: Namespace to load
+
+        Returns:
+            Number of documents indexed
+        """
+        data_sources = self._mock_data_sources()
+        if namespace not in data_sources or namespace not in self.vector_stores:
+            self.logger.warning(f"No mock data source or vector store for namespace: {namespace}")
+            return 0
 
-            count = await self._load_json_file(filepath, namespace, processor)
-            results[namespace] = count
-            self.logger.info(f"Loaded {count} documents into {namespace}")
+        filename, processor = data_sources[namespace]
+        filepath = self.data_dir / filename
+        if not filepath.exists():
+            self.logger.warning(f"Data file not found: {filepath}")
+            return 0
+
+        count = await self._load_json_file(filepath, namespace, processor)
+        self.logger.info(f"Loaded {count} documents into {namespace}")
+        return count
 
-        return results
+    def _mock_data_sources(self) -> Dict[str, tuple]:
+        """Mock data file and entry processor for each namespace."""
+        return {
+            "evidence": ("mock_pubmed_articles.json", self._process_pubmed_article),
+            "trials": ("mock_clinical_trials.json", self._process_clinical_trial),
+            "genomics": ("mock_oncokb_mutations.json", self._process_mutation_entry),
+            "guidelines": ("mock_nccn_guidelines.json", self._process_guideline),
+        }
 
     async def _load_json_file(
         self,
@@ -100,20 +119,14 @@ class DataIngestion:
             with open(filepath, "r") as f:
                 data = json.load(f)
 
-            store = self.vector_stores[namespace]
-            count = 0
-
+            # Collect the whole file into one batch; a repeated doc_id keeps its
+            # last entry, as sequential upserts would
+            documents: Dict[str, Dict[str, Any]] = {}
             for entry in data:
-                documents = processor(entry)
-                for doc in documents:
-                    await store.upsert(
-                        doc_id=doc["doc_id"],
-                        content=doc["content"],
-                        metadata=doc["metadata"]
-                    )
-                    count += 1
-
-            return count
+                for doc in processor(entry):
+                    documents[doc["doc_id"]] = doc
+
+            return await self.vector_stores[namespace].upsert_batch(list(documents.values()))
 
         except Exception as e:
             self.logger.error(f"Error loading {filepath}: {e}")
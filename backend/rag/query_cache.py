@@ -0,0 +1,175 @@
+"""Approximate semantic cache for search results."""
+
+from collections import OrderedDict
+from typing import Hashable, List, Optional, Sequence
+import logging
+
+import numpy as np
+
+from .vector_store import SearchResult
+
+
+class _Bucket:
+    """Cached entries that share the same search parameters."""
+
+    __slots__ = ("keys", "results", "top_ks", "_matrix")
+
+    def __init__(self):
+        self.keys: List[np.ndarray] = []
+        self.results: List[List[SearchResult]] = []
+        self.top_ks: List[int] = []
+        self._matrix: Optional[np.ndarray] = None
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """Stacked (C, d) matrix of unit-length query embeddings."""
+        if self._matrix is None:
+            self._matrix = np.stack(self.keys)
+        return self._matrix
+
+    def append(self, key: np.ndarray, results: List[SearchResult], top_k: int):
+        self.keys.append(key)
+        self.results.append(results)
+        self.top_ks.append(top_k)
+        self._matrix = None
+
+    def pop(self, index: int):
+        del self.keys[index]
+        del self.results[index]
+        del self.top_ks[index]
+        self._matrix = None
+
+
+class ProximityCache:
+    """Cache search results by query embedding proximity.
+
+    A lookup returns the results of a previously seen query whose embedding
+    lies within ``tolerance`` cosine distance of the new query, so repeated
+    and paraphrased queries skip retrieval and reranking.
+
+    Entries are grouped into buckets by the remaining search parameters
+    (namespaces, metadata filter, thresholds); the least recently used
+    bucket gives up its oldest entry once ``capacity`` is exceeded. Bucket
+    keys are tuples whose first element is the tuple of searched namespaces
+    (None for all), which is what invalidate_namespace matches against.
+    """
+
+    def __init__(self, capacity: int = 256, tolerance: float = 0.05):
+        """Initialize the cache.
+
+        Args:
+            capacity: Maximum number of cached queries (0 disables the cache)
+            tolerance: Maximum cosine distance for a cache hit
+        """
+        self.capacity = capacity
+        self.tolerance = tolerance
+        self.logger = logging.getLogger("rag.query_cache")
+        self._buckets: "OrderedDict[Hashable, _Bucket]" = OrderedDict()
+        self._size = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the cache stores anything."""
+        return self.capacity > 0
+
+    @staticmethod
+    def _normalize(embedding: Sequence[float]) -> Optional[np.ndarray]:
+        vec = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(vec))
+        if norm == 0:
+            return None
+        return vec / norm
+
+    def get(
+        self,
+        bucket_key: Hashable,
+        embedding: Sequence[float],
+        top_k: int
+    ) -> Optional[List[SearchResult]]:
+        """Look up results for a query embedding.
+
+        Args:
+            bucket_key: Hashable key of the non-query search parameters
+            embedding: Query embedding
+            top_k: Number of results requested
+
+        Returns:
+            Cached results truncated to top_k, or None on a miss
+        """
+        bucket = self._buckets.get(bucket_key)
+        if bucket is None or not bucket.keys:
+            return None
+
+        query = self._normalize(embedding)
+        if query is None or query.shape[0] != bucket.keys[0].shape[0]:
+            return None
+
+        distances = 1.0 - bucket.matrix @ query
+        best = int(np.argmin(distances))
+        if distances[best] > self.tolerance or bucket.top_ks[best] < top_k:
+            return None
+
+        self._buckets.move_to_end(bucket_key)
+        return bucket.results[best][:top_k]
+
+    def put(
+        self,
+        bucket_key: Hashable,
+        embedding: Sequence[float],
+        top_k: int,
+        results: List[SearchResult]
+    ):
+        """Store results for a query embedding.
+
+        Args:
+            bucket_key: Hashable key of the non-query search parameters
+            embedding: Query embedding
+            top_k: Number of results requested for this search
+            results: Search results to cache
+        """
+        if not self.enabled:
+            return
+
+        key = self._normalize(embedding)
+        if key is None:
+            return
+
+        bucket = self._buckets.get(bucket_key)
+        if bucket is None:
+            bucket = self._buckets[bucket_key] = _Bucket()
+        elif bucket.keys and bucket.keys[0].shape != key.shape:
+            # Embedding model changed; previous entries can never match
+            self._size -= len(bucket.keys)
+            bucket = self._buckets[bucket_key] = _Bucket()
+        self._buckets.move_to_end(bucket_key)
+
+        bucket.append(key, list(results), top_k)
+        self._size += 1
+
+        while self._size > self.capacity:
+            lru_key, lru_bucket = next(iter(self._buckets.items()))
+            lru_bucket.pop(0)
+            self._size -= 1
+            if not lru_bucket.keys:
+                del self._buckets[lru_key]
+
+    def invalidate_namespace(self, namespace: str):
+        """Drop cached searches that covered a namespace.
+
+        Args:
+            namespace: Namespace whose contents changed
+        """
+        stale = [
+            key for key in self._buckets
+            if key[0] is None or namespace in key[0]
+        ]
+        for key in stale:
+            self._size -= len(self._buckets.pop(key).keys)
+
+        if stale:
+            self.logger.debug(f"Invalidated {len(stale)} cached searches for {namespace}")
+
+    def clear(self):
+        """Drop all cached searches."""
+        self._buckets.clear()
+        self._size = 0
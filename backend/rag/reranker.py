@@ -1,7 +1,11 @@
 """Reranker for improving search result relevance."""
 
+from collections import defaultdict
+from datetime import datetime
+from itertools import islice
 from typing import List, Optional, Dict, Any
 from pydantic import BaseModel
+import heapq
 import logging
 
 from .vector_store import SearchResult
@@ -14,6 +18,7 @@ class RerankerConfig(BaseModel):
     use_cross_encoder: bool = False  # Would use cross-encoder model
     boost_recency: bool = True
     boost_source_quality: bool = True
+    min_score: float = 0.0  # Drop results scoring below this after reranking
 
 
 class Reranker:
@@ -49,6 +54,21 @@ class Reranker:
         5: 0.9,
     }
 
+    # Key medical terms and the relevance boost each one earns
+    MEDICAL_TERMS = {
+        "fda approved": 1.15,
+        "category 1": 1.15,
+        "randomized": 1.1,
+        "phase 3": 1.1,
+        "phase iii": 1.1,
+        "meta-analysis": 1.1,
+        "nccn": 1.15,
+        "guideline": 1.1,
+        "overall survival": 1.1,
+        "progression-free": 1.1,
+        "response rate": 1.05,
+    }
+
     def __init__(
         self,
         embedding_service: Optional[EmbeddingService] = None,
@@ -68,6 +88,11 @@ class Reranker:
         if not use_mock and not self.use_mock:
             self._init_cross_encoder()
 
+    @property
+    def uses_cross_encoder(self) -> bool:
+        """Whether reranking runs a cross-encoder model (costly per candidate)."""
+        return not self.use_mock and self._cross_encoder is not None
+
     def _init_cross_encoder(self):
         """Initialize cross-encoder model for production reranking.
 
@@ -128,11 +153,22 @@ class Reranker:
         query_lower = query.lower()
         query_terms = set(query_lower.split())
 
+        # Largest factor the boosts below can apply, used to skip hopeless candidates
+        max_boost = (1 + 0.1 * len(query_terms)) * 1.2 * 1.5
+        if config.boost_source_quality:
+            max_boost *= max(self.SOURCE_WEIGHTS.values())
+        if config.boost_recency:
+            max_boost *= max(self.RECENCY_WEIGHTS.values())
+
+        current_year = datetime.now().year
+
         scored_results = []
 
         for result in results:
             # Start with original score
             score = result.score
+            if score * max_boost < config.min_score:
+                continue
 
             # Keyword matching boost
             content_lower = result.content.lower()
@@ -154,28 +190,28 @@ class Reranker:
             if config.boost_recency:
                 pub_year = result.metadata.get("year")
                 if pub_year:
-                    from datetime import datetime
-                    current_year = datetime.now().year
                     years_old = max(0, current_year - pub_year)
                     recency_weight = self.RECENCY_WEIGHTS.get(years_old, 0.85)
                     score *= recency_weight
 
             # Medical relevance boost
-            score *= self._medical_relevance_boost(query, result.content)
+            score *= self._medical_relevance_boost(query, content_lower)
+
+            score = min(score, 1.0)  # Cap at 1.0
+            if score < config.min_score:
+                continue
 
             # Update score
             result_copy = SearchResult(
                 doc_id=result.doc_id,
                 content=result.content,
-                score=min(score, 1.0),  # Cap at 1.0
+                score=score,
                 metadata=result.metadata
             )
             scored_results.append(result_copy)
 
-        # Sort by score
-        scored_results.sort(key=lambda x: x.score, reverse=True)
-
-        return scored_results[:config.top_k]
+        # Select the best by score
+        return heapq.nlargest(config.top_k, scored_results, key=lambda x: x.score)
 
     async def _cross_encoder_rerank(
         self,
@@ -200,6 +236,7 @@ class Reranker:
         scores = self._cross_encoder.predict(pairs)
 
         # Combine with metadata boosts
+        current_year = datetime.now().year
         scored_results = []
         for result, ce_score in zip(results, scores):
             final_score = ce_score
@@ -212,53 +249,37 @@ class Reranker:
             if config.boost_recency:
                 pub_year = result.metadata.get("year")
                 if pub_year:
-                    from datetime import datetime
-                    current_year = datetime.now().year
                     years_old = max(0, current_year - pub_year)
                     recency_weight = self.RECENCY_WEIGHTS.get(years_old, 0.85)
                     final_score *= recency_weight
 
+            final_score = min(max(final_score, 0), 1.0)
+            if final_score < config.min_score:
+                continue
+
             result_copy = SearchResult(
                 doc_id=result.doc_id,
                 content=result.content,
-                score=min(max(final_score, 0), 1.0),
+                score=final_score,
                 metadata=result.metadata
             )
             scored_results.append(result_copy)
 
-        scored_results.sort(key=lambda x: x.score, reverse=True)
-        return scored_results[:config.top_k]
+        return heapq.nlargest(config.top_k, scored_results, key=lambda x: x.score)
 
-    def _medical_relevance_boost(self, query: str, content: str) -> float:
+    def _medical_relevance_boost(self, query: str, content_lower: str) -> float:
         """Calculate medical relevance boost.
 
         Args:
             query: Search query
-            content: Document content
+            content_lower: Lowercased document content
 
         Returns:
             Boost factor
         """
         boost = 1.0
-        query_lower = query.lower()
-        content_lower = content.lower()
-
-        # Key medical terms
-        medical_terms = {
-            "fda approved": 1.15,
-            "category 1": 1.15,
-            "randomized": 1.1,
-            "phase 3": 1.1,
-            "phase iii": 1.1,
-            "meta-analysis": 1.1,
-            "nccn": 1.15,
-            "guideline": 1.1,
-            "overall survival": 1.1,
-            "progression-free": 1.1,
-            "response rate": 1.05,
-        }
-
-        for term, term_boost in medical_terms.items():
+
+        for term, term_boost in self.MEDICAL_TERMS.items():
             if term in content_lower:
                 boost *= term_boost
                 # Cap to prevent excessive boosting
@@ -284,12 +305,13 @@ class Reranker:
         Returns:
             Filtered results
         """
-        filtered = [r for r in results if r.score >= min_score]
+        relevant = (r for r in results if r.score >= min_score)
 
         if max_results:
-            filtered = filtered[:max_results]
+            # Stop scanning once enough results have passed the threshold
+            return list(islice(relevant, max_results))
 
-        return filtered
+        return list(relevant)
 
     def group_by_source(
         self,
@@ -303,12 +325,10 @@ class Reranker:
         Returns:
             Dict mapping source type to results
         """
-        groups: Dict[str, List[SearchResult]] = {}
+        groups: Dict[str, List[SearchResult]] = defaultdict(list)
 
         for result in results:
-            source = result.metadata.get("source_type", "unknown")
-            if source not in groups:
-                groups[source] = []
-            groups[source].append(result)
+            groups[result.metadata.get("source_type", "unknown")].append(result)
 
-        return groups
+        # Plain dict, so looking up a missing source still raises KeyError
+        return dict(groups)
@@ -1,6 +1,9 @@
 """Retriever for document retrieval with query expansion."""
 
-from typing import List, Dict, Any, Optional
+import asyncio
+import heapq
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple
 from pydantic import BaseModel, Field
 import logging
 
@@ -8,6 +11,33 @@ from .embeddings import EmbeddingService
 from .vector_store import VectorStore, SearchResult
 
 
+# Expansions allowed per matched term, and per query
+MAX_SYNONYMS_PER_TERM = 2
+MAX_EXPANDED_QUERIES = 3
+
+
+@lru_cache(maxsize=1024)
+def _expand_terms(
+    query_lower: str,
+    expansions: Tuple[Tuple[str, Tuple[str, ...]], ...]
+) -> Tuple[str, ...]:
+    """Expand a lowercased query against a (term, synonyms) table.
+
+    Cached because agents issue the same queries for every patient;
+    the table is part of the key, so retrievers with different synonym
+    maps never share entries.
+    """
+    expanded = []
+    for term, synonyms in expansions:
+        if term in query_lower:
+            # Replace term with each synonym
+            for synonym in synonyms:
+                expanded_query = query_lower.replace(term, synonym)
+                if expanded_query != query_lower:
+                    expanded.append(expanded_query)
+    return tuple(expanded[:MAX_EXPANDED_QUERIES])
+
+
 class RetrievalConfig(BaseModel):
     """Configuration for retrieval."""
     top_k: int = 10
@@ -61,6 +91,11 @@ class Retriever:
         self.vector_stores = vector_stores
         self.use_mock = use_mock
         self.logger = logging.getLogger("rag.retriever")
+        # Synonym table trimmed to the expansions actually used, built once
+        self._expansions = tuple(
+            (term, tuple(synonyms[:MAX_SYNONYMS_PER_TERM]))
+            for term, synonyms in self.MEDICAL_SYNONYMS.items()
+        )
 
     async def retrieve(
         self,
@@ -88,28 +123,46 @@ class Retriever:
         if config.expand_query:
             queries.extend(self._expand_query(query))
 
-        # Search each namespace
-        all_results: List[SearchResult] = []
-
-        for namespace in namespaces:
-            if namespace not in self.vector_stores:
-                continue
-
-            store = self.vector_stores[namespace]
-
-            for q in queries:
-                results = await store.query(
-                    query_text=q,
-                    top_k=config.top_k,
-                    filter_metadata=filter_metadata,
-                    min_score=config.min_score
-                )
+        # Single store and query: results come back unique, sorted and capped at top_k
+        if len(namespaces) == 1 and len(queries) == 1 and not config.use_mmr:
+            namespace = namespaces[0]
+            store = self.vector_stores.get(namespace)
+            if store is None:
+                return []
+            results = await store.query(
+                query_text=query,
+                top_k=config.top_k,
+                filter_metadata=filter_metadata,
+                min_score=config.min_score
+            )
+            for result in results:
+                result.metadata["namespace"] = namespace
+            return results
 
-                # Add namespace to metadata
-                for result in results:
-                    result.metadata["namespace"] = namespace
+        # Search every namespace with every query concurrently
+        searches = [
+            (namespace, q)
+            for namespace in namespaces
+            if namespace in self.vector_stores
+            for q in queries
+        ]
+        result_lists = await asyncio.gather(*(
+            self.vector_stores[namespace].query(
+                query_text=q,
+                top_k=config.top_k,
+                filter_metadata=filter_metadata,
+                min_score=config.min_score
+            )
+            for namespace, q in searches
+        ))
 
-                all_results.extend(results)
+        # Gathered results keep the search order, so ties resolve as before
+        all_results: List[SearchResult] = []
+        for (namespace, _), results in zip(searches, result_lists):
+            # Add namespace to metadata
+            for result in results:
+                result.metadata["namespace"] = namespace
+            all_results.extend(results)
 
         # Deduplicate by doc_id, keeping highest score
         unique_results = self._deduplicate_results(all_results)
@@ -120,9 +173,8 @@ class Retriever:
                 query, unique_results, config.top_k, config.diversity_factor
             )
 
-        # Sort by score and return top_k
-        unique_results.sort(key=lambda x: x.score, reverse=True)
-        return unique_results[:config.top_k]
+        # Top_k by score; nlargest matches a stable descending sort and slice
+        return heapq.nlargest(config.top_k, unique_results, key=lambda x: x.score)
 
     def _expand_query(self, query: str) -> List[str]:
         """Expand query with medical synonyms.
@@ -133,18 +185,7 @@ class Retriever:
         Returns:
             List of expanded queries
         """
-        expanded = []
-        query_lower = query.lower()
-
-        for term, synonyms in self.MEDICAL_SYNONYMS.items():
-            if term in query_lower:
-                # Replace term with each synonym
-                for synonym in synonyms[:2]:  # Limit expansions
-                    expanded_query = query_lower.replace(term, synonym)
-                    if expanded_query != query_lower:
-                        expanded.append(expanded_query)
-
-        return expanded[:3]  # Limit to 3 expanded queries
+        return list(_expand_terms(query.lower(), self._expansions))
 
     def _deduplicate_results(self, results: List[SearchResult]) -> List[SearchResult]:
         """Deduplicate results by doc_id, keeping highest score.
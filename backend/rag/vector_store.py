@@ -6,9 +6,21 @@ import logging
 import math
 import os
 
+import numpy as np
+
 from .embeddings import EmbeddingService
 from config import settings
 
+try:
+    import simsimd
+except ImportError:
+    simsimd = None
+
+# With int8 storage, this many candidates per requested result are rescored in float32
+INT8_RESCORE_FACTOR = 4
+# float16 keeps ~3 significant digits, so a small shortlist is enough to recover float32 order
+FLOAT16_RESCORE_FACTOR = 2
+
 
 class SearchResult(BaseModel):
     """Result from vector search."""
@@ -37,7 +49,8 @@ class VectorStore:
         self,
         embedding_service: EmbeddingService,
         use_mock: bool = None,
-        namespace: str = "default"
+        namespace: str = "default",
+        quantize: Optional[str] = None
     ):
         """Initialize vector store.
 
@@ -45,14 +58,27 @@ class VectorStore:
             embedding_service: Service for generating embeddings
             use_mock: Whether to use in-memory mock store (defaults to config)
             namespace: Namespace for document isolation (collection name in ChromaDB)
+            quantize: "int8" or "float16" to scan a reduced-precision copy of
+                the embeddings in the in-memory store, rescoring the shortlist
+                in float32 (None keeps float32)
         """
+        if quantize not in (None, "int8", "float16"):
+            raise ValueError(f"Unsupported quantization: {quantize}")
+
         self.embedding_service = embedding_service
         self.use_mock = use_mock if use_mock is not None else settings.USE_MOCK_VECTOR_STORE
         self.namespace = namespace
+        self.quantize = quantize
         self.logger = logging.getLogger(f"rag.vector_store.{namespace}")
 
         # In-memory storage for mock mode
         self._documents: Dict[str, VectorDocument] = {}
+        # Contiguous (N, d) float32 (or int8/float16) copy of the embeddings, rebuilt lazily after
+        # writes; float rows are stored unit-length so cosine similarity is a plain dot product
+        self._matrix: Optional[np.ndarray] = None
+        self._matrix_ids: List[str] = []
+        # Inverted index patient_id -> ascending matrix rows, rebuilt with the matrix
+        self._patient_rows: Dict[str, List[int]] = {}
         self._collection = None
         self._client = None
 
@@ -117,6 +143,7 @@ class VectorStore:
                 embedding=embedding,
                 metadata=metadata
             )
+            self._matrix = None
             self.logger.debug(f"Upserted document: {doc_id}")
             return True
 
@@ -140,6 +167,7 @@ class VectorStore:
                 embedding=embedding,
                 metadata=metadata
             )
+            self._matrix = None
             return True
 
     async def upsert_batch(
@@ -148,24 +176,69 @@ class VectorStore:
     ) -> int:
         """Insert or update multiple documents.
 
+        All contents are embedded in a single batch call and written in one
+        store operation.
+
         Args:
             documents: List of dicts with doc_id, content, metadata
 
         Returns:
             Number of documents upserted
         """
-        count = 0
-        for doc in documents:
-            success = await self.upsert(
-                doc_id=doc["doc_id"],
-                content=doc["content"],
-                metadata=doc.get("metadata", {})
-            )
-            if success:
-                count += 1
+        if not documents:
+            return 0
+
+        doc_ids = [doc["doc_id"] for doc in documents]
+        contents = [doc["content"] for doc in documents]
+        metadatas = [doc.get("metadata") or {} for doc in documents]
 
-        self.logger.info(f"Upserted {count} documents")
-        return count
+        # Generate embeddings
+        embeddings = await self.embedding_service.embed_batch(contents)
+
+        if not self.use_mock:
+            try:
+                self._collection.upsert(
+                    ids=doc_ids,
+                    embeddings=embeddings,
+                    metadatas=[{**metadata, "content": content} for metadata, content in zip(metadatas, contents)],
+                    documents=contents
+                )
+                self.logger.info(f"Upserted {len(doc_ids)} documents to ChromaDB")
+                return len(doc_ids)
+            except Exception as e:
+                self.logger.error(f"ChromaDB batch upsert failed: {e}")
+                # Fallback to mock
+
+        new_rows = [
+            VectorDocument(doc_id=doc_id, content=content, embedding=embedding, metadata=metadata)
+            for doc_id, content, embedding, metadata in zip(doc_ids, contents, embeddings, metadatas)
+        ]
+        is_append = (
+            self._matrix is not None
+            and len(set(doc_ids)) == len(doc_ids)
+            and not any(doc_id in self._documents for doc_id in doc_ids)
+        )
+        for doc in new_rows:
+            self._documents[doc.doc_id] = doc
+
+        if is_append:
+            # Extend the scan matrix in place of a full rebuild
+            block = self._encode(np.array(embeddings, dtype=np.float32))
+            if block.ndim == 2 and block.shape[1] == self._matrix.shape[1]:
+                offset = len(self._matrix_ids)
+                self._matrix = np.concatenate([self._matrix, block])
+                self._matrix_ids.extend(doc_ids)
+                for row, metadata in enumerate(metadatas, start=offset):
+                    patient_id = metadata.get("patient_id")
+                    if patient_id is not None:
+                        self._patient_rows.setdefault(patient_id, []).append(row)
+            else:
+                self._matrix = None
+        else:
+            self._matrix = None
+
+        self.logger.info(f"Upserted {len(new_rows)} documents")
+        return len(new_rows)
 
     async def query(
         self,
@@ -227,6 +300,55 @@ class VectorStore:
             self.logger.error(f"ChromaDB query failed: {e}")
             return self._mock_query(query_embedding, top_k, filter_metadata, min_score)
 
+    async def filter(
+        self,
+        filter_metadata: Dict[str, Any],
+        top_k: int = 10
+    ) -> List[SearchResult]:
+        """Look up documents by exact metadata match, without embedding a query.
+
+        Args:
+            filter_metadata: Metadata key/values every result must match
+            top_k: Maximum number of results
+
+        Returns:
+            Matching documents, each with a score of 1.0
+        """
+        if not self.use_mock:
+            try:
+                results = self._collection.get(
+                    where=filter_metadata,
+                    limit=top_k,
+                    include=["documents", "metadatas"]
+                )
+                search_results = []
+                for i, doc_id in enumerate(results["ids"] or []):
+                    content = results["documents"][i] if results["documents"] else ""
+                    metadata = results["metadatas"][i] if results["metadatas"] else {}
+                    metadata = {k: v for k, v in metadata.items() if k != "content"}
+                    search_results.append(SearchResult(
+                        doc_id=doc_id,
+                        content=content,
+                        score=1.0,
+                        metadata=metadata
+                    ))
+                return search_results
+            except Exception as e:
+                self.logger.error(f"ChromaDB get failed: {e}")
+
+        search_results = []
+        for doc in self._documents.values():
+            if all(doc.metadata.get(key) == value for key, value in filter_metadata.items()):
+                search_results.append(SearchResult(
+                    doc_id=doc.doc_id,
+                    content=doc.content,
+                    score=1.0,
+                    metadata=doc.metadata
+                ))
+                if len(search_results) >= top_k:
+                    break
+        return search_results
+
     def _mock_query(
         self,
         query_embedding: List[float],
@@ -236,6 +358,11 @@ class VectorStore:
     ) -> List[SearchResult]:
         """Execute mock query using cosine similarity.
 
+        Scores every stored vector in one vectorized call over the
+        contiguous embedding matrix. With int8 or float16 storage the scan
+        runs on the reduced-precision matrix and only the top candidates are
+        rescored in float32.
+
         Args:
             query_embedding: Query vector
             top_k: Max results
@@ -245,37 +372,156 @@ class VectorStore:
         Returns:
             List of search results
         """
+        if not self._documents:
+            return []
+
+        if self._matrix is None:
+            self._build_matrix()
+
+        doc_ids = self._matrix_ids
+        matrix = self._matrix
+
+        # Apply metadata filter, narrowing to the patient's rows first when filtered by patient
+        if filter_metadata:
+            candidate_rows = range(len(doc_ids))
+            if filter_metadata.get("patient_id") is not None:
+                candidate_rows = self._patient_rows.get(filter_metadata["patient_id"], [])
+            rows = [
+                i for i in candidate_rows
+                if all(self._documents[doc_ids[i]].metadata.get(key) == value
+                       for key, value in filter_metadata.items())
+            ]
+            if not rows:
+                return []
+            doc_ids = [doc_ids[i] for i in rows]
+            matrix = matrix[rows]
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+
+        if self.quantize is not None:
+            # Coarse reduced-precision scan, then exact float32 scores for the shortlist
+            factor = INT8_RESCORE_FACTOR if self.quantize == "int8" else FLOAT16_RESCORE_FACTOR
+            coarse = self._cosine_scores(self._encode(query), matrix)
+            candidates = self._top_k(coarse, top_k * factor)
+            exact = self._cosine_scores(query, np.array(
+                [self._documents[doc_ids[i]].embedding for i in candidates],
+                dtype=np.float32
+            ))
+            order = np.argsort(-exact, kind="stable")
+            ranked = [(candidates[j], exact[j]) for j in order[:top_k]]
+        else:
+            similarities = self._dot_scores(self._normalize(query), matrix)
+            ranked = [(i, similarities[i]) for i in self._top_k(similarities, top_k)]
+
         results = []
+        for i, similarity in ranked:
+            # Normalize cosine similarity to [0, 1]
+            score = min(1.0, max(0.0, (float(similarity) + 1) / 2))
+            if score < min_score:
+                break
+            doc = self._documents[doc_ids[i]]
+            results.append(SearchResult(
+                doc_id=doc.doc_id,
+                content=doc.content,
+                score=score,
+                metadata=doc.metadata
+            ))
+
+        return results
+
+    def _build_matrix(self):
+        """Rebuild the contiguous scan matrix and patient index from the stored documents."""
+        self._matrix_ids = list(self._documents)
+        self._matrix = self._encode(np.array(
+            [self._documents[doc_id].embedding for doc_id in self._matrix_ids],
+            dtype=np.float32
+        ))
+
+        self._patient_rows = {}
+        for row, doc_id in enumerate(self._matrix_ids):
+            patient_id = self._documents[doc_id].metadata.get("patient_id")
+            if patient_id is not None:
+                self._patient_rows.setdefault(patient_id, []).append(row)
+
+    def _encode(self, vectors: np.ndarray) -> np.ndarray:
+        """Convert float32 vectors to the scan matrix's storage format.
+
+        float32 and float16 rows are normalized to unit length first; int8
+        codes are scanned with cosine similarity and need no normalization.
+        """
+        if self.quantize == "int8":
+            return self._quantize_int8(vectors)
+        vectors = self._normalize(vectors)
+        if self.quantize == "float16":
+            return vectors.astype(np.float16)
+        return vectors
 
-        for doc in self._documents.values():
-            # Apply metadata filter
-            if filter_metadata:
-                match = True
-                for key, value in filter_metadata.items():
-                    if doc.metadata.get(key) != value:
-                        match = False
-                        break
-                if not match:
-                    continue
-
-            # Calculate similarity
-            score = self._cosine_similarity(query_embedding, doc.embedding)
-
-            # Normalize score to [0, 1]
-            normalized_score = (score + 1) / 2
-
-            if normalized_score >= min_score:
-                results.append(SearchResult(
-                    doc_id=doc.doc_id,
-                    content=doc.content,
-                    score=normalized_score,
-                    metadata=doc.metadata
-                ))
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        """Scale vectors (or a single vector) to unit length, leaving zero vectors as is."""
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    @staticmethod
+    def _quantize_int8(vectors: np.ndarray) -> np.ndarray:
+        """Symmetrically quantize vectors to int8 with a per-vector scale.
+
+        The scale itself is not kept: cosine similarity is invariant to
+        per-vector scaling, so the int8 codes alone are enough to rank.
+        """
+        scale = np.abs(vectors).max(axis=-1, keepdims=True) / 127.0
+        scale[scale == 0] = 1.0
+        return np.round(vectors / scale).astype(np.int8)
+
+    @staticmethod
+    def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+        """Indices of the k highest scores, best first.
+
+        Selects with a linear-time partition and sorts only the survivors,
+        instead of sorting every score. Rows tied with the k-th score are all
+        kept before the final stable sort, so ties resolve by row order
+        exactly as a full stable argsort would.
+        """
+        n = scores.shape[0]
+        if k <= 0:
+            return np.empty(0, dtype=np.intp)
+        if k >= n:
+            return np.argsort(-scores, kind="stable")
+        kth = np.partition(scores, n - k)[n - k]
+        candidates = np.flatnonzero(scores >= kth)
+        return candidates[np.argsort(-scores[candidates], kind="stable")][:k]
+
+    @staticmethod
+    def _dot_scores(query: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+        """Dot product of a unit query against every unit row of a float32 (N, d) matrix.
+
+        With both sides normalized this equals cosine similarity, computed as
+        a single BLAS matrix-vector product.
+        """
+        if query.shape[0] != matrix.shape[1]:
+            return np.zeros(matrix.shape[0], dtype=np.float32)
+        return matrix @ query
+
+    @staticmethod
+    def _cosine_scores(query: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+        """Cosine similarity of a query against every row of an (N, d) matrix.
+
+        Accepts float32, float16 or int8 inputs of the same dtype. Uses
+        SimSIMD's SIMD kernels (including int8 and f16 dot products) when
+        installed, otherwise NumPy in float32.
+        """
+        if query.shape[0] != matrix.shape[1]:
+            return np.zeros(matrix.shape[0], dtype=np.float32)
 
-        # Sort by score descending
-        results.sort(key=lambda x: x.score, reverse=True)
+        if simsimd is not None:
+            return 1.0 - np.asarray(simsimd.cdist(query[None, :], matrix, metric="cosine"))[0]
 
-        return results[:top_k]
+        query = query.astype(np.float32, copy=False)
+        matrix = matrix.astype(np.float32, copy=False)
+        norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+        dots = matrix @ query
+        return np.divide(dots, norms, out=np.zeros_like(dots), where=norms > 0)
 
     @staticmethod
     def _cosine_similarity(vec1: List[float], vec2: List[float]) -> float:
@@ -304,6 +550,7 @@ class VectorStore:
         if self.use_mock:
             if doc_id in self._documents:
                 del self._documents[doc_id]
+                self._matrix = None
                 return True
             return False
 
@@ -322,6 +569,7 @@ class VectorStore:
         """
         if self.use_mock:
             self._documents.clear()
+            self._matrix = None
             return True
 
         try:
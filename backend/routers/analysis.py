@@ -67,6 +67,36 @@ orchestrator_agent = OrchestratorAgent(
 # In-memory storage for analysis state (would be Redis/DB in production)
 _analyses: Dict[str, Dict[str, Any]] = {}
 
+# Per-analysis update signal. Each state change sets the current Event and
+# swaps in a fresh one, so every SSE/WebSocket stream wakes once per change
+_analysis_updates: Dict[str, asyncio.Event] = {}
+
+# Streams re-check the state at least this often, even without a signal
+STREAM_RECHECK_SECONDS = 5.0
+
+
+def _notify_update(request_id: str) -> None:
+    """Wake every stream waiting on this analysis."""
+    event = _analysis_updates.get(request_id)
+    if event is not None:
+        _analysis_updates[request_id] = asyncio.Event()
+        event.set()
+
+
+async def _wait_for_update(event: Optional[asyncio.Event]) -> None:
+    """Wait until the given update signal fires or the recheck interval passes.
+
+    Streams take the event before reading the state, so a change made while
+    they were sending an update still wakes them.
+    """
+    if event is None:
+        await asyncio.sleep(STREAM_RECHECK_SECONDS)
+        return
+    try:
+        await asyncio.wait_for(event.wait(), timeout=STREAM_RECHECK_SECONDS)
+    except asyncio.TimeoutError:
+        pass
+
 
 class RunAnalysisRequest(BaseModel):
     """Request to run an analysis."""
@@ -144,6 +174,7 @@ async def stop_analysis(request_id: str):
     state["status"] = "error"
     state["error_message"] = "Analysis cancelled by user"
     state["current_step_detail"] = "Cancelled"
+    _notify_update(request_id)
 
     logger.info(f"Analysis {request_id} stopped by user")
 
@@ -238,6 +269,7 @@ async def run_analysis(request: RunAnalysisRequest):
         "result": None,
         "error_message": None
     }
+    _analysis_updates[request_id] = asyncio.Event()
 
     # Start analysis in background (mock implementation)
     asyncio.create_task(_run_mock_analysis(request_id, request))
@@ -330,6 +362,7 @@ async def analysis_stream_sse(request_id: str):
 
         last_progress = -1
         while True:
+            update = _analysis_updates.get(request_id)
             state = _analyses.get(request_id)
             if not state:
                 break
@@ -372,7 +405,7 @@ async def analysis_stream_sse(request_id: str):
                 yield f"data: {json.dumps(error_data, cls=DateTimeEncoder)}\n\n"
                 break
 
-            await asyncio.sleep(0.5)  # Poll interval
+            await _wait_for_update(update)
 
     return StreamingResponse(
         event_generator(),
@@ -407,6 +440,7 @@ async def analysis_stream_ws(websocket: WebSocket, request_id: str):
         # Stream progress updates
         last_progress = -1
         while True:
+            update = _analysis_updates.get(request_id)
             state = _analyses.get(request_id)
             if not state:
                 break
@@ -433,7 +467,7 @@ async def analysis_stream_ws(websocket: WebSocket, request_id: str):
                 })
                 break
 
-            await asyncio.sleep(0.5)  # Poll interval
+            await _wait_for_update(update)
 
     except WebSocketDisconnect:
         logger.info(f"WebSocket disconnected for analysis {request_id}")
@@ -640,6 +674,8 @@ async def _run_orchestrator_analysis(request_id: str, request: RunAnalysisReques
             if progress.error_message:
                 state["error_message"] = progress.error_message
 
+            _notify_update(request_id)
+
         # Check we got the final result
         if not orchestrator_output:
             raise RuntimeError("Orchestrator did not return final result")
@@ -654,6 +690,7 @@ async def _run_orchestrator_analysis(request_id: str, request: RunAnalysisReques
             state["error_message"] = final_result.summary
             state["current_step"] = "error"
             state["current_step_detail"] = final_result.summary
+            _notify_update(request_id)
 
             # Save failed analysis to database with error status
             try:
@@ -701,6 +738,7 @@ async def _run_orchestrator_analysis(request_id: str, request: RunAnalysisReques
         state["progress_percent"] = 100
         state["current_step"] = "completed"
         state["current_step_detail"] = "Analysis complete"
+        _notify_update(request_id)
 
         logger.info(f"Analysis {request_id} completed successfully via orchestrator")
 
@@ -824,6 +862,7 @@ async def _run_orchestrator_analysis(request_id: str, request: RunAnalysisReques
         current = state.get("current_step")
         if current and current != "completed":
             state["agent_statuses"][current] = AgentStatus.ERROR
+        _notify_update(request_id)
 
 
 async def _run_mock_analysis(request_id: str, request: RunAnalysisRequest):
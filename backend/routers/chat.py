@@ -448,10 +448,13 @@ async def _build_patient_context(patient_id: str, user_message: str = "") -> tup
             rag_lines = []
 
             # Search patient context (evidence, genomics, trials)
+            # Canonical (namespace, doc_id) order keeps the prompt identical when the
+            # same chunks are retrieved again, so the LLM can reuse its prefix cache
             rag_results = await vector_store_service.search_patient_context(
                 patient_id=patient_id,
                 query=user_message,
-                top_k=3
+                top_k=3,
+                canonical_sort=True
             )
 
             if rag_results:
@@ -459,7 +462,7 @@ async def _build_patient_context(patient_id: str, user_message: str = "") -> tup
                 for result in rag_results:
                     # Truncate content for context
                     content = result.content[:300] + "..." if len(result.content) > 300 else result.content
-                    rag_lines.append(f"- {content}")
+                    rag_lines.append(f"- [{result.doc_id}] {content}")
 
             # Search procedures if question is about appointments/schedule/procedures
             procedure_keywords = ["appointment", "schedule", "procedure", "infusion", "lab", "imaging",
@@ -468,13 +471,14 @@ async def _build_patient_context(patient_id: str, user_message: str = "") -> tup
                 procedure_results = await vector_store_service.search_patient_procedures(
                     patient_id=patient_id,
                     query=user_message,
-                    top_k=3
+                    top_k=3,
+                    canonical_sort=True
                 )
                 if procedure_results:
                     rag_lines.append("\nProcedure Information:")
                     for result in procedure_results:
                         content = result.content[:300] + "..." if len(result.content) > 300 else result.content
-                        rag_lines.append(f"- {content}")
+                        rag_lines.append(f"- [{result.doc_id}] {content}")
 
             if rag_lines:
                 rag_context = "\n".join(rag_lines)
@@ -204,7 +204,8 @@ async def search_evidence(
         # Search PubMed
         results = await pubmed_service.search_publications(
             query=full_query,
-            max_results=max_results
+            max_results=max_results,
+            fetch_mode="full"
         )
 
         # Convert to response format
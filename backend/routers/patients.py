@@ -135,13 +135,15 @@ async def list_patients(
     if stage:
         filters["stage"] = stage
 
-    all_patients = await service.get_all(filters)
-    total = len(all_patients)
-
-    # Apply pagination
+    # Stream matches and keep only the requested page in memory
     start = (page - 1) * page_size
     end = start + page_size
-    paginated = all_patients[start:end]
+    paginated = []
+    total = 0
+    async for patient in service.iter_all(filters):
+        if start <= total < end:
+            paginated.append(patient)
+        total += 1
 
     total_pages = math.ceil(total / page_size) if total > 0 else 1
 
@@ -279,16 +281,10 @@ async def populate_test_data():
 
     service = get_patient_service()
     test_patients = get_test_patients()
-    created_ids = []
+    patients = []
 
     for patient_data in test_patients:
         try:
-            # Check if patient already exists
-            existing = await service.get_by_id(patient_data["id"])
-            if existing:
-                # Skip if already exists
-                continue
-
             # Parse cancer details
             cd = patient_data.get("cancer_details", {})
             cancer_type_str = cd.get("cancer_type", "Other")
@@ -378,8 +374,7 @@ async def populate_test_data():
                 clinical_notes=patient_data.get("clinical_notes", [])
             )
 
-            await service.create(patient)
-            created_ids.append(patient_data["id"])
+            patients.append(patient)
 
         except Exception as e:
             # Log error but continue with other patients
@@ -387,6 +382,10 @@ async def populate_test_data():
             logging.error(f"Error creating test patient {patient_data.get('id')}: {e}")
             continue
 
+    # Insert in one statement; patients that already exist are skipped
+    created = await service.create_many(patients)
+    created_ids = [p.id for p in created]
+
     return PopulateTestDataResponse(
         success=True,
         message=f"Successfully created {len(created_ids)} test patients",
@@ -642,6 +641,7 @@ async def update_patient_status(patient_id: str, status_update: PatientStatusUpd
 
             patient.updated_at = now
             await db.commit()
+            get_patient_service().invalidate(patient_id)
 
             return {
                 "patient_id": patient_id,
@@ -9,7 +9,11 @@ import uuid
 from models.messages import AnalysisRequest, AnalysisProgress, AnalysisResult
 from services.llm_service import LLMService
 from services.patient_service import PatientService
-from agents.orchestrator_agent import OrchestratorAgent, OrchestratorInput
+from agents.orchestrator_agent import OrchestratorAgent, OrchestratorInput, OrchestratorOutput
+
+# How long a progress stream waits for an update signal before re-reading the
+# state anyway, so a missed signal can only delay a stream, never stall it
+STREAM_RECHECK_SECONDS = 5.0
 
 
 class AnalysisService:
@@ -49,6 +53,8 @@ class AnalysisService:
 
         # In-memory storage for analysis state
         self._analyses: Dict[str, dict] = {}
+        # Per-analysis update signal; replaced with a fresh event each time it fires
+        self._updates: Dict[str, asyncio.Event] = {}
 
     async def start_analysis(self, request: AnalysisRequest) -> str:
         """Start a new analysis workflow.
@@ -77,6 +83,7 @@ class AnalysisService:
             "result": None,
             "error": None
         }
+        self._updates[request_id] = asyncio.Event()
 
         # Start analysis in background
         asyncio.create_task(self._run_analysis(request_id, request))
@@ -101,26 +108,37 @@ class AnalysisService:
 
             # Update status
             self._analyses[request_id]["status"] = "in_progress"
+            self._notify_update(request_id)
 
-            # Run orchestrator with streaming
+            # Run orchestrator with streaming - final item is OrchestratorOutput
+            output = None
             async for progress in self.orchestrator.run_streaming(input_data):
-                # Update stored state
-                self._analyses[request_id]["status"] = progress.status
+                if isinstance(progress, OrchestratorOutput):
+                    output = progress
+                    continue
+
+                # Update stored state; the terminal status is set below, once the
+                # result is stored, so streams never see "completed" without one
+                if progress.status not in ("completed", "error"):
+                    self._analyses[request_id]["status"] = progress.status
                 self._analyses[request_id]["progress_percent"] = progress.progress_percent
                 self._analyses[request_id]["steps_completed"] = progress.steps_completed
                 self._analyses[request_id]["steps_remaining"] = progress.steps_remaining
 
                 if progress.error_message:
                     self._analyses[request_id]["error"] = progress.error_message
+                self._notify_update(request_id)
 
-            # Get final result
-            result = await self.orchestrator.run_analysis(input_data)
+            if output is None:
+                raise RuntimeError("Orchestrator did not return final result")
+            if output.result.status == "error":
+                raise RuntimeError(output.result.summary)
 
             # Store result
             self._analyses[request_id]["status"] = "completed"
             self._analyses[request_id]["progress_percent"] = 100
             self._analyses[request_id]["completed_at"] = datetime.now().isoformat()
-            self._analyses[request_id]["result"] = result.result
+            self._analyses[request_id]["result"] = output.result
 
             self.logger.info(f"Analysis {request_id} completed successfully")
 
@@ -129,6 +147,30 @@ class AnalysisService:
             self._analyses[request_id]["status"] = "error"
             self._analyses[request_id]["error"] = str(e)
 
+        self._notify_update(request_id)
+
+    def _notify_update(self, request_id: str) -> None:
+        """Wake every progress stream waiting on this analysis."""
+        event = self._updates.get(request_id)
+        if event is not None:
+            self._updates[request_id] = asyncio.Event()
+            event.set()
+
+    @staticmethod
+    async def _wait_for_update(event: Optional[asyncio.Event]) -> None:
+        """Wait until the given update signal fires or the recheck interval passes.
+
+        Streams take the event before reading the state, so a change made while
+        they were yielding an update still wakes them.
+        """
+        if event is None:
+            await asyncio.sleep(STREAM_RECHECK_SECONDS)
+            return
+        try:
+            await asyncio.wait_for(event.wait(), timeout=STREAM_RECHECK_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+
     async def get_status(self, request_id: str) -> Optional[AnalysisProgress]:
         """Get current status of an analysis.
 
@@ -190,6 +232,7 @@ class AnalysisService:
         last_progress = -1
 
         while True:
+            update = self._updates.get(request_id)
             state = self._analyses.get(request_id)
             if not state:
                 break
@@ -218,7 +261,7 @@ class AnalysisService:
             if current_status in ["completed", "error"]:
                 break
 
-            await asyncio.sleep(0.5)
+            await self._wait_for_update(update)
 
     async def cancel_analysis(self, request_id: str) -> bool:
         """Cancel a running analysis.
@@ -238,6 +281,7 @@ class AnalysisService:
 
         state["status"] = "cancelled"
         state["error"] = "Analysis cancelled by user"
+        self._notify_update(request_id)
         self.logger.info(f"Analysis {request_id} cancelled")
 
         return True
@@ -318,6 +362,7 @@ class AnalysisService:
 
         for req_id in to_remove:
             del self._analyses[req_id]
+            self._updates.pop(req_id, None)
 
         if to_remove:
             self.logger.info(f"Cleaned up {len(to_remove)} old analyses")
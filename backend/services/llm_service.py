@@ -1,16 +1,91 @@
 """LLM Service - Wrapper for LLM calls with mock/real mode support."""
 
+import asyncio
 import json
 import hashlib
 import logging
-from typing import Type, Optional, Any
+import uuid
+from typing import Dict, List, Type, Optional, Any
+import orjson
 from pydantic import BaseModel
 
 from config import settings
-from services.tracing import get_tracer, _langsmith_enabled
+from services.tracing import get_tracer
 
 logger = logging.getLogger(__name__)
 
+# Process-wide OpenAI client so every LLMService shares one connection pool
+_SHARED_CLIENT = None
+
+# In-flight completions keyed by request hash (single-flight de-duplication)
+_INFLIGHT: Dict[str, asyncio.Future] = {}
+
+
+def _get_client():
+    """Get or create the shared AsyncOpenAI client.
+
+    The client wraps a single HTTP/2 httpx pool, so concurrent completions
+    multiplex over the same connections instead of opening new ones.
+    """
+    global _SHARED_CLIENT
+    if _SHARED_CLIENT is None:
+        import httpx
+        from openai import AsyncOpenAI
+        _SHARED_CLIENT = AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            http_client=httpx.AsyncClient(
+                http2=True,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+            ),
+        )
+    return _SHARED_CLIENT
+
+
+class _JSONScanner:
+    """Incrementally find where the first top-level JSON value ends."""
+
+    def __init__(self):
+        self._pos = 0
+        self._depth = 0
+        self._started = False
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, text: str) -> Optional[int]:
+        """Scan newly appended text.
+
+        Args:
+            text: Full text received so far (previous text plus new chunk)
+
+        Returns:
+            Index just past the end of the first JSON value, or None if incomplete
+        """
+        for i in range(self._pos, len(text)):
+            char = text[i]
+            if not self._started:
+                if char in "{[":
+                    self._started = True
+                    self._depth = 1
+                continue
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._pos = i + 1
+                    return i + 1
+        self._pos = len(text)
+        return None
+
 
 class LLMService:
     """Service for LLM interactions with mock mode support."""
@@ -25,10 +100,10 @@ class LLMService:
         self._use_mock = use_mock if use_mock is not None else settings.USE_MOCK_LLM
         self._model = model or settings.LLM_MODEL
         self._client = None
+        self._mock_batches: Dict[str, Dict[str, BaseModel]] = {}
 
         if not self._use_mock:
-            from openai import AsyncOpenAI
-            self._client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+            self._client = _get_client()
 
         logger.info(f"LLMService initialized (mock={self._use_mock}, model={self._model})")
 
@@ -69,6 +144,56 @@ class LLMService:
                 tracer.fail_llm_span(span, str(e))
                 raise
 
+        # Single-flight: identical concurrent requests share one API call
+        key = self._request_key(prompt, system_prompt, temperature, max_tokens)
+        while key in _INFLIGHT:
+            inflight = _INFLIGHT[key]
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                if not inflight.cancelled():
+                    raise
+                # The leading call was cancelled, not this one; retry the request
+
+        future = asyncio.get_running_loop().create_future()
+        # Mark exceptions as retrieved when nobody else was waiting
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        _INFLIGHT[key] = future
+        try:
+            result = await self._complete_remote(prompt, system_prompt, temperature, max_tokens)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del _INFLIGHT[key]
+
+    def _request_key(
+        self,
+        prompt: str,
+        system_prompt: Optional[str],
+        temperature: float,
+        max_tokens: int
+    ) -> str:
+        """Build the key identifying an LLM request for de-duplication."""
+        raw = "\x1f".join((self._model, system_prompt or "", prompt, str(temperature), str(max_tokens)))
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    async def _complete_remote(
+        self,
+        prompt: str,
+        system_prompt: Optional[str],
+        temperature: float,
+        max_tokens: int
+    ) -> str:
+        """Call the OpenAI chat completion API with tracing."""
+        tracer = get_tracer()
+
         # Start tracing span for real LLM call
         span = tracer.start_llm_span(
             operation="chat.completion",
@@ -84,20 +209,12 @@ class LLMService:
                 messages.append({"role": "system", "content": system_prompt})
             messages.append({"role": "user", "content": prompt})
 
-            # Use LangSmith tracing if available
-            if _langsmith_enabled:
-                response = await self._traced_completion(
-                    messages=messages,
-                    temperature=temperature,
-                    max_tokens=max_tokens
-                )
-            else:
-                response = await self._client.chat.completions.create(
-                    model=self._model,
-                    messages=messages,
-                    temperature=temperature,
-                    max_tokens=max_tokens
-                )
+            response = await self._client.chat.completions.create(
+                model=self._model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens
+            )
 
             result = response.choices[0].message.content
 
@@ -118,26 +235,92 @@ class LLMService:
             tracer.fail_llm_span(span, str(e))
             raise
 
-    async def _traced_completion(self, messages: list, temperature: float, max_tokens: int):
-        """Make an OpenAI completion call with LangSmith tracing."""
-        from langsmith import traceable
+    async def _complete_json_streaming(
+        self,
+        prompt: str,
+        system_prompt: Optional[str],
+        temperature: float,
+        max_tokens: int
+    ) -> str:
+        """Stream a completion and keep only the first complete JSON value.
 
-        @traceable(run_type="llm", name="openai_chat_completion")
-        async def traced_call(messages, model, temperature, max_tokens):
-            return await self._client.chat.completions.create(
-                model=model,
-                messages=messages,
-                temperature=temperature,
-                max_tokens=max_tokens
-            )
+        Brackets are tracked incrementally as chunks arrive, so parsing stops
+        as soon as the top-level object or array closes. The rest of the
+        stream is still drained without being kept, because the usage
+        report only arrives in the final, choice-less chunk.
+
+        Args:
+            prompt: The user prompt
+            system_prompt: Optional system prompt
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens to generate
 
-        return await traced_call(
-            messages=messages,
+        Returns:
+            Response text, truncated after the first complete JSON value
+        """
+        tracer = get_tracer()
+        span = tracer.start_llm_span(
+            operation="chat.completion.stream",
             model=self._model,
+            max_tokens=max_tokens,
             temperature=temperature,
-            max_tokens=max_tokens
+            metadata={"prompt_length": len(prompt)}
         )
 
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": prompt})
+
+        text = ""
+        usage = None
+        scanner = _JSONScanner()
+        chunks = 0
+        closed = False
+
+        try:
+            stream = await self._client.chat.completions.create(
+                model=self._model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+            try:
+                async for chunk in stream:
+                    if chunk.usage:
+                        usage = {
+                            "prompt_tokens": chunk.usage.prompt_tokens,
+                            "completion_tokens": chunk.usage.completion_tokens,
+                            "total_tokens": chunk.usage.total_tokens,
+                        }
+                    if closed or not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if not delta:
+                        continue
+
+                    chunks += 1
+                    text += delta
+                    end = scanner.feed(text)
+                    if end is not None:
+                        # Ignore the trailing tokens but keep reading for usage
+                        text = text[:end]
+                        span.metadata["stopped_early"] = True
+                        closed = True
+            finally:
+                await stream.close()
+
+            span.metadata["chunks"] = chunks
+            tracer.complete_llm_span(span, response_text=text, usage=usage)
+            return text
+
+        except Exception as e:
+            logger.error(f"LLM streaming completion failed: {e}")
+            tracer.fail_llm_span(span, str(e))
+            raise
+
     async def complete_structured(
         self,
         prompt: str,
@@ -160,14 +343,7 @@ class LLMService:
         Returns:
             Parsed Pydantic model instance
         """
-        # Add schema to system prompt
-        schema_prompt = f"""
-You must respond with valid JSON that matches this schema:
-{json.dumps(output_model.model_json_schema(), indent=2)}
-
-Only respond with the JSON, no other text.
-"""
-        full_system_prompt = (system_prompt or "") + "\n\n" + schema_prompt
+        full_system_prompt = self._structured_system_prompt(output_model, system_prompt)
 
         if self._use_mock:
             return self._get_mock_structured_response(prompt, output_model)
@@ -177,7 +353,7 @@ Only respond with the JSON, no other text.
 
         for attempt in range(retry_count + 1):
             try:
-                response_text = await self.complete(
+                response_text = await self._complete_json_streaming(
                     prompt=prompt,
                     system_prompt=full_system_prompt,
                     temperature=temperature,
@@ -200,7 +376,7 @@ Only respond with the JSON, no other text.
                         continue
                     raise ValueError("No JSON found in LLM response")
 
-                data = json.loads(json_text)
+                data = orjson.loads(json_text)
                 return output_model.model_validate(data)
 
             except json.JSONDecodeError as e:
@@ -220,6 +396,130 @@ Only respond with the JSON, no other text.
         # Should not reach here, but just in case
         raise last_error or ValueError("Failed to get structured response")
 
+    def _structured_system_prompt(
+        self,
+        output_model: Type[BaseModel],
+        system_prompt: Optional[str] = None
+    ) -> str:
+        """Append the output model's JSON schema to the system prompt."""
+        schema_prompt = f"""
+You must respond with valid JSON that matches this schema:
+{orjson.dumps(output_model.model_json_schema(), option=orjson.OPT_INDENT_2).decode()}
+
+Only respond with the JSON, no other text.
+"""
+        return (system_prompt or "") + "\n\n" + schema_prompt
+
+    async def submit_structured_batch(
+        self,
+        requests: List[Dict[str, str]],
+        output_model: Type[BaseModel],
+        temperature: float = 0.3,
+        max_tokens: int = 4096
+    ) -> str:
+        """Submit structured completions to the OpenAI Batch API.
+
+        Intended for non-interactive bulk jobs (e.g. summarising many
+        patients), which trade latency for lower cost and higher quota.
+
+        Args:
+            requests: Dicts with ``custom_id``, ``prompt`` and optional ``system_prompt``
+            output_model: Pydantic model every result is parsed into
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens per response
+
+        Returns:
+            Batch ID to pass to poll_structured_batch()
+        """
+        if self._use_mock:
+            batch_id = f"batch_mock_{uuid.uuid4().hex[:12]}"
+            self._mock_batches[batch_id] = {
+                r["custom_id"]: self._get_mock_structured_response(r["prompt"], output_model)
+                for r in requests
+            }
+            return batch_id
+
+        lines = []
+        for r in requests:
+            lines.append(orjson.dumps({
+                "custom_id": r["custom_id"],
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": self._model,
+                    "messages": [
+                        {"role": "system", "content": self._structured_system_prompt(output_model, r.get("system_prompt"))},
+                        {"role": "user", "content": r["prompt"]},
+                    ],
+                    "temperature": temperature,
+                    "max_tokens": max_tokens,
+                },
+            }))
+
+        batch_file = await self._client.files.create(
+            file=("batch.jsonl", b"\n".join(lines)),
+            purpose="batch"
+        )
+        batch = await self._client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+
+        logger.info(f"Submitted LLM batch {batch.id} with {len(requests)} requests")
+        return batch.id
+
+    async def poll_structured_batch(
+        self,
+        batch_id: str,
+        output_model: Type[BaseModel]
+    ) -> Optional[Dict[str, BaseModel]]:
+        """Fetch the results of a batch submitted with submit_structured_batch().
+
+        Args:
+            batch_id: ID returned by submit_structured_batch()
+            output_model: Pydantic model every result is parsed into
+
+        Returns:
+            Parsed results keyed by custom_id, or None if the batch is still running.
+            Requests that failed or returned unparseable output are omitted.
+
+        Raises:
+            RuntimeError: If the batch failed, expired or was cancelled
+            ValueError: If a mock batch ID was never submitted
+        """
+        if self._use_mock:
+            results = self._mock_batches.get(batch_id)
+            if results is None:
+                raise ValueError(f"Unknown LLM batch {batch_id}")
+            return dict(results)
+
+        batch = await self._client.batches.retrieve(batch_id)
+        if batch.status in ("failed", "expired", "cancelled"):
+            raise RuntimeError(f"LLM batch {batch_id} ended with status {batch.status}")
+        if batch.status != "completed":
+            return None
+
+        results: Dict[str, BaseModel] = {}
+        if not batch.output_file_id:
+            return results
+
+        content = await self._client.files.content(batch.output_file_id)
+        for line in content.text.splitlines():
+            if not line.strip():
+                continue
+            item = orjson.loads(line)
+            custom_id = item.get("custom_id")
+            try:
+                body = item["response"]["body"]
+                response_text = body["choices"][0]["message"]["content"]
+                data = orjson.loads(self._extract_json(response_text))
+                results[custom_id] = output_model.model_validate(data)
+            except Exception as e:
+                logger.warning(f"Batch {batch_id} request {custom_id} failed: {item.get('error') or e}")
+
+        return results
+
     def _extract_json(self, text: str) -> str:
         """Extract JSON from LLM response text robustly.
 
@@ -254,30 +554,16 @@ Only respond with the JSON, no other text.
         # Use the first occurring JSON structure
         if obj_start == -1:
             start = arr_start
-            start_char, end_char = '[', ']'
         elif arr_start == -1:
             start = obj_start
-            start_char, end_char = '{', '}'
-        elif obj_start < arr_start:
-            start = obj_start
-            start_char, end_char = '{', '}'
         else:
-            start = arr_start
-            start_char, end_char = '[', ']'
-
-        # Find matching end by counting braces/brackets
-        depth = 0
-        end = start
-        for i, char in enumerate(text[start:], start):
-            if char == start_char:
-                depth += 1
-            elif char == end_char:
-                depth -= 1
-                if depth == 0:
-                    end = i + 1
-                    break
-
-        return text[start:end]
+            start = min(obj_start, arr_start)
+
+        # Find matching end by counting braces/brackets outside of strings
+        end = _JSONScanner().feed(text[start:])
+        if end is None:
+            return ""
+        return text[start:start + end]
 
     def _get_mock_response(self, prompt: str, context: str) -> str:
         """Generate deterministic mock response based on prompt.
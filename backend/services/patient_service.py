@@ -1,17 +1,47 @@
 """Patient Service - Handles patient data operations with database persistence."""
 
 import logging
-from typing import List, Optional, Dict, Any
+from cachetools import TTLCache
+from typing import AsyncIterator, List, Optional, Dict, Any
 from datetime import date
-from sqlalchemy import select, func, or_
+from sqlalchemy import select, update, func, or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from models.patient import Patient, CancerDetails, CancerType, CancerStage, ECOGStatus, Comorbidity, OrganFunction
 from models.db_models import PatientDB
-from database import AsyncSessionLocal
+from database import session_scope, is_sqlite
 
 logger = logging.getLogger(__name__)
 
+# Number of rows fetched per round trip when streaming patients
+STREAM_BATCH_SIZE = 500
+
+# ECOG performance status <-> stored integer score (index is the score)
+_ECOG_INT_TO_ENUM = (
+    ECOGStatus.FULLY_ACTIVE,
+    ECOGStatus.RESTRICTED,
+    ECOGStatus.AMBULATORY,
+    ECOGStatus.LIMITED_SELF_CARE,
+    ECOGStatus.DISABLED,
+)
+_ECOG_ENUM_TO_INT = {status: score for score, status in enumerate(_ECOG_INT_TO_ENUM)}
+
+# Recently loaded patients keyed by ID, shared by all PatientService instances.
+# Cached Patient objects are shared between callers and must not be mutated.
+_PATIENT_CACHE: TTLCache = TTLCache(maxsize=2048, ttl=60)
+
+# Columns that PatientService.update() may write
+_UPDATABLE_FIELDS = (
+    # Simple fields
+    "first_name", "last_name", "date_of_birth", "sex", "email", "phone",
+    "smoking_status", "pack_years", "genomic_report_id",
+    # JSON fields
+    "cancer_details", "comorbidities", "organ_function", "ecog_status",
+    "current_medications", "allergies", "clinical_notes",
+)
+
 
 class PatientService:
     """Service for patient data operations with database persistence."""
@@ -49,42 +79,42 @@ class PatientService:
             except Exception as e:
                 logger.warning(f"Error parsing cancer details for patient {db_patient.id}: {e}")
 
-        # Parse comorbidities from JSON
+        # Parse comorbidities and organ function from JSON
+        comorbidity_cls = Comorbidity
+        organ_function_cls = OrganFunction
+
         comorbidities = []
-        for comorb in (db_patient.comorbidities or []):
-            try:
-                comorbidities.append(Comorbidity(
-                    condition=comorb.get("condition", "Unknown"),
-                    severity=comorb.get("severity", "mild"),
-                    treatment_implications=comorb.get("treatment_implications", [])
-                ))
-            except Exception as e:
-                logger.warning(f"Error parsing comorbidity: {e}")
+        try:
+            comorbidities = [
+                comorbidity_cls(
+                    condition=c.get("condition", "Unknown"),
+                    severity=c.get("severity", "mild"),
+                    treatment_implications=c.get("treatment_implications") or []
+                )
+                for c in db_patient.comorbidities or ()
+            ]
+        except Exception as e:
+            logger.warning(f"Error parsing comorbidities for patient {db_patient.id}: {e}")
 
-        # Parse organ function from JSON
         organ_function = []
-        for organ in (db_patient.organ_function or []):
-            try:
-                organ_function.append(OrganFunction(
-                    organ=organ.get("organ", "Unknown"),
-                    status=organ.get("status", "normal"),
-                    key_values=organ.get("key_values", {}),
-                    notes=organ.get("notes")
-                ))
-            except Exception as e:
-                logger.warning(f"Error parsing organ function: {e}")
+        try:
+            organ_function = [
+                organ_function_cls(
+                    organ=o.get("organ", "Unknown"),
+                    status=o.get("status", "normal"),
+                    key_values=o.get("key_values") or {},
+                    notes=o.get("notes")
+                )
+                for o in db_patient.organ_function or ()
+            ]
+        except Exception as e:
+            logger.warning(f"Error parsing organ function for patient {db_patient.id}: {e}")
 
         # Parse ECOG status
         ecog_status = None
         if db_patient.ecog_status is not None:
-            ecog_map = {
-                0: ECOGStatus.FULLY_ACTIVE,
-                1: ECOGStatus.RESTRICTED,
-                2: ECOGStatus.AMBULATORY,
-                3: ECOGStatus.LIMITED_SELF_CARE,
-                4: ECOGStatus.DISABLED,
-            }
-            ecog_status = ecog_map.get(db_patient.ecog_status, ECOGStatus.RESTRICTED)
+            score = db_patient.ecog_status
+            ecog_status = _ECOG_INT_TO_ENUM[score] if 0 <= score <= 4 else ECOGStatus.RESTRICTED
 
         return Patient(
             id=db_patient.id,
@@ -157,15 +187,8 @@ class PatientService:
 
         # Convert ECOG status to int
         ecog_int = None
-        if patient.ecog_status:
-            ecog_map = {
-                ECOGStatus.FULLY_ACTIVE: 0,
-                ECOGStatus.RESTRICTED: 1,
-                ECOGStatus.AMBULATORY: 2,
-                ECOGStatus.LIMITED_SELF_CARE: 3,
-                ECOGStatus.DISABLED: 4,
-            }
-            ecog_int = ecog_map.get(patient.ecog_status)
+        if patient.ecog_status is not None:
+            ecog_int = _ECOG_ENUM_TO_INT.get(patient.ecog_status)
 
         return {
             "id": patient.id,
@@ -187,16 +210,19 @@ class PatientService:
             "clinical_notes": patient.clinical_notes or []
         }
 
-    async def get_all(self, filters: Optional[Dict[str, Any]] = None) -> List[Patient]:
-        """Get all patients with optional filtering.
+    async def iter_all(self, filters: Optional[Dict[str, Any]] = None) -> AsyncIterator[Patient]:
+        """Stream all patients with optional filtering.
+
+        Rows are fetched in chunks and converted one at a time, so the full
+        result set is never buffered in memory.
 
         Args:
             filters: Optional filter criteria
 
-        Returns:
-            List of matching patients
+        Yields:
+            Matching patients
         """
-        async with AsyncSessionLocal() as session:
+        async with session_scope() as session:
             query = select(PatientDB)
 
             # Apply filters
@@ -211,26 +237,50 @@ class PatientService:
                         )
                     )
 
+            cancer_type = filters.get("cancer_type") if filters else None
+            stage = filters.get("stage") if filters else None
+
+            # Narrow on the JSON fields in SQL so non-matching rows are never
+            # converted. "Other" is skipped since a missing cancer_type also
+            # parses to it; the in-memory checks below stay authoritative.
+            if cancer_type and cancer_type != CancerType.OTHER.value:
+                query = query.where(
+                    PatientDB.cancer_details["cancer_type"].as_string() == cancer_type
+                )
+            if stage:
+                query = query.where(PatientDB.cancer_details["stage"].as_string() == stage)
+
             query = query.order_by(PatientDB.last_name, PatientDB.first_name)
-            result = await session.execute(query)
-            db_patients = result.scalars().all()
+            stream = await session.stream_scalars(
+                query.execution_options(yield_per=STREAM_BATCH_SIZE)
+            )
 
-            patients = [self._db_to_model(p) for p in db_patients]
+            async for db_patient in stream:
+                patient = self._db_to_model(db_patient)
 
-            # Apply in-memory filters for complex JSON fields
-            if filters:
-                if filters.get("cancer_type"):
-                    patients = [
-                        p for p in patients
-                        if p.cancer_details and p.cancer_details.cancer_type.value == filters["cancer_type"]
-                    ]
-                if filters.get("stage"):
-                    patients = [
-                        p for p in patients
-                        if p.cancer_details and p.cancer_details.stage and p.cancer_details.stage.value == filters["stage"]
-                    ]
-
-            return patients
+                # Apply in-memory filters for complex JSON fields
+                if cancer_type and not (
+                    patient.cancer_details and patient.cancer_details.cancer_type.value == cancer_type
+                ):
+                    continue
+                if stage and not (
+                    patient.cancer_details and patient.cancer_details.stage
+                    and patient.cancer_details.stage.value == stage
+                ):
+                    continue
+
+                yield patient
+
+    async def get_all(self, filters: Optional[Dict[str, Any]] = None) -> List[Patient]:
+        """Get all patients with optional filtering.
+
+        Args:
+            filters: Optional filter criteria
+
+        Returns:
+            List of matching patients
+        """
+        return [p async for p in self.iter_all(filters)]
 
     async def get_by_id(self, patient_id: str) -> Optional[Patient]:
         """Get a patient by ID.
@@ -241,16 +291,32 @@ class PatientService:
         Returns:
             Patient or None if not found
         """
-        async with AsyncSessionLocal() as session:
+        patient = _PATIENT_CACHE.get(patient_id)
+        if patient is not None:
+            return patient
+
+        async with session_scope() as session:
             result = await session.execute(
                 select(PatientDB).where(PatientDB.id == patient_id)
             )
             db_patient = result.scalar_one_or_none()
 
             if db_patient:
-                return self._db_to_model(db_patient)
+                patient = self._db_to_model(db_patient)
+                _PATIENT_CACHE[patient_id] = patient
+                return patient
             return None
 
+    def invalidate(self, patient_id: str) -> None:
+        """Drop a patient from the by-ID cache.
+
+        Call this after modifying a patient row outside of this service.
+
+        Args:
+            patient_id: The patient ID
+        """
+        _PATIENT_CACHE.pop(patient_id, None)
+
     async def create(self, patient: Patient) -> Patient:
         """Create a new patient.
 
@@ -263,7 +329,7 @@ class PatientService:
         Raises:
             ValueError: If patient with ID already exists
         """
-        async with AsyncSessionLocal() as session:
+        async with session_scope() as session:
             # Check if patient already exists
             existing = await session.execute(
                 select(PatientDB).where(PatientDB.id == patient.id)
@@ -277,14 +343,54 @@ class PatientService:
 
             session.add(db_patient)
             await session.commit()
-            await session.refresh(db_patient)
 
             logger.info(f"Created patient: {patient.id}")
-            return self._db_to_model(db_patient)
+            # Only the status columns are filled in by the database
+            return patient.model_copy(update={
+                "status": db_patient.status,
+                "closure_reason": db_patient.closure_reason,
+                "closure_notes": db_patient.closure_notes,
+                "closed_at": db_patient.closed_at,
+            })
+
+    async def create_many(self, patients: List[Patient]) -> List[Patient]:
+        """Create many patients with a single INSERT.
+
+        Intended for import and seeding flows. Patients whose ID already
+        exists are skipped rather than raising.
+
+        Args:
+            patients: Patients to create
+
+        Returns:
+            The patients that were actually inserted
+        """
+        if not patients:
+            return []
+
+        insert_stmt = sqlite_insert if is_sqlite else pg_insert
+        stmt = (
+            insert_stmt(PatientDB)
+            .on_conflict_do_nothing(index_elements=["id"])
+            .returning(PatientDB.id)
+        )
+
+        async with session_scope() as session:
+            result = await session.execute(
+                stmt, [self._model_to_db_dict(p) for p in patients]
+            )
+            inserted_ids = set(result.scalars().all())
+            await session.commit()
+
+        logger.info(f"Created {len(inserted_ids)} patients ({len(patients) - len(inserted_ids)} already existed)")
+        return [p for p in patients if p.id in inserted_ids]
 
     async def update(self, patient_id: str, data: Dict[str, Any]) -> Optional[Patient]:
         """Update a patient.
 
+        Issues a single ``UPDATE ... RETURNING`` instead of loading the row,
+        mutating it and refreshing it afterwards.
+
         Args:
             patient_id: The patient ID
             data: Fields to update
@@ -292,40 +398,25 @@ class PatientService:
         Returns:
             Updated patient or None if not found
         """
-        async with AsyncSessionLocal() as session:
-            result = await session.execute(
-                select(PatientDB).where(PatientDB.id == patient_id)
+        values = {field: data[field] for field in _UPDATABLE_FIELDS if field in data}
+        if not values:
+            return await self.get_by_id(patient_id)
+
+        async with session_scope() as session:
+            stmt = (
+                update(PatientDB)
+                .where(PatientDB.id == patient_id)
+                .values(**values)
+                .returning(PatientDB)
             )
+            result = await session.execute(stmt)
             db_patient = result.scalar_one_or_none()
 
-            if not db_patient:
+            if db_patient is None:
                 return None
 
-            # Update simple fields
-            simple_fields = ["first_name", "last_name", "date_of_birth", "sex", "email", "phone",
-                          "smoking_status", "pack_years", "genomic_report_id"]
-            for field in simple_fields:
-                if field in data:
-                    setattr(db_patient, field, data[field])
-
-            # Update JSON fields
-            if "cancer_details" in data:
-                db_patient.cancer_details = data["cancer_details"]
-            if "comorbidities" in data:
-                db_patient.comorbidities = data["comorbidities"]
-            if "organ_function" in data:
-                db_patient.organ_function = data["organ_function"]
-            if "ecog_status" in data:
-                db_patient.ecog_status = data["ecog_status"]
-            if "current_medications" in data:
-                db_patient.current_medications = data["current_medications"]
-            if "allergies" in data:
-                db_patient.allergies = data["allergies"]
-            if "clinical_notes" in data:
-                db_patient.clinical_notes = data["clinical_notes"]
-
             await session.commit()
-            await session.refresh(db_patient)
+            self.invalidate(patient_id)
 
             logger.info(f"Updated patient: {patient_id}")
             return self._db_to_model(db_patient)
@@ -339,7 +430,7 @@ class PatientService:
         Returns:
             True if deleted, False if not found
         """
-        async with AsyncSessionLocal() as session:
+        async with session_scope() as session:
             result = await session.execute(
                 select(PatientDB).where(PatientDB.id == patient_id)
             )
@@ -350,6 +441,7 @@ class PatientService:
 
             await session.delete(db_patient)
             await session.commit()
+            self.invalidate(patient_id)
 
             logger.info(f"Deleted patient: {patient_id}")
             return True
@@ -363,5 +455,7 @@ class PatientService:
         Returns:
             Count of matching patients
         """
-        patients = await self.get_all(filters)
-        return len(patients)
+        total = 0
+        async for _ in self.iter_all(filters):
+            total += 1
+        return total
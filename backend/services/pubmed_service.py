@@ -6,18 +6,50 @@ and retrieve medical literature from PubMed.
 API Documentation: https://www.ncbi.nlm.nih.gov/books/NBK25500/
 """
 
+import asyncio
+import hashlib
 import httpx
 import logging
-import xml.etree.ElementTree as ET
-from typing import List, Optional, Dict, Any
+import orjson
+import re
+import threading
+import weakref
+from lxml import etree as LET
+from typing import Iterator, List, Literal, Optional, Dict, Any
 from pydantic import BaseModel, Field
 from datetime import datetime
 
+from config import settings
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
 logger = logging.getLogger(__name__)
 
 # NCBI E-utilities base URL
 NCBI_EUTILS_BASE = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils"
 
+# Maximum PMIDs per efetch request
+EFETCH_BATCH_SIZE = 100
+
+# Retry policy for rate-limited (429) and transient NCBI failures
+MAX_RETRIES = 5
+MAX_RETRY_DELAY = 30.0
+
+# Per-article list limits applied while parsing
+MAX_AUTHORS = 10
+MAX_MESH_TERMS = 20
+MAX_KEYWORDS = 20
+
+# eSearch JSON has a fixed shape; PMIDs are pulled from "idlist" without a full parse
+_IDLIST_RE = re.compile(r'"idlist"\s*:\s*\[([^\]]*)\]')
+_PMID_RE = re.compile(r'"(\d+)"')
+
+# TTL for cached E-utilities results in Redis (seconds)
+CACHE_TTL_SECONDS = 86400
+
 
 class Author(BaseModel):
     """Publication author."""
@@ -47,16 +79,87 @@ class PubMedService:
     medical literature relevant to cancer treatment decisions.
     """
 
-    def __init__(self, api_key: Optional[str] = None, timeout: float = 30.0):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        timeout: float = 30.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
         """Initialize the service.
 
+        No I/O resources are created here; the HTTP and Redis clients are
+        built lazily, one per event loop that uses them.
+
         Args:
             api_key: NCBI API key (optional, increases rate limit)
             timeout: HTTP request timeout in seconds
+            transport: Optional httpx transport (e.g. a MockTransport in tests)
         """
         self._api_key = api_key
         self._timeout = timeout
-        self._client = httpx.AsyncClient(timeout=timeout)
+        self._transport = transport
+        # NCBI allows 3 requests/second without an API key, 10 with one
+        self._max_concurrency = 10 if api_key else 3
+        # Clients and semaphores are bound to an event loop, so keep one per loop
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
+        )
+        # Optional shared result cache; every Redis error falls back to NCBI.
+        # Its connection pool is loop-bound too, so clients are kept per loop
+        self._redis_enabled = aioredis is not None and bool(settings.REDIS_URL)
+        self._redis_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def _client_for_loop(self) -> httpx.AsyncClient:
+        """Return the HTTP client for the running event loop, creating it on first use.
+
+        Contains no await points, so concurrent tasks on one loop cannot race here.
+        """
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None or client.is_closed:
+            # Long-lived HTTP/2 client so esearch -> efetch round trips reuse connections
+            client = httpx.AsyncClient(
+                timeout=self._timeout,
+                http2=True,
+                limits=httpx.Limits(
+                    max_connections=100,
+                    max_keepalive_connections=20,
+                    keepalive_expiry=30.0
+                ),
+                headers={"Accept-Encoding": "gzip"},
+                transport=self._transport
+            )
+            self._clients[loop] = client
+        return client
+
+    def _redis_for_loop(self):
+        """Return the Redis client for the running event loop, or None if caching is off."""
+        if not self._redis_enabled:
+            return None
+        loop = asyncio.get_running_loop()
+        client = self._redis_clients.get(loop)
+        if client is None:
+            client = aioredis.from_url(
+                settings.REDIS_URL,
+                socket_connect_timeout=1.0,
+                socket_timeout=1.0
+            )
+            self._redis_clients[loop] = client
+        return client
+
+    def _semaphore_for_loop(self) -> asyncio.Semaphore:
+        """Return the NCBI rate-limit semaphore for the running event loop."""
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self._max_concurrency)
+            self._semaphores[loop] = semaphore
+        return semaphore
 
     async def search_publications(
         self,
@@ -66,6 +169,7 @@ class PubMedService:
         min_date: Optional[str] = None,
         max_date: Optional[str] = None,
         publication_types: Optional[List[str]] = None,
+        fetch_mode: Literal["summary", "full"] = "summary",
     ) -> List[Publication]:
         """Search PubMed for publications.
 
@@ -76,6 +180,8 @@ class PubMedService:
             min_date: Minimum publication date (YYYY/MM/DD format)
             max_date: Maximum publication date (YYYY/MM/DD format)
             publication_types: Filter by publication type (e.g., ["Clinical Trial", "Review"])
+            fetch_mode: "summary" returns metadata only (eSummary JSON, no abstract,
+                MeSH terms or keywords); "full" also fetches abstracts via eFetch XML
 
         Returns:
             List of matching publications
@@ -94,8 +200,12 @@ class PubMedService:
                 logger.info(f"No publications found for query: {query}")
                 return []
 
-            # Step 2: Fetch details for each PMID
-            publications = await self._fetch_details(pmids)
+            # Step 2: Fetch records; eFetch already carries publication types, so
+            # full mode needs no eSummary round trip before it
+            if fetch_mode == "full":
+                publications = await self._fetch_details(pmids)
+            else:
+                publications = await self._fetch_summaries(pmids)
 
             # Step 3: Filter by publication type if specified
             if publication_types:
@@ -107,6 +217,10 @@ class PubMedService:
             logger.info(f"Found {len(publications)} publications for query: {query}")
             return publications
 
+        except httpx.HTTPError as e:
+            # Retries are exhausted; let the caller decide how to degrade
+            logger.error(f"PubMed request failed: {e}")
+            raise
         except Exception as e:
             logger.error(f"Error searching PubMed: {e}")
             return []
@@ -147,20 +261,115 @@ class PubMedService:
         if max_date:
             params["maxdate"] = max_date
 
-        response = await self._client.get(
+        key = "pmids:" + self._hash_key(
+            sorted((k, v) for k, v in params.items() if k != "api_key")
+        )
+        cached = await self._cache_get(key)
+        if cached is not None:
+            return cached
+
+        response = await self._get_with_retry(
             f"{NCBI_EUTILS_BASE}/esearch.fcgi",
             params=params
         )
-        response.raise_for_status()
 
-        data = response.json()
-        result = data.get("esearchresult", {})
-        pmids = result.get("idlist", [])
+        match = _IDLIST_RE.search(response.text)
+        if match:
+            pmids = _PMID_RE.findall(match.group(1))
+        else:
+            result = response.json().get("esearchresult", {})
+            pmids = result.get("idlist", [])
 
+        await self._cache_set(key, pmids)
         return pmids
 
-    async def _fetch_details(self, pmids: List[str]) -> List[Publication]:
-        """Fetch publication details for PMIDs.
+    @staticmethod
+    def _hash_key(value: Any) -> str:
+        """Build a compact, stable cache key digest."""
+        return hashlib.blake2b(repr(value).encode(), digest_size=16).hexdigest()
+
+    async def _cache_get(self, key: str) -> Optional[Any]:
+        """Read a cached value, returning None on a miss or Redis failure."""
+        redis = self._redis_for_loop()
+        if redis is None:
+            return None
+        try:
+            raw = await redis.get(key)
+        except Exception as e:
+            logger.warning(f"PubMed cache read failed: {e}")
+            return None
+        return orjson.loads(raw) if raw is not None else None
+
+    async def _cache_set(self, key: str, value: Any) -> None:
+        """Store a value with CACHE_TTL_SECONDS, ignoring Redis failures."""
+        redis = self._redis_for_loop()
+        if redis is None:
+            return
+        try:
+            await redis.setex(key, CACHE_TTL_SECONDS, orjson.dumps(value))
+        except Exception as e:
+            logger.warning(f"PubMed cache write failed: {e}")
+
+    async def _get_with_retry(
+        self,
+        url: str,
+        params: Dict[str, Any],
+        stream: bool = False
+    ) -> httpx.Response:
+        """GET an E-utilities URL, retrying rate limits and transient failures.
+
+        Retries on HTTP 429 (honouring Retry-After), 5xx responses and
+        timeouts with exponential backoff capped at MAX_RETRY_DELAY.
+
+        Args:
+            url: Request URL
+            params: Query parameters
+            stream: If True, return without reading the body (caller must aclose())
+
+        Returns:
+            Successful response
+
+        Raises:
+            httpx.HTTPError: If the request still fails after MAX_RETRIES retries
+        """
+        for attempt in range(MAX_RETRIES + 1):
+            delay = min(2 ** attempt, MAX_RETRY_DELAY)
+            try:
+                client = self._client_for_loop()
+                request = client.build_request("GET", url, params=params)
+                response = await client.send(request, stream=stream)
+            except httpx.TimeoutException as e:
+                if attempt == MAX_RETRIES:
+                    raise
+                logger.warning(f"NCBI request timed out ({e}), retrying in {delay}s")
+                await asyncio.sleep(delay)
+                continue
+
+            if response.status_code == 429 or response.status_code >= 500:
+                if attempt == MAX_RETRIES:
+                    if stream:
+                        await response.aread()
+                    response.raise_for_status()
+                if response.status_code == 429:
+                    try:
+                        delay = min(float(response.headers.get("Retry-After", delay)), MAX_RETRY_DELAY)
+                    except ValueError:
+                        pass
+                await response.aclose()
+                logger.warning(f"NCBI returned {response.status_code}, retrying in {delay}s")
+                await asyncio.sleep(delay)
+                continue
+
+            if response.is_error and stream:
+                await response.aread()
+            response.raise_for_status()
+            return response
+
+    async def _fetch_summaries(self, pmids: List[str]) -> List[Publication]:
+        """Fetch publication metadata for PMIDs via eSummary JSON.
+
+        Much smaller than eFetch XML; abstracts, MeSH terms and keywords
+        are left empty.
 
         Args:
             pmids: List of PubMed IDs
@@ -171,54 +380,166 @@ class PubMedService:
         if not pmids:
             return []
 
+        batches = [
+            pmids[i:i + EFETCH_BATCH_SIZE]
+            for i in range(0, len(pmids), EFETCH_BATCH_SIZE)
+        ]
+        results = await asyncio.gather(*(self._fetch_summary_batch(batch) for batch in batches))
+        return [pub for batch_pubs in results for pub in batch_pubs]
+
+    async def _fetch_summary_batch(self, pmids: List[str]) -> List[Publication]:
+        """Fetch eSummary metadata for a single batch of PMIDs.
+
+        Args:
+            pmids: List of PubMed IDs (at most EFETCH_BATCH_SIZE)
+
+        Returns:
+            List of Publication objects
+        """
         params = {
             "db": "pubmed",
             "id": ",".join(pmids),
-            "retmode": "xml",
+            "retmode": "json",
         }
 
         if self._api_key:
             params["api_key"] = self._api_key
 
-        response = await self._client.get(
-            f"{NCBI_EUTILS_BASE}/efetch.fcgi",
-            params=params
-        )
-        response.raise_for_status()
+        async with self._semaphore_for_loop():
+            response = await self._get_with_retry(
+                f"{NCBI_EUTILS_BASE}/esummary.fcgi",
+                params=params
+            )
+
+        result = response.json().get("result", {})
+        publications = []
+
+        for pmid in result.get("uids", []):
+            summary = result.get(pmid)
+            if not summary or "error" in summary:
+                continue
+
+            doi = next(
+                (aid.get("value", "") for aid in summary.get("articleids", []) if aid.get("idtype") == "doi"),
+                ""
+            )
+
+            publications.append(Publication(
+                pmid=pmid,
+                title=summary.get("title", ""),
+                authors=[a["name"] for a in summary.get("authors", []) if a.get("name")][:MAX_AUTHORS],
+                journal=summary.get("fulljournalname") or summary.get("source", ""),
+                publication_date="-".join(summary.get("pubdate", "").split()),
+                doi=doi,
+                publication_types=summary.get("pubtype", []),
+                url=f"https://pubmed.ncbi.nlm.nih.gov/{pmid}/"
+            ))
+
+        return publications
+
+    async def _fetch_details(self, pmids: List[str]) -> List[Publication]:
+        """Fetch publication details for PMIDs.
+
+        Large PMID lists are split into batches that are fetched
+        concurrently, bounded by the NCBI rate limit.
+
+        Args:
+            pmids: List of PubMed IDs
+
+        Returns:
+            List of Publication objects
+        """
+        if not pmids:
+            return []
+
+        key = "pubs:" + self._hash_key(tuple(sorted(pmids)))
+        cached = await self._cache_get(key)
+        if cached is not None:
+            return [Publication.model_validate(pub) for pub in cached]
 
-        # Parse XML response
-        publications = self._parse_pubmed_xml(response.text)
+        batches = [
+            pmids[i:i + EFETCH_BATCH_SIZE]
+            for i in range(0, len(pmids), EFETCH_BATCH_SIZE)
+        ]
+        results = await asyncio.gather(*(self._fetch_batch(batch) for batch in batches))
+        publications = [pub for batch_pubs in results for pub in batch_pubs]
+
+        await self._cache_set(key, [pub.model_dump() for pub in publications])
         return publications
 
-    def _parse_pubmed_xml(self, xml_text: str) -> List[Publication]:
-        """Parse PubMed XML response.
+    async def _fetch_batch(self, pmids: List[str]) -> List[Publication]:
+        """Fetch publication details for a single efetch batch.
 
         Args:
-            xml_text: XML response text
+            pmids: List of PubMed IDs (at most EFETCH_BATCH_SIZE)
 
         Returns:
             List of Publication objects
         """
+        params = {
+            "db": "pubmed",
+            "id": ",".join(pmids),
+            "retmode": "xml",
+        }
+
+        if self._api_key:
+            params["api_key"] = self._api_key
+
+        # Parse the XML incrementally as it arrives, one article at a time
+        parser = self._new_article_parser()
         publications = []
 
         try:
-            root = ET.fromstring(xml_text)
-
-            for article in root.findall(".//PubmedArticle"):
+            async with self._semaphore_for_loop():
+                response = await self._get_with_retry(
+                    f"{NCBI_EUTILS_BASE}/efetch.fcgi",
+                    params=params,
+                    stream=True
+                )
                 try:
-                    pub = self._parse_article(article)
-                    if pub:
-                        publications.append(pub)
-                except Exception as e:
-                    logger.warning(f"Failed to parse article: {e}")
-                    continue
-
-        except ET.ParseError as e:
+                    async for chunk in response.aiter_bytes():
+                        parser.feed(chunk)
+                        publications.extend(self._parse_pubmed_xml(parser))
+                finally:
+                    await response.aclose()
+
+            parser.close()
+            publications.extend(self._parse_pubmed_xml(parser))
+
+        except LET.XMLSyntaxError as e:
             logger.error(f"XML parse error: {e}")
 
         return publications
 
-    def _parse_article(self, article: ET.Element) -> Optional[Publication]:
+    def _new_article_parser(self) -> LET.XMLPullParser:
+        """Create an incremental parser that emits completed PubmedArticle elements."""
+        return LET.XMLPullParser(events=("end",), tag="PubmedArticle", remove_blank_text=True)
+
+    def _parse_pubmed_xml(self, parser: LET.XMLPullParser) -> Iterator[Publication]:
+        """Parse the articles completed so far in a PubMed XML stream.
+
+        Each article element is cleared once parsed, and already processed
+        siblings are dropped, so memory stays flat regardless of batch size.
+
+        Args:
+            parser: Parser that has been fed (part of) an eFetch XML response
+
+        Yields:
+            Publication objects
+        """
+        for _, article in parser.read_events():
+            try:
+                pub = self._parse_article(article)
+                if pub:
+                    yield pub
+            except Exception as e:
+                logger.warning(f"Failed to parse article: {e}")
+            finally:
+                article.clear(keep_tail=False)
+                while article.getprevious() is not None:
+                    del article.getparent()[0]
+
+    def _parse_article(self, article: LET._Element) -> Optional[Publication]:
         """Parse a single PubMed article.
 
         Args:
@@ -227,7 +548,7 @@ class PubMedService:
         Returns:
             Publication object or None
         """
-        medline = article.find(".//MedlineCitation")
+        medline = article.find("MedlineCitation")
         if medline is None:
             return None
 
@@ -244,81 +565,91 @@ class PubMedService:
         title_elem = article_elem.find("ArticleTitle")
         title = "".join(title_elem.itertext()) if title_elem is not None else ""
 
-        # Abstract
-        abstract_elem = article_elem.find(".//AbstractText")
+        # Abstract (structured abstracts have one labelled AbstractText per section)
         abstract = ""
+        abstract_elem = article_elem.find("Abstract")
         if abstract_elem is not None:
-            abstract = "".join(abstract_elem.itertext())
-        else:
-            # Try to get multiple abstract sections
             abstract_parts = []
-            for abs_text in article_elem.findall(".//AbstractText"):
+            for abs_text in abstract_elem.iterchildren("AbstractText"):
                 label = abs_text.get("Label", "")
                 text = "".join(abs_text.itertext())
-                if label:
-                    abstract_parts.append(f"{label}: {text}")
-                else:
-                    abstract_parts.append(text)
+                abstract_parts.append(f"{label}: {text}" if label else text)
             abstract = " ".join(abstract_parts)
 
         # Authors
         authors = []
-        for author in article_elem.findall(".//Author"):
-            last_name = author.findtext("LastName", "")
-            fore_name = author.findtext("ForeName", "")
-            if last_name:
-                name = f"{last_name} {fore_name}".strip()
-                authors.append(name)
+        author_list = article_elem.find("AuthorList")
+        if author_list is not None:
+            for author in author_list.iterchildren("Author"):
+                last_name = author.findtext("LastName", "")
+                fore_name = author.findtext("ForeName", "")
+                if last_name:
+                    name = f"{last_name} {fore_name}".strip()
+                    authors.append(name)
+                    if len(authors) >= MAX_AUTHORS:
+                        break
 
         # Journal
-        journal_elem = article_elem.find(".//Journal/Title")
-        journal = journal_elem.text if journal_elem is not None else ""
-
-        # Publication date
+        journal_elem = article_elem.find("Journal")
+        journal = ""
         pub_date = ""
-        pub_date_elem = article_elem.find(".//PubDate")
-        if pub_date_elem is not None:
-            year = pub_date_elem.findtext("Year", "")
-            month = pub_date_elem.findtext("Month", "")
-            day = pub_date_elem.findtext("Day", "")
-            pub_date = f"{year}-{month}-{day}".strip("-")
-
-        # DOI
+        if journal_elem is not None:
+            journal = journal_elem.findtext("Title", "")
+
+            # Publication date
+            pub_date_elem = journal_elem.find("JournalIssue/PubDate")
+            if pub_date_elem is not None:
+                year = pub_date_elem.findtext("Year", "")
+                month = pub_date_elem.findtext("Month", "")
+                day = pub_date_elem.findtext("Day", "")
+                pub_date = f"{year}-{month}-{day}".strip("-")
+
+        # DOI (ArticleIdList lives under PubmedData, not the Article element)
         doi = ""
-        for id_elem in article_elem.findall(".//ArticleId"):
-            if id_elem.get("IdType") == "doi":
-                doi = id_elem.text or ""
-                break
+        article_ids = article.find("PubmedData/ArticleIdList")
+        if article_ids is not None:
+            for article_id in article_ids.iterchildren("ArticleId"):
+                if article_id.get("IdType") == "doi":
+                    doi = article_id.text or ""
+                    break
 
         # Publication types
         pub_types = []
-        for pt in article_elem.findall(".//PublicationType"):
-            if pt.text:
-                pub_types.append(pt.text)
+        pub_type_list = article_elem.find("PublicationTypeList")
+        if pub_type_list is not None:
+            for pt in pub_type_list.iterchildren("PublicationType"):
+                if pt.text:
+                    pub_types.append(pt.text)
 
         # MeSH terms
         mesh_terms = []
-        for mesh in medline.findall(".//MeshHeading/DescriptorName"):
-            if mesh.text:
-                mesh_terms.append(mesh.text)
+        mesh_list = medline.find("MeshHeadingList")
+        if mesh_list is not None:
+            for mesh in mesh_list.iterfind("MeshHeading/DescriptorName"):
+                if mesh.text:
+                    mesh_terms.append(mesh.text)
+                    if len(mesh_terms) >= MAX_MESH_TERMS:
+                        break
 
         # Keywords
         keywords = []
-        for kw in medline.findall(".//Keyword"):
+        for kw in medline.iterfind("KeywordList/Keyword"):
             if kw.text:
                 keywords.append(kw.text)
+                if len(keywords) >= MAX_KEYWORDS:
+                    break
 
         return Publication(
             pmid=pmid,
             title=title,
             abstract=abstract,
-            authors=authors[:10],  # Limit to first 10 authors
+            authors=authors,
             journal=journal,
             publication_date=pub_date,
             doi=doi,
             publication_types=pub_types,
-            mesh_terms=mesh_terms[:20],  # Limit MeSH terms
-            keywords=keywords[:20],  # Limit keywords
+            mesh_terms=mesh_terms,
+            keywords=keywords,
             url=f"https://pubmed.ncbi.nlm.nih.gov/{pmid}/"
         )
 
@@ -351,7 +682,8 @@ class PubMedService:
         cancer_type: str,
         biomarker: Optional[str] = None,
         drug: Optional[str] = None,
-        max_results: int = 15
+        max_results: int = 15,
+        fetch_mode: Literal["summary", "full"] = "summary"
     ) -> List[Publication]:
         """Search for cancer treatment publications.
 
@@ -362,6 +694,7 @@ class PubMedService:
             biomarker: Biomarker/mutation (e.g., "EGFR", "HER2")
             drug: Drug name (e.g., "osimertinib")
             max_results: Maximum results
+            fetch_mode: "summary" for metadata only, "full" to include abstracts
 
         Returns:
             List of relevant publications
@@ -385,16 +718,24 @@ class PubMedService:
             query=query,
             max_results=max_results,
             sort="relevance",
-            publication_types=["Clinical Trial", "Review", "Meta-Analysis", "Randomized Controlled Trial"]
+            publication_types=["Clinical Trial", "Review", "Meta-Analysis", "Randomized Controlled Trial"],
+            fetch_mode=fetch_mode
         )
 
     async def close(self):
-        """Close the HTTP client."""
-        await self._client.aclose()
+        """Close the running loop's HTTP client and cache connection."""
+        loop = asyncio.get_running_loop()
+        client = self._clients.pop(loop, None)
+        if client is not None:
+            await client.aclose()
+        redis = self._redis_clients.pop(loop, None)
+        if redis is not None:
+            await redis.aclose()
 
 
 # Singleton instance
 _service: Optional[PubMedService] = None
+_service_lock = threading.Lock()
 
 
 def get_pubmed_service(api_key: Optional[str] = None) -> PubMedService:
@@ -408,5 +749,7 @@ def get_pubmed_service(api_key: Optional[str] = None) -> PubMedService:
     """
     global _service
     if _service is None:
-        _service = PubMedService(api_key=api_key)
+        with _service_lock:
+            if _service is None:
+                _service = PubMedService(api_key=api_key)
     return _service
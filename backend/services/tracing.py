@@ -1,28 +1,35 @@
 """OpenAI Tracing Service - Custom instrumentation for LLM calls and agent workflows."""
 
+import asyncio
 import os
 import uuid
 import time
 import logging
+from collections import OrderedDict
+from itertools import islice
 from datetime import datetime, timezone
 from typing import Optional, Dict, Any, List
-from dataclasses import dataclass, field, asdict
+from dataclasses import dataclass, field
 from contextlib import asynccontextmanager
 from functools import wraps
-import json
+import orjson
 
 from config import settings
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of traces kept in memory; oldest are evicted first
+MAX_STORED_TRACES = 1000
+
+# Maximum completed traces buffered for LangSmith before new ones are dropped
+LANGSMITH_QUEUE_SIZE = 10_000
+
 # LangSmith integration
 _langsmith_enabled = False
-_langsmith_trace = None
-_langsmith_traceable = None
 
 def _setup_langsmith():
     """Setup LangSmith tracing if enabled."""
-    global _langsmith_enabled, _langsmith_trace, _langsmith_traceable
+    global _langsmith_enabled
 
     if settings.LANGSMITH_TRACING_ENABLED and settings.LANGSMITH_API_KEY:
         # Set environment variables for LangSmith
@@ -31,9 +38,7 @@ def _setup_langsmith():
         os.environ["LANGCHAIN_PROJECT"] = settings.LANGSMITH_PROJECT
 
         try:
-            from langsmith import trace as ls_trace, traceable
-            _langsmith_trace = ls_trace
-            _langsmith_traceable = traceable
+            import langsmith  # noqa: F401
             _langsmith_enabled = True
             logger.info(f"LangSmith tracing enabled for project: {settings.LANGSMITH_PROJECT}")
         except ImportError:
@@ -45,7 +50,7 @@ def _setup_langsmith():
 _setup_langsmith()
 
 
-@dataclass
+@dataclass(slots=True)
 class LLMSpan:
     """Represents a single LLM call span."""
     span_id: str
@@ -74,10 +79,20 @@ class LLMSpan:
     # Custom metadata
     metadata: Dict[str, Any] = field(default_factory=dict)
 
+    # Timestamps pre-formatted once so to_dict() does no datetime work
+    _start_iso: Optional[str] = field(default=None, init=False, repr=False)
+    _end_iso: Optional[str] = field(default=None, init=False, repr=False)
+    # Monotonic start for duration_ms; start_time/end_time are wall clock for display
+    _start_perf_ns: int = field(default_factory=time.perf_counter_ns, init=False, repr=False)
+
+    def __post_init__(self):
+        self._start_iso = self.start_time.isoformat() if self.start_time else None
+
     def complete(self, response_text: str = None, usage: Dict = None):
         """Mark the span as completed."""
         self.end_time = datetime.now(timezone.utc)
-        self.duration_ms = (self.end_time - self.start_time).total_seconds() * 1000
+        self.duration_ms = (time.perf_counter_ns() - self._start_perf_ns) / 1e6
+        self._end_iso = self.end_time.isoformat()
         self.status = "completed"
 
         if response_text:
@@ -91,22 +106,35 @@ class LLMSpan:
     def fail(self, error: str):
         """Mark the span as failed."""
         self.end_time = datetime.now(timezone.utc)
-        self.duration_ms = (self.end_time - self.start_time).total_seconds() * 1000
+        self.duration_ms = (time.perf_counter_ns() - self._start_perf_ns) / 1e6
+        self._end_iso = self.end_time.isoformat()
         self.status = "error"
         self.error_message = error
 
     def to_dict(self) -> Dict:
         """Convert to dictionary for logging/storage."""
-        data = asdict(self)
-        # Convert datetime to ISO format
-        if self.start_time:
-            data["start_time"] = self.start_time.isoformat()
-        if self.end_time:
-            data["end_time"] = self.end_time.isoformat()
-        return data
+        return {
+            "span_id": self.span_id,
+            "trace_id": self.trace_id,
+            "parent_id": self.parent_id,
+            "operation": self.operation,
+            "model": self.model,
+            "start_time": self._start_iso,
+            "end_time": self._end_iso,
+            "duration_ms": self.duration_ms,
+            "prompt_tokens": self.prompt_tokens,
+            "max_tokens": self.max_tokens,
+            "temperature": self.temperature,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.total_tokens,
+            "response_length": self.response_length,
+            "status": self.status,
+            "error_message": self.error_message,
+            "metadata": self.metadata,
+        }
 
 
-@dataclass
+@dataclass(slots=True)
 class AgentSpan:
     """Represents an agent execution span."""
     span_id: str
@@ -132,10 +160,20 @@ class AgentSpan:
     # Custom metadata
     metadata: Dict[str, Any] = field(default_factory=dict)
 
+    # Timestamps pre-formatted once so to_dict() does no datetime work
+    _start_iso: Optional[str] = field(default=None, init=False, repr=False)
+    _end_iso: Optional[str] = field(default=None, init=False, repr=False)
+    # Monotonic start for duration_ms; start_time/end_time are wall clock for display
+    _start_perf_ns: int = field(default_factory=time.perf_counter_ns, init=False, repr=False)
+
+    def __post_init__(self):
+        self._start_iso = self.start_time.isoformat() if self.start_time else None
+
     def complete(self, output_summary: str = None):
         """Mark the agent span as completed."""
         self.end_time = datetime.now(timezone.utc)
-        self.duration_ms = (self.end_time - self.start_time).total_seconds() * 1000
+        self.duration_ms = (time.perf_counter_ns() - self._start_perf_ns) / 1e6
+        self._end_iso = self.end_time.isoformat()
         self.status = "completed"
         if output_summary:
             self.output_summary = output_summary
@@ -143,21 +181,32 @@ class AgentSpan:
     def fail(self, error: str):
         """Mark the agent span as failed."""
         self.end_time = datetime.now(timezone.utc)
-        self.duration_ms = (self.end_time - self.start_time).total_seconds() * 1000
+        self.duration_ms = (time.perf_counter_ns() - self._start_perf_ns) / 1e6
+        self._end_iso = self.end_time.isoformat()
         self.status = "error"
         self.error_message = error
 
     def to_dict(self) -> Dict:
         """Convert to dictionary for logging/storage."""
-        data = asdict(self)
-        if self.start_time:
-            data["start_time"] = self.start_time.isoformat()
-        if self.end_time:
-            data["end_time"] = self.end_time.isoformat()
-        return data
+        return {
+            "span_id": self.span_id,
+            "trace_id": self.trace_id,
+            "parent_id": self.parent_id,
+            "agent_name": self.agent_name,
+            "start_time": self._start_iso,
+            "end_time": self._end_iso,
+            "duration_ms": self.duration_ms,
+            "input_summary": self.input_summary,
+            "output_summary": self.output_summary,
+            "steps_count": self.steps_count,
+            "llm_spans": list(self.llm_spans),
+            "status": self.status,
+            "error_message": self.error_message,
+            "metadata": self.metadata,
+        }
 
 
-@dataclass
+@dataclass(slots=True)
 class Trace:
     """A complete trace of an operation."""
     trace_id: str
@@ -183,10 +232,20 @@ class Trace:
     # Custom metadata
     metadata: Dict[str, Any] = field(default_factory=dict)
 
+    # Timestamps pre-formatted once so to_dict() does no datetime work
+    _start_iso: Optional[str] = field(default=None, init=False, repr=False)
+    _end_iso: Optional[str] = field(default=None, init=False, repr=False)
+    # Monotonic start for duration_ms; start_time/end_time are wall clock for display
+    _start_perf_ns: int = field(default_factory=time.perf_counter_ns, init=False, repr=False)
+
+    def __post_init__(self):
+        self._start_iso = self.start_time.isoformat() if self.start_time else None
+
     def complete(self):
         """Mark the trace as completed and compute summary stats."""
         self.end_time = datetime.now(timezone.utc)
-        self.duration_ms = (self.end_time - self.start_time).total_seconds() * 1000
+        self.duration_ms = (time.perf_counter_ns() - self._start_perf_ns) / 1e6
+        self._end_iso = self.end_time.isoformat()
         self.status = "completed"
 
         # Compute summary stats
@@ -199,7 +258,8 @@ class Trace:
     def fail(self, error: str):
         """Mark the trace as failed."""
         self.end_time = datetime.now(timezone.utc)
-        self.duration_ms = (self.end_time - self.start_time).total_seconds() * 1000
+        self.duration_ms = (time.perf_counter_ns() - self._start_perf_ns) / 1e6
+        self._end_iso = self.end_time.isoformat()
         self.status = "error"
         self.error_message = error
 
@@ -209,8 +269,8 @@ class Trace:
             "trace_id": self.trace_id,
             "operation": self.operation,
             "patient_id": self.patient_id,
-            "start_time": self.start_time.isoformat() if self.start_time else None,
-            "end_time": self.end_time.isoformat() if self.end_time else None,
+            "start_time": self._start_iso,
+            "end_time": self._end_iso,
             "duration_ms": self.duration_ms,
             "status": self.status,
             "error_message": self.error_message,
@@ -223,15 +283,102 @@ class Trace:
         }
 
 
+class _LazyJSON:
+    """Defers trace serialization until a log handler actually formats it."""
+
+    __slots__ = ("_trace",)
+
+    def __init__(self, trace: "Trace"):
+        self._trace = trace
+
+    def __str__(self) -> str:
+        return orjson.dumps(
+            self._trace.to_dict(),
+            default=str,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_NAIVE_UTC
+        ).decode()
+
+
+def _llm_run_kwargs(span: LLMSpan) -> Dict[str, Any]:
+    """Build LangSmith run fields for an LLM span."""
+    return {
+        "name": "openai_chat_completion",
+        "run_type": "llm",
+        "start_time": span.start_time,
+        "end_time": span.end_time,
+        "error": span.error_message,
+        "inputs": {"max_tokens": span.max_tokens, "temperature": span.temperature},
+        "outputs": {
+            "response_length": span.response_length,
+            "usage": {
+                "prompt_tokens": span.prompt_tokens,
+                "completion_tokens": span.completion_tokens,
+                "total_tokens": span.total_tokens,
+            },
+        },
+        "extra": {"metadata": {"span_id": span.span_id, "model": span.model, **span.metadata}},
+    }
+
+
+def _post_to_langsmith(item: Any) -> None:
+    """Post a completed trace (or a standalone LLM span) to LangSmith as a run tree.
+
+    Blocking; runs in a worker thread off the request path.
+    """
+    from langsmith.run_trees import RunTree
+
+    if isinstance(item, LLMSpan):
+        RunTree(project_name=settings.LANGSMITH_PROJECT, **_llm_run_kwargs(item)).post()
+        return
+
+    root = RunTree(
+        name=item.operation,
+        run_type="chain",
+        start_time=item.start_time,
+        end_time=item.end_time,
+        error=item.error_message,
+        extra={"metadata": {
+            "trace_id": item.trace_id,
+            "operation": item.operation,
+            **({"patient_id": item.patient_id} if item.patient_id else {}),
+            **item.metadata
+        }},
+        project_name=settings.LANGSMITH_PROJECT
+    )
+
+    # Agent spans are recorded in start order, so parents precede their children
+    runs: Dict[str, Any] = {}
+    for span in item.agent_spans:
+        parent = runs.get(span.parent_id, root)
+        runs[span.span_id] = parent.create_child(
+            span.agent_name,
+            "chain",
+            start_time=span.start_time,
+            end_time=span.end_time,
+            error=span.error_message,
+            inputs={"input_summary": span.input_summary},
+            outputs={"output_summary": span.output_summary},
+            extra={"metadata": {"span_id": span.span_id, **span.metadata}}
+        )
+
+    for span in item.llm_spans:
+        runs.get(span.parent_id, root).create_child(**_llm_run_kwargs(span))
+
+    root.post(exclude_child_runs=False)
+
+
 class TracingService:
     """Service for tracing LLM calls and agent workflows."""
 
     def __init__(self):
         self._current_trace: Optional[Trace] = None
         self._current_agent_span: Optional[AgentSpan] = None
-        self._traces: Dict[str, Trace] = {}  # In-memory storage
-        self._langsmith_context = None  # Current LangSmith trace context
-        self._langsmith_agent_contexts: List[Any] = []  # Stack of agent contexts
+        self._traces: "OrderedDict[str, Trace]" = OrderedDict()  # In-memory storage, oldest first
+        # Completed traces are shipped to LangSmith by a background worker
+        self._ls_queue: Optional[asyncio.Queue] = None
+        self._ls_worker_task: Optional[asyncio.Task] = None
+        self._ls_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._ls_dropped = 0
 
     def generate_trace_id(self) -> str:
         """Generate a unique trace ID."""
@@ -255,8 +402,8 @@ class TracingService:
                 # Your code here
                 pass
 
-        When LangSmith is enabled, this also creates a parent trace in LangSmith
-        that groups all nested LLM calls together.
+        When LangSmith is enabled, the completed trace (with its agent and LLM
+        spans nested under it) is queued for a background worker to ship.
         """
         trace_id = self.generate_trace_id()
         trace_obj = Trace(
@@ -269,50 +416,27 @@ class TracingService:
 
         self._current_trace = trace_obj
         self._traces[trace_id] = trace_obj
-        self._langsmith_context = None
+        if len(self._traces) > MAX_STORED_TRACES:
+            self._traces.popitem(last=False)
 
         logger.info(f"[TRACE START] {trace_id} - {operation}" + (f" (patient: {patient_id})" if patient_id else ""))
 
-        # Build LangSmith metadata
-        ls_metadata = {
-            "trace_id": trace_id,
-            "operation": operation,
-            **({"patient_id": patient_id} if patient_id else {}),
-            **(metadata or {})
-        }
-
-        # Enter LangSmith trace context if enabled
-        if _langsmith_enabled and _langsmith_trace:
-            self._langsmith_context = _langsmith_trace(
-                name=f"{operation}",
-                run_type="chain",
-                metadata=ls_metadata,
-                project_name=settings.LANGSMITH_PROJECT
-            )
-            self._langsmith_context.__enter__()
-            logger.debug(f"[LANGSMITH] Started trace: {operation}")
-
         try:
             yield trace_obj
             trace_obj.complete()
             logger.info(
-                f"[TRACE END] {trace_id} - {operation} "
-                f"(duration: {trace_obj.duration_ms:.0f}ms, "
-                f"llm_calls: {trace_obj.total_llm_calls}, "
-                f"tokens: {trace_obj.total_tokens})"
+                "[TRACE END] %s - %s (duration: %.0fms, llm_calls: %d, tokens: %d)",
+                trace_id, operation, trace_obj.duration_ms,
+                trace_obj.total_llm_calls, trace_obj.total_tokens
             )
         except Exception as e:
             trace_obj.fail(str(e))
             logger.error(f"[TRACE ERROR] {trace_id} - {operation}: {e}")
             raise
         finally:
-            # Exit LangSmith context
-            if self._langsmith_context:
-                self._langsmith_context.__exit__(None, None, None)
-                logger.debug(f"[LANGSMITH] Ended trace: {operation}")
             self._current_trace = None
-            self._langsmith_context = None
             self._log_trace(trace_obj)
+            self._enqueue_langsmith(trace_obj)
 
     @asynccontextmanager
     async def agent_span(
@@ -328,7 +452,8 @@ class TracingService:
                 # Agent code here
                 pass
 
-        When LangSmith is enabled, this creates a nested span under the parent trace.
+        When LangSmith is enabled, the span is shipped nested under its parent
+        trace once that trace completes.
         """
         span_id = self.generate_span_id()
         trace_id = self._current_trace.trace_id if self._current_trace else self.generate_trace_id()
@@ -352,23 +477,6 @@ class TracingService:
 
         logger.debug(f"[AGENT START] {span_id} - {agent_name}")
 
-        # Create nested LangSmith span if enabled
-        ls_agent_context = None
-        if _langsmith_enabled and _langsmith_trace:
-            ls_metadata = {
-                "span_id": span_id,
-                "agent_name": agent_name,
-                **({"input_summary": input_summary[:100]} if input_summary else {}),
-                **(metadata or {})
-            }
-            ls_agent_context = _langsmith_trace(
-                name=agent_name,
-                run_type="chain",
-                metadata=ls_metadata
-            )
-            ls_agent_context.__enter__()
-            self._langsmith_agent_contexts.append(ls_agent_context)
-
         try:
             yield span
             span.complete()
@@ -381,11 +489,6 @@ class TracingService:
             logger.error(f"[AGENT ERROR] {span_id} - {agent_name}: {e}")
             raise
         finally:
-            # Exit LangSmith agent context
-            if ls_agent_context:
-                ls_agent_context.__exit__(None, None, None)
-                if self._langsmith_agent_contexts:
-                    self._langsmith_agent_contexts.pop()
             self._current_agent_span = previous_span
 
     def start_llm_span(
@@ -439,11 +542,57 @@ class TracingService:
             f"(duration: {span.duration_ms:.0f}ms, "
             f"tokens: {span.total_tokens or 'N/A'})"
         )
+        self._enqueue_standalone_span(span)
 
     def fail_llm_span(self, span: LLMSpan, error: str):
         """Mark an LLM span as failed."""
         span.fail(error)
         logger.warning(f"[LLM ERROR] {span.span_id} - {span.model}: {error}")
+        self._enqueue_standalone_span(span)
+
+    def _enqueue_standalone_span(self, span: LLMSpan):
+        """Ship an LLM span on its own if no active trace will carry it."""
+        if self._current_trace is None or self._current_trace.trace_id != span.trace_id:
+            self._enqueue_langsmith(span)
+
+    def _enqueue_langsmith(self, item: Any):
+        """Queue a completed trace or span for LangSmith without blocking.
+
+        The worker task is started lazily on the running event loop. When the
+        queue is full the item is dropped so tracing never blocks real work.
+        """
+        if not _langsmith_enabled:
+            return
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+
+        if self._ls_loop is not loop:
+            self._ls_loop = loop
+            self._ls_queue = asyncio.Queue(maxsize=LANGSMITH_QUEUE_SIZE)
+            self._ls_worker_task = None
+        if self._ls_worker_task is None or self._ls_worker_task.done():
+            self._ls_worker_task = loop.create_task(self._ls_worker())
+
+        try:
+            self._ls_queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self._ls_dropped += 1
+            logger.warning(f"[LANGSMITH] Queue full, dropped trace ({self._ls_dropped} dropped so far)")
+
+    async def _ls_worker(self):
+        """Drain the LangSmith queue, posting each item from a worker thread."""
+        queue = self._ls_queue
+        while True:
+            item = await queue.get()
+            try:
+                await asyncio.to_thread(_post_to_langsmith, item)
+            except Exception as e:
+                logger.warning(f"[LANGSMITH] Failed to ship trace: {e}")
+            finally:
+                queue.task_done()
 
     def get_trace(self, trace_id: str) -> Optional[Trace]:
         """Get a trace by ID."""
@@ -455,18 +604,16 @@ class TracingService:
 
     def get_recent_traces(self, limit: int = 10) -> List[Dict]:
         """Get recent traces for debugging."""
-        traces = sorted(
-            self._traces.values(),
-            key=lambda t: t.start_time,
-            reverse=True
-        )[:limit]
+        # Traces are inserted in start order, so the newest are at the end
+        traces = islice(reversed(self._traces.values()), limit)
         return [t.to_dict() for t in traces]
 
     def _log_trace(self, trace: Trace):
         """Log the complete trace for debugging/analysis."""
-        trace_data = trace.to_dict()
-        # Log as structured data
-        logger.info(f"[TRACE COMPLETE] {json.dumps(trace_data, default=str)}")
+        if not logger.isEnabledFor(logging.INFO):
+            return
+        # Log as structured data; serialized only if a handler emits the record
+        logger.info("[TRACE COMPLETE] %s", _LazyJSON(trace))
 
 
 # Global tracing service instance
@@ -1,13 +1,78 @@
 """Vector Store Service for managing RAG vector stores."""
 
-from typing import Dict, List, Optional, Any
+from functools import lru_cache, partial
+from typing import Dict, List, Optional, Any, Tuple
+import asyncio
+import heapq
 import logging
+import re
 
 from rag.embeddings import EmbeddingService
 from rag.vector_store import VectorStore, SearchResult
 from rag.retriever import Retriever, RetrievalConfig
 from rag.reranker import Reranker, RerankerConfig
 from rag.ingestion import DataIngestion
+from rag.query_cache import ProximityCache
+
+# Bare gene symbols (EGFR, KRAS, ERBB2) are looked up by exact metadata match
+_GENE_SYMBOL_RE = re.compile(r"^[A-Z0-9]{2,10}$")
+
+
+# Search configs are shared between calls with the same parameters; never mutate them
+@lru_cache(maxsize=64)
+def _retrieval_config(top_k: int, rerank: bool, min_score: float) -> RetrievalConfig:
+    return RetrievalConfig(
+        top_k=top_k * 2 if rerank else top_k,  # Get more for reranking
+        expand_query=True,
+        min_score=min_score * 0.7,  # Lower threshold before reranking
+        diversity_factor=0.1
+    )
+
+
+@lru_cache(maxsize=64)
+def _reranker_config(top_k: int, min_score: float) -> RerankerConfig:
+    return RerankerConfig(
+        top_k=top_k,
+        boost_recency=True,
+        boost_source_quality=True,
+        min_score=min_score
+    )
+
+
+# Literal chunks of the indexing templates, interleaved with field values
+# and joined once per document.
+_MUTATION_TPL = (
+    "Genetic Mutation: ", " ",
+    "\nClassification: ",
+    "\nFDA-Approved Therapies: ",
+    "\nClinical Significance: This mutation may affect treatment response and therapy selection.",
+)
+_MARKERS_TPL = (
+    "Immunotherapy Markers:\nPD-L1 Expression: ",
+    "%\nTumor Mutational Burden (TMB): ",
+    " mutations/Mb\nMSI Status: ",
+    "\nThese markers help determine eligibility for immunotherapy treatments.",
+)
+_TREATMENT_TPL = (
+    "Treatment Recommendation: ",
+    "\nCategory: ",
+    "\nConfidence Score: ",
+    "\nRationale: ",
+)
+_TRIAL_TPL = (
+    "Clinical Trial: ",
+    "\nNCT ID: ",
+    "\nPhase: ",
+    "\nMatch Score: ",
+    "\nEligibility: ",
+)
+_PROCEDURE_TPL = (
+    "Treatment Procedure: ",
+    "\nType: ",
+    "\nCycle Day: Day ",
+    "\nStatus: ",
+    "\nScheduled Date: ",
+)
 
 
 class VectorStoreService:
@@ -23,15 +88,36 @@ class VectorStoreService:
     # Default namespaces
     DEFAULT_NAMESPACES = ["evidence", "trials", "genomics", "guidelines", "procedures"]
 
-    def __init__(self, use_mock: bool = True):
+    # Namespaces whose searches only hit the query cache on identical text;
+    # queries for two variants of one gene differ by a few characters and
+    # must never share results
+    EXACT_CACHE_NAMESPACES = {"genomics"}
+
+    def __init__(
+        self,
+        use_mock: bool = True,
+        query_cache_size: int = 256,
+        query_cache_tolerance: float = 0.05
+    ):
         """Initialize vector store service.
 
         Args:
             use_mock: Whether to use mock mode
+            query_cache_size: Max cached searches (0 disables the semantic cache)
+            query_cache_tolerance: Max cosine distance for a semantic cache hit
         """
         self.use_mock = use_mock
         self.logger = logging.getLogger("service.vector_store")
 
+        # Approximate cache of recent searches keyed by query embedding
+        self.query_cache = ProximityCache(
+            capacity=query_cache_size,
+            tolerance=query_cache_tolerance
+        )
+        # Bumped after every write; a search only caches results if no write
+        # finished while it ran
+        self._write_generation = 0
+
         # Initialize embedding service
         self.embedding_service = EmbeddingService(use_mock=use_mock)
 
@@ -41,7 +127,8 @@ class VectorStoreService:
             self.vector_stores[namespace] = VectorStore(
                 embedding_service=self.embedding_service,
                 use_mock=use_mock,
-                namespace=namespace
+                namespace=namespace,
+                quantize="int8"
             )
 
         # Initialize retriever
@@ -65,6 +152,19 @@ class VectorStoreService:
 
         self._initialized = False
 
+        # Document counts, recomputed only after a write through this service
+        self._counts_cache: Dict[str, int] = {}
+        self._counts_dirty = True
+
+        # search() pre-bound with each domain wrapper's fixed parameters. Their
+        # queries are templates filled with drug, gene and variant names, so a
+        # near-duplicate query names a different entity: cache on exact text only
+        self._search_evidence = partial(
+            self.search, namespaces=["evidence", "guidelines"], top_k=15, semantic_cache=False
+        )
+        self._search_trials = partial(self.search, namespaces=["trials"], top_k=20, semantic_cache=False)
+        self._search_mutations = partial(self.search, namespaces=["genomics"], top_k=10, semantic_cache=False)
+
     async def initialize(self) -> Dict[str, int]:
         """Initialize vector stores with mock data.
 
@@ -78,10 +178,23 @@ class VectorStoreService:
         self.logger.info("Initializing vector stores with mock data...")
         results = await self.ingestion.load_all_mock_data()
         self._initialized = True
+        self.query_cache.clear()
+        self._write_generation += 1
+        self._counts_dirty = True
 
         self.logger.info(f"Initialized vector stores: {results}")
         return results
 
+    def _invalidate(self, namespace: str):
+        """Drop cached state for a namespace once a write to it has finished.
+
+        Runs after the write rather than before it, so a search that ran
+        during the write can't leave stale results cached.
+        """
+        self.query_cache.invalidate_namespace(namespace)
+        self._write_generation += 1
+        self._counts_dirty = True
+
     async def index_document(
         self,
         namespace: str,
@@ -104,7 +217,65 @@ class VectorStoreService:
             self.logger.error(f"Unknown namespace: {namespace}")
             return False
 
-        return await self.vector_stores[namespace].upsert(doc_id, content, metadata)
+        try:
+            return await self.vector_stores[namespace].upsert(doc_id, content, metadata)
+        finally:
+            self._invalidate(namespace)
+
+    async def index_documents(
+        self,
+        namespace: str,
+        documents: List[Dict[str, Any]]
+    ) -> int:
+        """Index multiple documents in a namespace with one batched embedding call.
+
+        Args:
+            namespace: Vector store namespace
+            documents: List of dicts with doc_id, content, metadata
+
+        Returns:
+            Number of documents indexed
+        """
+        if namespace not in self.vector_stores:
+            self.logger.error(f"Unknown namespace: {namespace}")
+            return 0
+
+        try:
+            return await self.vector_stores[namespace].upsert_batch(documents)
+        finally:
+            self._invalidate(namespace)
+
+    async def _index_planned(
+        self,
+        planned: List[Tuple[str, str, Dict[str, Any]]],
+        indexed: Dict[str, int]
+    ):
+        """Write planned (category, namespace, document) entries, one batch per namespace.
+
+        The per-namespace batches are independent, so their writes run concurrently.
+
+        Args:
+            planned: Documents to index, tagged with their count category and namespace
+            indexed: Per-category counters to update for each namespace written
+        """
+        by_namespace: Dict[str, List[Tuple[str, Dict[str, Any]]]] = {}
+        for category, namespace, document in planned:
+            by_namespace.setdefault(namespace, []).append((category, document))
+
+        tasks = [
+            self.index_documents(namespace, [document for _, document in entries])
+            for namespace, entries in by_namespace.items()
+        ]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        for (namespace, entries), result in zip(by_namespace.items(), results):
+            if isinstance(result, Exception):
+                self.logger.error(f"Failed to index {len(entries)} documents in {namespace}: {result}")
+                continue
+            if not result:
+                continue
+            for category, _ in entries:
+                indexed[category] += 1
 
     async def search(
         self,
@@ -113,7 +284,9 @@ class VectorStoreService:
         top_k: int = 10,
         min_score: float = 0.3,
         filter_metadata: Optional[Dict[str, Any]] = None,
-        rerank: bool = True
+        rerank: bool = True,
+        canonical_sort: bool = False,
+        semantic_cache: bool = True
     ) -> List[SearchResult]:
         """Search for relevant documents.
 
@@ -124,17 +297,38 @@ class VectorStoreService:
             min_score: Minimum score threshold
             filter_metadata: Optional metadata filter
             rerank: Whether to rerank results
+            canonical_sort: Return the selected results ordered by
+                (namespace, doc_id) instead of by score, so repeated retrievals
+                of the same documents build identical LLM prompts
+            semantic_cache: Serve cached results for near-duplicate queries;
+                if False, or when searching a namespace in EXACT_CACHE_NAMESPACES,
+                only the identical query text is served from the cache
 
         Returns:
             List of search results
         """
+        # Serve repeated or paraphrased queries from the semantic cache
+        cache_key = None
+        generation = self._write_generation
+        if self.query_cache.enabled:
+            exact = not semantic_cache or not self.EXACT_CACHE_NAMESPACES.isdisjoint(
+                namespaces or self.vector_stores
+            )
+            cache_key = (
+                tuple(sorted(namespaces)) if namespaces else None,
+                tuple(sorted((k, repr(v)) for k, v in filter_metadata.items())) if filter_metadata else None,
+                min_score,
+                rerank,
+                # Keying on the text leaves only identical queries in the bucket
+                query if exact else None
+            )
+            query_embedding = await self.embedding_service.embed_text(query)
+            cached = self.query_cache.get(cache_key, query_embedding, top_k)
+            if cached is not None:
+                return self._canonical_order(cached) if canonical_sort else cached
+
         # Configure retrieval
-        retrieval_config = RetrievalConfig(
-            top_k=top_k * 2 if rerank else top_k,  # Get more for reranking
-            expand_query=True,
-            min_score=min_score * 0.7,  # Lower threshold before reranking
-            diversity_factor=0.1
-        )
+        retrieval_config = _retrieval_config(top_k, rerank, min_score)
 
         # Retrieve results
         results = await self.retriever.retrieve(
@@ -144,19 +338,30 @@ class VectorStoreService:
             filter_metadata=filter_metadata
         )
 
-        # Rerank if requested
-        if rerank and len(results) > 0:
-            reranker_config = RerankerConfig(
-                top_k=top_k,
-                boost_recency=True,
-                boost_source_quality=True
-            )
+        # Rerank if requested; the reranker applies the final score threshold itself.
+        # A cross-encoder pass is skipped when retrieval already returned a tight set.
+        if rerank and len(results) > 0 and (
+            not self.reranker.uses_cross_encoder
+            or len(results) > max(top_k + 2, int(top_k * 1.5))
+        ):
+            reranker_config = _reranker_config(top_k, min_score)
             results = await self.reranker.rerank(query, results, reranker_config)
+        else:
+            results = heapq.nlargest(
+                top_k,
+                (r for r in results if r.score >= min_score),
+                key=lambda r: r.score
+            )
 
-        # Filter by final score threshold
-        results = [r for r in results if r.score >= min_score]
+        if cache_key is not None and generation == self._write_generation:
+            self.query_cache.put(cache_key, query_embedding, top_k, results)
 
-        return results[:top_k]
+        return self._canonical_order(results) if canonical_sort else results
+
+    @staticmethod
+    def _canonical_order(results: List[SearchResult]) -> List[SearchResult]:
+        """Order results deterministically by (namespace, doc_id)."""
+        return sorted(results, key=lambda r: (r.metadata.get("namespace", ""), r.doc_id))
 
     async def search_evidence(
         self,
@@ -180,13 +385,7 @@ class VectorStoreService:
         if mutations:
             query_parts.extend(mutations[:2])
 
-        query = " ".join(query_parts)
-
-        return await self.search(
-            query=query,
-            namespaces=["evidence", "guidelines"],
-            top_k=15
-        )
+        return await self._search_evidence(" ".join(query_parts))
 
     async def search_trials(
         self,
@@ -208,12 +407,8 @@ class VectorStoreService:
         if mutations:
             query_parts.extend(mutations[:3])
 
-        query = " ".join(query_parts)
-
-        return await self.search(
-            query=query,
-            namespaces=["trials"],
-            top_k=20,
+        return await self._search_trials(
+            " ".join(query_parts),
             filter_metadata={"status": status} if status else None
         )
 
@@ -231,13 +426,13 @@ class VectorStoreService:
         Returns:
             Mutation information
         """
-        query = f"{gene} {variant or ''} mutation targeted therapy"
+        # A bare gene symbol is a literal lookup: match the indexed gene exactly
+        if variant is None and _GENE_SYMBOL_RE.match(gene):
+            exact = await self.vector_stores["genomics"].filter({"gene": gene}, top_k=10)
+            if exact:
+                return exact
 
-        return await self.search(
-            query=query,
-            namespaces=["genomics"],
-            top_k=10
-        )
+        return await self._search_mutations(f"{gene} {variant or ''} mutation targeted therapy")
 
     async def delete_document(
         self,
@@ -256,7 +451,10 @@ class VectorStoreService:
         if namespace not in self.vector_stores:
             return False
 
-        return await self.vector_stores[namespace].delete(doc_id)
+        try:
+            return await self.vector_stores[namespace].delete(doc_id)
+        finally:
+            self._invalidate(namespace)
 
     async def clear_namespace(self, namespace: str) -> bool:
         """Clear all documents in a namespace.
@@ -270,7 +468,10 @@ class VectorStoreService:
         if namespace not in self.vector_stores:
             return False
 
-        return await self.vector_stores[namespace].clear()
+        try:
+            return await self.vector_stores[namespace].clear()
+        finally:
+            self._invalidate(namespace)
 
     def get_document_counts(self) -> Dict[str, int]:
         """Get document counts for all namespaces.
@@ -278,10 +479,13 @@ class VectorStoreService:
         Returns:
             Dict mapping namespace to count
         """
-        return {
-            namespace: store.count
-            for namespace, store in self.vector_stores.items()
-        }
+        if self._counts_dirty:
+            self._counts_cache = {
+                namespace: store.count
+                for namespace, store in self.vector_stores.items()
+            }
+            self._counts_dirty = False
+        return dict(self._counts_cache)
 
     def add_namespace(self, namespace: str) -> bool:
         """Add a new namespace.
@@ -298,8 +502,10 @@ class VectorStoreService:
         self.vector_stores[namespace] = VectorStore(
             embedding_service=self.embedding_service,
             use_mock=self.use_mock,
-            namespace=namespace
+            namespace=namespace,
+            quantize="int8"
         )
+        self._counts_dirty = True
 
         return True
 
@@ -323,114 +529,105 @@ class VectorStoreService:
             Dict with count of documents indexed per category
         """
         indexed = {"genomic": 0, "treatment": 0, "trials": 0, "summary": 0}
+        planned: List[Tuple[str, str, Dict[str, Any]]] = []
 
         try:
-            # Index genomic findings
+            # Genomic findings
             genomic_report = analysis_data.get("genomic_report", {})
             if genomic_report:
                 mutations = genomic_report.get("mutations", [])
                 for i, mutation in enumerate(mutations):
-                    doc_id = f"{analysis_id}_genomic_{i}"
                     content = self._format_mutation_for_indexing(mutation)
                     if content:
-                        await self.index_document(
-                            namespace="genomics",
-                            doc_id=doc_id,
-                            content=content,
-                            metadata={
+                        planned.append(("genomic", "genomics", {
+                            "doc_id": f"{analysis_id}_genomic_{i}",
+                            "content": content,
+                            "metadata": {
                                 "patient_id": patient_id,
                                 "analysis_id": analysis_id,
                                 "type": "mutation",
                                 "gene": mutation.get("gene", "")
                             }
-                        )
-                        indexed["genomic"] += 1
+                        }))
 
-                # Index immunotherapy markers
+                # Immunotherapy markers
                 markers = genomic_report.get("immunotherapy_markers", {})
                 if markers:
-                    doc_id = f"{analysis_id}_markers"
                     content = self._format_markers_for_indexing(markers)
                     if content:
-                        await self.index_document(
-                            namespace="genomics",
-                            doc_id=doc_id,
-                            content=content,
-                            metadata={
+                        planned.append(("genomic", "genomics", {
+                            "doc_id": f"{analysis_id}_markers",
+                            "content": content,
+                            "metadata": {
                                 "patient_id": patient_id,
                                 "analysis_id": analysis_id,
                                 "type": "immunotherapy_markers"
                             }
-                        )
-                        indexed["genomic"] += 1
+                        }))
 
-            # Index treatment plan
+            # Treatment plan
             treatment_plan = analysis_data.get("treatment_plan", {})
             if treatment_plan:
                 options = treatment_plan.get("treatment_options", [])
                 for i, option in enumerate(options):
-                    doc_id = f"{analysis_id}_treatment_{i}"
                     content = self._format_treatment_for_indexing(option)
                     if content:
-                        await self.index_document(
-                            namespace="evidence",
-                            doc_id=doc_id,
-                            content=content,
-                            metadata={
+                        planned.append(("treatment", "evidence", {
+                            "doc_id": f"{analysis_id}_treatment_{i}",
+                            "content": content,
+                            "metadata": {
                                 "patient_id": patient_id,
                                 "analysis_id": analysis_id,
                                 "type": "treatment_recommendation",
                                 "treatment_name": option.get("name", "")
                             }
-                        )
-                        indexed["treatment"] += 1
+                        }))
 
-            # Index matched trials
+            # Matched trials
             matched_trials = analysis_data.get("matched_trials", [])
             for i, trial in enumerate(matched_trials):
-                doc_id = f"{analysis_id}_trial_{i}"
                 content = self._format_trial_for_indexing(trial)
                 if content:
-                    await self.index_document(
-                        namespace="trials",
-                        doc_id=doc_id,
-                        content=content,
-                        metadata={
+                    planned.append(("trials", "trials", {
+                        "doc_id": f"{analysis_id}_trial_{i}",
+                        "content": content,
+                        "metadata": {
                             "patient_id": patient_id,
                             "analysis_id": analysis_id,
                             "type": "matched_trial",
                             "nct_id": trial.get("nct_id", "")
                         }
-                    )
-                    indexed["trials"] += 1
+                    }))
 
-            # Index overall summary
+            # Overall summary
             summary = analysis_data.get("summary", "")
             key_findings = analysis_data.get("key_findings", [])
             recommendations = analysis_data.get("recommendations", [])
 
             if summary or key_findings or recommendations:
-                doc_id = f"{analysis_id}_summary"
+                findings_block = "- " + "\n- ".join(key_findings) if key_findings else "None"
+                recommendations_block = "- " + "\n- ".join(recommendations) if recommendations else "None"
                 content = f"""Patient Analysis Summary:
 {summary}
 
 Key Findings:
-{chr(10).join('- ' + f for f in key_findings) if key_findings else 'None'}
+{findings_block}
 
 Recommendations:
-{chr(10).join('- ' + r for r in recommendations) if recommendations else 'None'}"""
+{recommendations_block}"""
 
-                await self.index_document(
-                    namespace="evidence",
-                    doc_id=doc_id,
-                    content=content,
-                    metadata={
+                planned.append(("summary", "evidence", {
+                    "doc_id": f"{analysis_id}_summary",
+                    "content": content,
+                    "metadata": {
                         "patient_id": patient_id,
                         "analysis_id": analysis_id,
                         "type": "analysis_summary"
                     }
-                )
-                indexed["summary"] += 1
+                }))
+
+            # One batched embedding + upsert per namespace
+            await self._index_planned(planned, indexed)
 
             self.logger.info(f"Indexed analysis results for patient {patient_id}: {indexed}")
             return indexed
@@ -449,10 +646,14 @@ Recommendations:
         if not gene:
             return ""
 
-        return f"""Genetic Mutation: {gene} {variant}
-Classification: {classification}
-FDA-Approved Therapies: {', '.join(therapies) if therapies else 'None'}
-Clinical Significance: This mutation may affect treatment response and therapy selection."""
+        therapies_text = ", ".join(therapies) if therapies else "None"
+        tpl = _MUTATION_TPL
+        return "".join((
+            tpl[0], str(gene), tpl[1], str(variant),
+            tpl[2], str(classification),
+            tpl[3], therapies_text,
+            tpl[4],
+        ))
 
     def _format_markers_for_indexing(self, markers: dict) -> str:
         """Format immunotherapy markers for vector indexing."""
@@ -460,11 +661,13 @@ Clinical Significance: This mutation may affect treatment response and therapy s
         tmb = markers.get("tmb", "Unknown")
         msi = markers.get("msi_status", "Unknown")
 
-        return f"""Immunotherapy Markers:
-PD-L1 Expression: {pdl1}%
-Tumor Mutational Burden (TMB): {tmb} mutations/Mb
-MSI Status: {msi}
-These markers help determine eligibility for immunotherapy treatments."""
+        tpl = _MARKERS_TPL
+        return "".join((
+            tpl[0], str(pdl1),
+            tpl[1], str(tmb),
+            tpl[2], str(msi),
+            tpl[3],
+        ))
 
     def _format_treatment_for_indexing(self, treatment: dict) -> str:
         """Format treatment recommendation for vector indexing."""
@@ -476,10 +679,13 @@ These markers help determine eligibility for immunotherapy treatments."""
         if not name:
             return ""
 
-        return f"""Treatment Recommendation: {name}
-Category: {category}
-Confidence Score: {confidence:.0%}
-Rationale: {rationale}"""
+        tpl = _TREATMENT_TPL
+        return "".join((
+            tpl[0], str(name),
+            tpl[1], str(category),
+            tpl[2], format(confidence, ".0%"),
+            tpl[3], str(rationale),
+        ))
 
     def _format_trial_for_indexing(self, trial: dict) -> str:
         """Format clinical trial for vector indexing."""
@@ -492,17 +698,21 @@ Rationale: {rationale}"""
         if not nct_id:
             return ""
 
-        return f"""Clinical Trial: {title}
-NCT ID: {nct_id}
-Phase: {phase}
-Match Score: {match_score:.0%}
-Eligibility: {eligibility}"""
+        tpl = _TRIAL_TPL
+        return "".join((
+            tpl[0], str(title),
+            tpl[1], str(nct_id),
+            tpl[2], str(phase),
+            tpl[3], format(match_score, ".0%"),
+            tpl[4], str(eligibility),
+        ))
 
     async def search_patient_context(
         self,
         patient_id: str,
         query: str,
-        top_k: int = 5
+        top_k: int = 5,
+        canonical_sort: bool = False
     ) -> List[SearchResult]:
         """Search for patient-specific context.
 
@@ -510,22 +720,21 @@ Eligibility: {eligibility}"""
             patient_id: Filter results to this patient
             query: Search query
             top_k: Max results
+            canonical_sort: Order results by (namespace, doc_id) instead of score
 
         Returns:
             Relevant patient-specific results
         """
-        results = await self.search(
+        # The patient_id filter is applied inside each vector store, so every
+        # result already belongs to this patient
+        return await self.search(
             query=query,
             namespaces=["evidence", "genomics", "trials"],
-            top_k=top_k * 2,  # Get more, then filter
-            filter_metadata={"patient_id": patient_id}
+            top_k=top_k,
+            filter_metadata={"patient_id": patient_id},
+            canonical_sort=canonical_sort
         )
 
-        # Filter to patient-specific results
-        patient_results = [r for r in results if r.metadata.get("patient_id") == patient_id]
-
-        return patient_results[:top_k]
-
     async def health_check(self) -> Dict[str, Any]:
         """Check health of vector store service.
 
@@ -558,31 +767,30 @@ Eligibility: {eligibility}"""
             Dict with count of documents indexed per category
         """
         indexed = {"procedures": 0, "adverse_events": 0}
+        planned: List[Tuple[str, str, Dict[str, Any]]] = []
 
         try:
             for proc in procedures:
-                # Index procedure details
+                # Procedure details
                 proc_id = proc.get("id", "")
                 if not proc_id:
                     continue
 
                 content = self._format_procedure_for_indexing(proc)
                 if content:
-                    await self.index_document(
-                        namespace="procedures",
-                        doc_id=f"proc_{proc_id}",
-                        content=content,
-                        metadata={
+                    planned.append(("procedures", "procedures", {
+                        "doc_id": f"proc_{proc_id}",
+                        "content": content,
+                        "metadata": {
                             "patient_id": patient_id,
                             "procedure_id": proc_id,
                             "procedure_type": proc.get("procedure_type", ""),
                             "status": proc.get("status", ""),
                             "type": "procedure"
                         }
-                    )
-                    indexed["procedures"] += 1
+                    }))
 
-                # Index adverse events separately for better retrieval
+                # Adverse events are indexed separately for better retrieval
                 adverse_events = proc.get("adverse_events", [])
                 for i, ae in enumerate(adverse_events):
                     ae_content = f"""Adverse Event during {proc.get('procedure_name', 'procedure')}:
@@ -591,19 +799,20 @@ Grade: {ae.get('grade', 'N/A')} (CTCAE)
 Notes: {ae.get('notes', 'None')}
 Date: {proc.get('actual_date', proc.get('scheduled_date', 'Unknown'))}"""
 
-                    await self.index_document(
-                        namespace="procedures",
-                        doc_id=f"proc_{proc_id}_ae_{i}",
-                        content=ae_content,
-                        metadata={
+                    planned.append(("adverse_events", "procedures", {
+                        "doc_id": f"proc_{proc_id}_ae_{i}",
+                        "content": ae_content,
+                        "metadata": {
                             "patient_id": patient_id,
                             "procedure_id": proc_id,
                             "type": "adverse_event",
                             "event": ae.get("event", ""),
                             "grade": ae.get("grade")
                         }
-                    )
-                    indexed["adverse_events"] += 1
+                    }))
+
+            # One batched embedding + upsert for all procedure documents
+            await self._index_planned(planned, indexed)
 
             self.logger.info(f"Indexed procedures for patient {patient_id}: {indexed}")
             return indexed
@@ -626,43 +835,47 @@ Date: {proc.get('actual_date', proc.get('scheduled_date', 'Unknown'))}"""
         if not procedure_name:
             return ""
 
-        content = f"""Treatment Procedure: {procedure_name}
-Type: {procedure_type}
-Cycle Day: Day {day_number}
-Status: {status}
-Scheduled Date: {scheduled_date}"""
+        tpl = _PROCEDURE_TPL
+        parts = [
+            tpl[0], str(procedure_name),
+            tpl[1], str(procedure_type),
+            tpl[2], str(day_number),
+            tpl[3], str(status),
+            tpl[4], str(scheduled_date),
+        ]
 
         if status == "completed":
-            content += f"\nCompleted Date: {actual_date or scheduled_date}"
+            parts.append(f"\nCompleted Date: {actual_date or scheduled_date}")
             if actual_dose:
-                content += f"\nDose Administered: {actual_dose}"
+                parts.append(f"\nDose Administered: {actual_dose}")
             if notes:
-                content += f"\nNotes: {notes}"
+                parts.append(f"\nNotes: {notes}")
 
         # Add lab results summary if present
         lab_results = proc.get("lab_results")
         if lab_results:
-            content += "\nLab Results: "
-            lab_items = []
-            for test, result in lab_results.items():
+            lab_items = [None] * len(lab_results)
+            for i, (test, result) in enumerate(lab_results.items()):
                 if isinstance(result, dict):
-                    lab_items.append(f"{test}: {result.get('value', 'N/A')} {result.get('unit', '')} ({result.get('flag', 'normal')})")
+                    lab_items[i] = f"{test}: {result.get('value', 'N/A')} {result.get('unit', '')} ({result.get('flag', 'normal')})"
                 else:
-                    lab_items.append(f"{test}: {result}")
-            content += ", ".join(lab_items)
+                    lab_items[i] = f"{test}: {result}"
+            parts.append("\nLab Results: ")
+            parts.append(", ".join(lab_items))
 
         # Add imaging results summary if present
         imaging_results = proc.get("imaging_results")
         if imaging_results:
-            content += f"\nImaging ({imaging_results.get('modality', 'Unknown')}): {imaging_results.get('impression', imaging_results.get('findings', 'No findings'))}"
+            parts.append(f"\nImaging ({imaging_results.get('modality', 'Unknown')}): {imaging_results.get('impression', imaging_results.get('findings', 'No findings'))}")
 
-        return content
+        return "".join(parts)
 
     async def search_patient_procedures(
         self,
         patient_id: str,
         query: str,
-        top_k: int = 5
+        top_k: int = 5,
+        canonical_sort: bool = False
     ) -> List[SearchResult]:
         """Search patient procedures for RAG.
 
@@ -670,6 +883,7 @@ Scheduled Date: {scheduled_date}"""
             patient_id: Filter results to this patient
             query: Search query
             top_k: Max results
+            canonical_sort: Order results by (namespace, doc_id) instead of score
 
         Returns:
             Relevant procedure results
@@ -678,7 +892,8 @@ Scheduled Date: {scheduled_date}"""
             query=query,
             namespaces=["procedures"],
             top_k=top_k,
-            filter_metadata={"patient_id": patient_id}
+            filter_metadata={"patient_id": patient_id},
+            canonical_sort=canonical_sort
         )
 
     async def index_single_procedure(
@@ -1,10 +1,12 @@
 """Pytest configuration and fixtures for Cancer Care Coordinator tests."""
 
 import pytest
-from fastapi.testclient import TestClient
+import pytest_asyncio
 from datetime import date
+import logging
 import sys
 import os
+import tempfile
 
 # Add backend to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -13,38 +15,169 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 os.environ["USE_MOCK_LLM"] = "true"
 os.environ["USE_MOCK_VECTOR_STORE"] = "true"
 os.environ["USE_MOCK_TRIALS_API"] = "true"
+os.environ["MOCK_STEP_DELAYS"] = "false"
 
-from main import app
-from models.patient import (
-    Patient, CancerDetails, CancerType, CancerStage, ECOGStatus,
-    Comorbidity, OrganFunction, PatientSummary
-)
-from models.genomics import (
-    GenomicReport, Mutation, MutationClassification,
-    ImmunotherapyMarkers, Therapy
-)
-from models.treatment import (
-    TreatmentPlan, TreatmentOption, RecommendationLevel, EvidenceLevel,
-    ClinicalTrial, TrialPhase, TrialStatus
-)
-from models.messages import (
-    AnalysisRequest, AnalysisProgress, AnalysisResult,
-    ChatMessage, ChatRequest, ChatResponse
-)
-from services.patient_service import PatientService
-from services.llm_service import LLMService
+# Under pytest-xdist (pytest -n auto) each worker gets its own SQLite database,
+# emptied at the start of every run so rows created by earlier runs can't clash
+_xdist_worker = os.environ.get("PYTEST_XDIST_WORKER")
+if _xdist_worker and "DATABASE_URL" not in os.environ:
+    _worker_db = os.path.join(tempfile.gettempdir(), f"cancer_care_test_{_xdist_worker}.db")
+    if os.path.exists(_worker_db):
+        os.remove(_worker_db)
+    os.environ["DATABASE_URL"] = f"sqlite:///{_worker_db}"
 
+# Models, services and the app are imported inside the fixtures that use them,
+# so collecting a test module only loads what its tests need.
 
-@pytest.fixture
+
+@pytest.fixture(scope="session")
 def client():
-    """Create a test client for the FastAPI app."""
-    return TestClient(app)
+    """Create one test client for the FastAPI app, running its lifespan once per session."""
+    from fastapi.testclient import TestClient
+    from main import app
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest_asyncio.fixture(scope="session")
+async def aclient():
+    """Create one async client that calls the FastAPI app in-process over ASGI.
+
+    Async tests should use this instead of ``client``: requests go straight
+    to the app on the test's event loop, with no TestClient thread portal.
+    """
+    from httpx import ASGITransport, AsyncClient
+    from main import app
+    async with app.router.lifespan_context(app):
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as c:
+            yield c
+
+
+@pytest.fixture
+def clean_chat_history():
+    """Clear P001's chat history after the test.
+
+    The app is shared by the whole session, so without this messages pile
+    up in the database across tests. Uses the sync engine, so it works
+    alongside either client.
+    """
+    yield
+    from sqlalchemy import delete
+    from database import SyncSessionLocal
+    from models.db_models import ChatMessageDB
+    with SyncSessionLocal() as db:
+        db.execute(delete(ChatMessageDB).where(ChatMessageDB.patient_id == "P001"))
+        db.commit()
+
+
+@pytest.fixture(scope="module")
+def clean_test_patients():
+    """Delete patients created with TEST-* IDs once the module finishes.
+
+    The client and database are shared by the whole session, so patients
+    created with fixed IDs would otherwise collide on the next run against
+    the same database. Deletes through the ORM so related rows cascade,
+    then drops the rows from the patient service's by-ID cache.
+    """
+    yield
+    from sqlalchemy import select
+    from database import SyncSessionLocal
+    from models.db_models import PatientDB
+    from services.patient_service import PatientService
+    with SyncSessionLocal() as db:
+        patient_ids = []
+        for patient in db.scalars(select(PatientDB).where(PatientDB.id.like("TEST-%"))):
+            patient_ids.append(patient.id)
+            db.delete(patient)
+        db.commit()
+    service = PatientService()
+    for patient_id in patient_ids:
+        service.invalidate(patient_id)
 
 
 @pytest.fixture
-def mock_patient():
+def clean_analyses():
+    """Drop finished analyses the test started from the in-memory store.
+
+    Analyses still running in the background are kept, since their tasks
+    look their state up by request ID, as are ones that existed before
+    the test, such as a shared started_analysis.
+    """
+    from routers import analysis
+    existing = set(analysis._analyses)
+    yield
+    for request_id, state in list(analysis._analyses.items()):
+        if request_id not in existing and state["status"] in ("completed", "error"):
+            del analysis._analyses[request_id]
+            analysis._analysis_updates.pop(request_id, None)
+
+
+def _guard_unchanged(model):
+    """Yield a shared session model and fail at teardown if a test modified it."""
+    snapshot = model.model_dump()
+    yield model
+    assert model.model_dump() == snapshot, (
+        f"A test modified the shared {type(model).__name__}; work on a model_copy(deep=True)"
+    )
+
+
+# The mock model fixtures below are built once per session and shared read-only;
+# a test that needs to modify one should work on a model_copy(deep=True)
+@pytest.fixture(scope="session")
+def mock_cancer_details():
+    """Create the mock patient's cancer details."""
+    from models.patient import CancerDetails, CancerType, CancerStage
+    return CancerDetails(
+        cancer_type=CancerType.NSCLC,
+        subtype="Adenocarcinoma",
+        stage=CancerStage.STAGE_IIIA,
+        tnm_staging="T2N2M0",
+        primary_site="Right upper lobe",
+        tumor_size_cm=3.2,
+        metastases=["Mediastinal lymph nodes"],
+        histology="Adenocarcinoma",
+        grade="High",
+        diagnosis_date=date(2024, 1, 1)
+    )
+
+
+@pytest.fixture(scope="session")
+def mock_comorbidities():
+    """Create the mock patient's comorbidities."""
+    from models.patient import Comorbidity
+    return [
+        Comorbidity(
+            condition="Type 2 Diabetes",
+            severity="moderate",
+            treatment_implications=["Monitor blood glucose during treatment"]
+        ),
+        Comorbidity(
+            condition="CKD Stage 3",
+            severity="moderate",
+            treatment_implications=["Dose adjustment may be required"]
+        )
+    ]
+
+
+@pytest.fixture(scope="session")
+def mock_organ_function():
+    """Create the mock patient's organ function results."""
+    from models.patient import OrganFunction
+    return [
+        OrganFunction(
+            organ="Kidney",
+            status="moderate_impairment",
+            key_values={"GFR": 58, "Creatinine": 1.4},
+            notes="CKD Stage 3"
+        )
+    ]
+
+
+@pytest.fixture(scope="session")
+def mock_patient(mock_cancer_details, mock_comorbidities, mock_organ_function):
     """Create a mock patient for testing."""
-    return Patient(
+    from models.patient import Patient, ECOGStatus
+    patient = Patient(
         id="TEST001",
         first_name="John",
         last_name="Doe",
@@ -52,38 +185,9 @@ def mock_patient():
         sex="Male",
         email="john.doe@test.com",
         phone="555-0100",
-        cancer_details=CancerDetails(
-            cancer_type=CancerType.NSCLC,
-            subtype="Adenocarcinoma",
-            stage=CancerStage.STAGE_IIIA,
-            tnm_staging="T2N2M0",
-            primary_site="Right upper lobe",
-            tumor_size_cm=3.2,
-            metastases=["Mediastinal lymph nodes"],
-            histology="Adenocarcinoma",
-            grade="High",
-            diagnosis_date=date(2024, 1, 1)
-        ),
-        comorbidities=[
-            Comorbidity(
-                condition="Type 2 Diabetes",
-                severity="moderate",
-                treatment_implications=["Monitor blood glucose during treatment"]
-            ),
-            Comorbidity(
-                condition="CKD Stage 3",
-                severity="moderate",
-                treatment_implications=["Dose adjustment may be required"]
-            )
-        ],
-        organ_function=[
-            OrganFunction(
-                organ="Kidney",
-                status="moderate_impairment",
-                key_values={"GFR": 58, "Creatinine": 1.4},
-                notes="CKD Stage 3"
-            )
-        ],
+        cancer_details=mock_cancer_details,
+        comorbidities=mock_comorbidities,
+        organ_function=mock_organ_function,
         ecog_status=ECOGStatus.RESTRICTED,
         current_medications=["Metformin 1000mg BID", "Lisinopril 10mg daily"],
         allergies=["Penicillin"],
@@ -91,62 +195,122 @@ def mock_patient():
         pack_years=30,
         genomic_report_id="GR-TEST001"
     )
+    yield from _guard_unchanged(patient)
 
 
 @pytest.fixture
-def mock_genomic_report():
+def mutable_patient(mock_patient):
+    """Create a per-test copy of mock_patient that the test may modify.
+
+    model_copy skips validation, so this costs a deep copy rather than a
+    fresh Patient build.
+    """
+    return mock_patient.model_copy(deep=True)
+
+
+@pytest.fixture(scope="session")
+def standard_patient_summary(mock_patient):
+    """Create the patient summary the agent tests build from mock_patient."""
+    from models.patient import PatientSummary, ECOGStatus
+    return PatientSummary(
+        demographics={"age": 63, "sex": "Male"},
+        cancer=mock_patient.cancer_details,
+        comorbidities=mock_patient.comorbidities,
+        organ_function=mock_patient.organ_function,
+        ecog_status=ECOGStatus.RESTRICTED,
+        current_medications=[]
+    )
+
+
+@pytest.fixture(scope="session")
+def mock_egfr_mutation():
+    """Create the mock report's actionable EGFR mutation."""
+    from models.genomics import Mutation, MutationClassification, Therapy
+    return Mutation(
+        gene="EGFR",
+        variant="Exon 19 deletion (p.E746_A750del)",
+        classification=MutationClassification.PATHOGENIC_ACTIONABLE,
+        allele_frequency=0.34,
+        tier="Tier I",
+        therapies=[
+            Therapy(
+                drug="Osimertinib",
+                evidence_level="FDA Approved",
+                response_rate=0.80,
+                indication="EGFR exon 19 deletion NSCLC"
+            )
+        ]
+    )
+
+
+@pytest.fixture(scope="session")
+def mock_tp53_mutation():
+    """Create the mock report's TP53 mutation."""
+    from models.genomics import Mutation, MutationClassification
+    return Mutation(
+        gene="TP53",
+        variant="R248W",
+        classification=MutationClassification.PATHOGENIC,
+        allele_frequency=0.28,
+        tier="Tier III",
+        therapies=[]
+    )
+
+
+@pytest.fixture(scope="session")
+def mock_immuno_markers():
+    """Create the mock report's immunotherapy markers."""
+    from models.genomics import ImmunotherapyMarkers
+    return ImmunotherapyMarkers(
+        pdl1_expression=15.0,
+        pdl1_method="22C3 pharmDx",
+        tmb=4.0,
+        tmb_unit="mutations/Mb",
+        msi_status="MSS"
+    )
+
+
+@pytest.fixture(scope="session")
+def mock_genomic_report(mock_egfr_mutation, mock_tp53_mutation, mock_immuno_markers):
     """Create a mock genomic report for testing."""
-    return GenomicReport(
+    from models.genomics import GenomicReport
+    report = GenomicReport(
         id="GR-TEST001",
         patient_id="TEST001",
         test_date="2024-01-15",
         test_type="Foundation One CDx",
         lab_name="Foundation Medicine",
         specimen_type="Tumor tissue",
-        mutations=[
-            Mutation(
-                gene="EGFR",
-                variant="Exon 19 deletion (p.E746_A750del)",
-                classification=MutationClassification.PATHOGENIC_ACTIONABLE,
-                allele_frequency=0.34,
-                tier="Tier I",
-                therapies=[
-                    Therapy(
-                        drug="Osimertinib",
-                        evidence_level="FDA Approved",
-                        response_rate=0.80,
-                        indication="EGFR exon 19 deletion NSCLC"
-                    )
-                ]
-            ),
-            Mutation(
-                gene="TP53",
-                variant="R248W",
-                classification=MutationClassification.PATHOGENIC,
-                allele_frequency=0.28,
-                tier="Tier III",
-                therapies=[]
-            )
-        ],
-        immunotherapy_markers=ImmunotherapyMarkers(
-            pdl1_expression=15.0,
-            pdl1_method="22C3 pharmDx",
-            tmb=4.0,
-            tmb_unit="mutations/Mb",
-            msi_status="MSS"
-        ),
+        mutations=[mock_egfr_mutation, mock_tp53_mutation],
+        immunotherapy_markers=mock_immuno_markers,
         summary="EGFR exon 19 deletion detected. Actionable mutation with FDA-approved therapies."
     )
+    yield from _guard_unchanged(report)
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
+def mock_genomics_result(mock_patient, mock_genomic_report):
+    """Create a genomics agent result for the agents downstream of it."""
+    from models.genomics import GenomicAnalysisResult
+    return GenomicAnalysisResult(
+        patient_id=mock_patient.id,
+        report=mock_genomic_report,
+        summary="EGFR mutation detected",
+        targeted_therapy_candidates=["Osimertinib"]
+    )
+
+
+@pytest.fixture(scope="session")
 def mock_treatment_plan():
     """Create a mock treatment plan for testing."""
     from datetime import datetime
-    return TreatmentPlan(
+    from models.treatment import (
+        TreatmentPlan, TreatmentOption, RecommendationLevel, EvidenceLevel
+    )
+    plan = TreatmentPlan(
         id="TP-TEST001",
         patient_id="TEST001",
-        generated_at=datetime.now(),
+        generated_at=datetime(2024, 1, 20, 12, 0, 0),
         status="pending_review",
         primary_recommendation=TreatmentOption(
             id="TO-001",
@@ -169,13 +333,16 @@ def mock_treatment_plan():
         summary="Osimertinib recommended based on EGFR mutation",
         discussion_points=["Side effects", "Clinical trials"]
     )
+    yield from _guard_unchanged(plan)
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def mock_clinical_trial():
     """Create a mock clinical trial for testing."""
-    from models.treatment import EligibilityCriterion
-    return ClinicalTrial(
+    from models.treatment import (
+        ClinicalTrial, TrialPhase, TrialStatus, EligibilityCriterion
+    )
+    trial = ClinicalTrial(
         nct_id="NCT12345678",
         title="Test Clinical Trial",
         phase=TrialPhase.PHASE_3,
@@ -195,11 +362,13 @@ def mock_clinical_trial():
         match_score=0.90,
         match_rationale="Strong match based on mutation profile"
     )
+    yield from _guard_unchanged(trial)
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def mock_analysis_request():
     """Create a mock analysis request for testing."""
+    from models.messages import AnalysisRequest
     return AnalysisRequest(
         patient_id="TEST001",
         analysis_type="full",
@@ -208,47 +377,113 @@ def mock_analysis_request():
     )
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def mock_chat_message():
     """Create a mock chat message for testing."""
     from datetime import datetime
+    from models.messages import ChatMessage
     return ChatMessage(
         id="MSG-001",
         patient_id="TEST001",
-        timestamp=datetime.now(),
+        timestamp=datetime(2024, 1, 20, 12, 0, 0),
         role="patient",
         content="What are my treatment options?"
     )
 
 
-@pytest.fixture
-def patient_service():
-    """Create a patient service for testing."""
+@pytest_asyncio.fixture(scope="session")
+async def seeded_database():
+    """Create the tables and seed the mock patients, as app startup does.
+
+    Service-level tests read patients without ever starting the app, and an
+    xdist worker's database starts empty.
+    """
+    from database import init_db_async
+    await init_db_async()
+
+
+@pytest.fixture(scope="session")
+def patient_service(seeded_database):
+    """Create a patient service shared by the whole session.
+
+    Tests only read through it; a test that creates, updates or deletes
+    patients should build its own PatientService instead.
+    """
+    from services.patient_service import PatientService
     return PatientService()
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def llm_service_mock():
     """Create an LLM service in mock mode for testing."""
+    from services.llm_service import LLMService
     return LLMService(use_mock=True)
 
 
+@pytest.fixture(scope="session")
+def embedding_service():
+    """Create a mock-mode embedding service shared by the whole session.
+
+    The mock embeddings are deterministic, so sharing the instance (and its
+    cache) is safe; tests that count embedding calls clear the cache first.
+    """
+    from rag.embeddings import EmbeddingService
+    return EmbeddingService(use_mock=True)
+
+
 @pytest.fixture
 def llm_service_real():
-    """Create an LLM service in real mode (requires API key)."""
+    """Create an LLM service in real mode (requires API key).
+
+    Tests using it are skipped, before the OpenAI client is built, when
+    OPENAI_API_KEY is not set.
+    """
+    if not os.environ.get("OPENAI_API_KEY"):
+        pytest.skip("OPENAI_API_KEY not set")
+    from services.llm_service import LLMService
     return LLMService(use_mock=False)
 
 
 # Async fixtures
-@pytest.fixture
+@pytest.fixture(scope="session")
 def anyio_backend():
     """Backend for async tests."""
     return "asyncio"
 
 
+# Third-party loggers that log every request at INFO/DEBUG
+QUIET_LOGGERS = ("httpx", "httpcore", "uvicorn.access", "multipart.multipart", "openai")
+
+
 # Mark async tests
 def pytest_configure(config):
-    """Configure pytest markers."""
+    """Configure pytest markers.
+
+    pytest.ini runs the suite in parallel with pytest-xdist
+    (``-n auto --dist=loadfile``; pass ``-n 0`` to run serially). Each
+    worker is its own session, with its own client, database and mock
+    service state, and loadfile keeps every test file on one worker so
+    the per-file state cleanup below stays in order.
+    """
     config.addinivalue_line(
         "markers", "asyncio: mark test as an async test"
     )
+
+    # Library request logging only adds formatting work to every TestClient
+    # and SDK call; warnings and errors still come through
+    for name in QUIET_LOGGERS:
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+
+def pytest_collection_modifyitems(items):
+    """Run every async test on one session-scoped event loop.
+
+    The agents and services keep no loop state between tests, so creating
+    and closing a fresh loop per test is pure overhead.
+    """
+    from pytest_asyncio import is_async_test
+
+    session_loop = pytest.mark.asyncio(scope="session")
+    for item in items:
+        if is_async_test(item):
+            item.add_marker(session_loop, append=False)
@@ -12,17 +12,60 @@ from agents.patient_communication_agent import PatientCommunicationAgent, Patien
 
 from models.patient import Patient, PatientSummary, CancerDetails, CancerType, CancerStage, ECOGStatus
 from models.genomics import GenomicReport, Mutation, MutationClassification
-from services.llm_service import LLMService
+
+
+# (agent class, reference table attribute, entries the table must contain)
+AGENT_REFERENCE_DATA = [
+    (GenomicsAgent, "ACTIONABLE_MUTATIONS", ["EGFR", "ALK", "KRAS"]),
+    (EvidenceAgent, "NCCN_GUIDELINES", ["EGFR_mutant_NSCLC", "ALK_positive_NSCLC"]),
+    (TreatmentAgent, "TREATMENT_DATABASE", ["EGFR_mutant", "ALK_positive", "chemotherapy"]),
+    (PatientCommunicationAgent, "CRISIS_KEYWORDS", ["suicide", "chest pain"]),
+    (PatientCommunicationAgent, "RESTRICTED_TOPICS", ["prognosis"]),
+]
+
+
+# (case id, patient message, expected response properties)
+PATIENT_COMM_CASES = [
+    ("treatment_question", "What is osimertinib and how does it work?", {"escalate": False}),
+    ("side_effects_question", "I'm feeling very nauseous, what can I do?", {"mentions": ["nausea", "help"]}),
+    ("crisis_keywords", "I'm having severe chest pain and can't breathe",
+     {"escalate": True, "reason": True, "mentions": ["911", "emergency"]}),
+    ("mental_health_crisis", "I want to end my life", {"escalate": True, "mentions": ["988"]}),
+    ("prognosis_redirect", "How long do I have to live?", {"mentions": ["oncologist", "care team"]}),
+    ("emotional_support", "I'm scared about my diagnosis", {
+        "sentiment": ["concerned", "distressed", "neutral"],
+        "mentions": ["support", "normal", "care team", "oncologist"],
+    }),
+    ("followup_questions", "Tell me about my treatment options", {}),
+]
+
+
+@pytest.mark.parametrize(
+    "agent_cls, table, expected",
+    AGENT_REFERENCE_DATA,
+    ids=[f"{agent_cls.__name__}.{table}" for agent_cls, table, _ in AGENT_REFERENCE_DATA]
+)
+def test_agent_reference_data(agent_cls, table, expected):
+    """Test that each agent's built-in reference table has its key entries."""
+    data = getattr(agent_cls, table)
+    assert len(data) > 0
+    for entry in expected:
+        assert entry in data
+
+
+def test_mock_trials_database():
+    """Test that the trials agent ships a mock trials database."""
+    assert len(ClinicalTrialsAgent.MOCK_TRIALS) > 0
+    assert all("nct_id" in t for t in ClinicalTrialsAgent.MOCK_TRIALS)
 
 
 class TestMedicalHistoryAgent:
     """Tests for MedicalHistoryAgent."""
 
-    @pytest.fixture
-    def agent(self):
+    @pytest.fixture(scope="class")
+    def agent(self, llm_service_mock):
         """Create agent for testing."""
-        llm_service = LLMService(use_mock=True)
-        return MedicalHistoryAgent(llm_service=llm_service, use_mock=True)
+        return MedicalHistoryAgent(llm_service=llm_service_mock, use_mock=True)
 
     @pytest.mark.asyncio
     async def test_execute_with_patient(self, agent, mock_patient):
@@ -77,11 +120,10 @@ class TestMedicalHistoryAgent:
 class TestGenomicsAgent:
     """Tests for GenomicsAgent."""
 
-    @pytest.fixture
-    def agent(self):
+    @pytest.fixture(scope="class")
+    def agent(self, llm_service_mock):
         """Create agent for testing."""
-        llm_service = LLMService(use_mock=True)
-        return GenomicsAgent(llm_service=llm_service, use_mock=True)
+        return GenomicsAgent(llm_service=llm_service_mock, use_mock=True)
 
     @pytest.mark.asyncio
     async def test_execute_with_patient_no_report(self, agent, mock_patient):
@@ -98,7 +140,7 @@ class TestGenomicsAgent:
         """Test genomics analysis with report."""
         input_data = GenomicsInput(
             patient=mock_patient,
-            genomic_report=mock_genomic_report
+            genomic_report=mock_genomic_report.model_copy(deep=True)
         )
 
         result = await agent.run(input_data)
@@ -111,7 +153,7 @@ class TestGenomicsAgent:
         """Test identification of therapy candidates."""
         input_data = GenomicsInput(
             patient=mock_patient,
-            genomic_report=mock_genomic_report
+            genomic_report=mock_genomic_report.model_copy(deep=True)
         )
 
         result = await agent.run(input_data)
@@ -124,42 +166,26 @@ class TestGenomicsAgent:
         """Test assessment of immunotherapy markers."""
         input_data = GenomicsInput(
             patient=mock_patient,
-            genomic_report=mock_genomic_report
+            genomic_report=mock_genomic_report.model_copy(deep=True)
         )
 
         result = await agent.run(input_data)
 
         assert result.immunotherapy_markers is not None
 
-    def test_actionable_mutations_database(self, agent):
-        """Test that agent has actionable mutations database."""
-        assert "EGFR" in agent.ACTIONABLE_MUTATIONS
-        assert "ALK" in agent.ACTIONABLE_MUTATIONS
-        assert "KRAS" in agent.ACTIONABLE_MUTATIONS
-
 
 class TestClinicalTrialsAgent:
     """Tests for ClinicalTrialsAgent."""
 
-    @pytest.fixture
-    def agent(self):
+    @pytest.fixture(scope="class")
+    def agent(self, llm_service_mock):
         """Create agent for testing."""
-        llm_service = LLMService(use_mock=True)
-        return ClinicalTrialsAgent(llm_service=llm_service, use_mock=True)
+        return ClinicalTrialsAgent(llm_service=llm_service_mock, use_mock=True)
 
     @pytest.mark.asyncio
-    async def test_execute_with_patient_summary(self, agent, mock_patient):
+    async def test_execute_with_patient_summary(self, agent, standard_patient_summary):
         """Test trial matching with patient summary."""
-        patient_summary = PatientSummary(
-            demographics={"age": 63, "sex": "Male"},
-            cancer=mock_patient.cancer_details,
-            comorbidities=mock_patient.comorbidities,
-            organ_function=mock_patient.organ_function,
-            ecog_status=ECOGStatus.RESTRICTED,
-            current_medications=[]
-        )
-
-        input_data = ClinicalTrialsInput(patient_summary=patient_summary)
+        input_data = ClinicalTrialsInput(patient_summary=standard_patient_summary)
 
         result = await agent.run(input_data)
 
@@ -167,28 +193,11 @@ class TestClinicalTrialsAgent:
         assert len(result.search_criteria_used) > 0
 
     @pytest.mark.asyncio
-    async def test_matches_trials_by_biomarker(self, agent, mock_patient, mock_genomic_report):
+    async def test_matches_trials_by_biomarker(self, agent, standard_patient_summary, mock_genomics_result):
         """Test that trials are matched by biomarker."""
-        from agents.genomics_agent import GenomicsAgent, GenomicsInput
-        from models.genomics import GenomicAnalysisResult
-
-        patient_summary = PatientSummary(
-            demographics={"age": 63, "sex": "Male"},
-            cancer=mock_patient.cancer_details,
-            ecog_status=ECOGStatus.RESTRICTED
-        )
-
-        # Create mock genomics result
-        genomics_result = GenomicAnalysisResult(
-            patient_id=mock_patient.id,
-            report=mock_genomic_report,
-            summary="Test",
-            targeted_therapy_candidates=["Osimertinib"]
-        )
-
         input_data = ClinicalTrialsInput(
-            patient_summary=patient_summary,
-            genomics_result=genomics_result
+            patient_summary=standard_patient_summary,
+            genomics_result=mock_genomics_result
         )
 
         result = await agent.run(input_data)
@@ -217,32 +226,20 @@ class TestClinicalTrialsAgent:
         for trial in result.matched_trials:
             assert 0 <= trial.match_score <= 1
 
-    def test_mock_trials_database(self, agent):
-        """Test that agent has mock trials database."""
-        assert len(agent.MOCK_TRIALS) > 0
-        assert all("nct_id" in t for t in agent.MOCK_TRIALS)
-
 
 class TestEvidenceAgent:
     """Tests for EvidenceAgent."""
 
-    @pytest.fixture
-    def agent(self):
+    @pytest.fixture(scope="class")
+    def agent(self, llm_service_mock):
         """Create agent for testing."""
-        llm_service = LLMService(use_mock=True)
-        return EvidenceAgent(llm_service=llm_service, use_mock=True)
+        return EvidenceAgent(llm_service=llm_service_mock, use_mock=True)
 
     @pytest.mark.asyncio
-    async def test_execute_with_patient_summary(self, agent, mock_patient):
+    async def test_execute_with_patient_summary(self, agent, standard_patient_summary):
         """Test evidence search with patient summary."""
-        patient_summary = PatientSummary(
-            demographics={"age": 63},
-            cancer=mock_patient.cancer_details,
-            ecog_status=ECOGStatus.RESTRICTED
-        )
-
         input_data = EvidenceInput(
-            patient_summary=patient_summary,
+            patient_summary=standard_patient_summary,
             treatment_queries=["Osimertinib"]
         )
 
@@ -251,25 +248,11 @@ class TestEvidenceAgent:
         assert len(result.search_terms_used) > 0
 
     @pytest.mark.asyncio
-    async def test_retrieves_guideline_recommendations(self, agent, mock_patient, mock_genomic_report):
+    async def test_retrieves_guideline_recommendations(self, agent, standard_patient_summary, mock_genomics_result):
         """Test retrieval of guideline recommendations."""
-        from models.genomics import GenomicAnalysisResult
-
-        patient_summary = PatientSummary(
-            demographics={"age": 63},
-            cancer=mock_patient.cancer_details,
-            ecog_status=ECOGStatus.RESTRICTED
-        )
-
-        genomics_result = GenomicAnalysisResult(
-            patient_id=mock_patient.id,
-            report=mock_genomic_report,
-            summary="EGFR mutation detected"
-        )
-
         input_data = EvidenceInput(
-            patient_summary=patient_summary,
-            genomics_result=genomics_result
+            patient_summary=standard_patient_summary,
+            genomics_result=mock_genomics_result
         )
 
         result = await agent.run(input_data)
@@ -278,25 +261,11 @@ class TestEvidenceAgent:
         assert len(result.guideline_recommendations) > 0 or len(result.evidence_summaries) > 0
 
     @pytest.mark.asyncio
-    async def test_retrieves_publications(self, agent, mock_patient, mock_genomic_report):
+    async def test_retrieves_publications(self, agent, standard_patient_summary, mock_genomics_result):
         """Test retrieval of relevant publications."""
-        from models.genomics import GenomicAnalysisResult
-
-        patient_summary = PatientSummary(
-            demographics={"age": 63},
-            cancer=mock_patient.cancer_details,
-            ecog_status=ECOGStatus.RESTRICTED
-        )
-
-        genomics_result = GenomicAnalysisResult(
-            patient_id=mock_patient.id,
-            report=mock_genomic_report,
-            summary="EGFR mutation"
-        )
-
         input_data = EvidenceInput(
-            patient_summary=patient_summary,
-            genomics_result=genomics_result
+            patient_summary=standard_patient_summary,
+            genomics_result=mock_genomics_result
         )
 
         result = await agent.run(input_data)
@@ -304,44 +273,22 @@ class TestEvidenceAgent:
         # Should find relevant publications
         assert len(result.relevant_publications) > 0
 
-    def test_nccn_guidelines_database(self, agent):
-        """Test that agent has NCCN guidelines database."""
-        assert "EGFR_mutant_NSCLC" in agent.NCCN_GUIDELINES
-        assert "ALK_positive_NSCLC" in agent.NCCN_GUIDELINES
-
 
 class TestTreatmentAgent:
     """Tests for TreatmentAgent."""
 
-    @pytest.fixture
-    def agent(self):
+    @pytest.fixture(scope="class")
+    def agent(self, llm_service_mock):
         """Create agent for testing."""
-        llm_service = LLMService(use_mock=True)
-        return TreatmentAgent(llm_service=llm_service, use_mock=True)
+        return TreatmentAgent(llm_service=llm_service_mock, use_mock=True)
 
     @pytest.mark.asyncio
-    async def test_execute_generates_treatment_plan(self, agent, mock_patient, mock_genomic_report):
+    async def test_execute_generates_treatment_plan(self, agent, mock_patient, standard_patient_summary, mock_genomics_result):
         """Test that agent generates treatment plan."""
-        from models.genomics import GenomicAnalysisResult
-
-        patient_summary = PatientSummary(
-            demographics={"age": 63},
-            cancer=mock_patient.cancer_details,
-            ecog_status=ECOGStatus.RESTRICTED,
-            comorbidities=mock_patient.comorbidities,
-            organ_function=mock_patient.organ_function
-        )
-
-        genomics_result = GenomicAnalysisResult(
-            patient_id=mock_patient.id,
-            report=mock_genomic_report,
-            summary="EGFR mutation"
-        )
-
         input_data = TreatmentInput(
             patient_id=mock_patient.id,
-            patient_summary=patient_summary,
-            genomics_result=genomics_result
+            patient_summary=standard_patient_summary,
+            genomics_result=mock_genomics_result
         )
 
         result = await agent.run(input_data)
@@ -350,26 +297,12 @@ class TestTreatmentAgent:
         assert result.primary_recommendation is not None
 
     @pytest.mark.asyncio
-    async def test_ranks_treatment_options(self, agent, mock_patient, mock_genomic_report):
+    async def test_ranks_treatment_options(self, agent, mock_patient, standard_patient_summary, mock_genomics_result):
         """Test that treatment options are ranked."""
-        from models.genomics import GenomicAnalysisResult
-
-        patient_summary = PatientSummary(
-            demographics={"age": 63},
-            cancer=mock_patient.cancer_details,
-            ecog_status=ECOGStatus.RESTRICTED
-        )
-
-        genomics_result = GenomicAnalysisResult(
-            patient_id=mock_patient.id,
-            report=mock_genomic_report,
-            summary="EGFR mutation"
-        )
-
         input_data = TreatmentInput(
             patient_id=mock_patient.id,
-            patient_summary=patient_summary,
-            genomics_result=genomics_result
+            patient_summary=standard_patient_summary,
+            genomics_result=mock_genomics_result
         )
 
         result = await agent.run(input_data)
@@ -382,153 +315,48 @@ class TestTreatmentAgent:
             assert alt.rank == i + 2
 
     @pytest.mark.asyncio
-    async def test_generates_discussion_points(self, agent, mock_patient, mock_genomic_report):
+    async def test_generates_discussion_points(self, agent, mock_patient, standard_patient_summary, mock_genomics_result):
         """Test generation of discussion points."""
-        from models.genomics import GenomicAnalysisResult
-
-        patient_summary = PatientSummary(
-            demographics={"age": 63},
-            cancer=mock_patient.cancer_details,
-            ecog_status=ECOGStatus.RESTRICTED,
-            comorbidities=mock_patient.comorbidities
-        )
-
-        genomics_result = GenomicAnalysisResult(
-            patient_id=mock_patient.id,
-            report=mock_genomic_report,
-            summary="EGFR mutation"
-        )
-
         input_data = TreatmentInput(
             patient_id=mock_patient.id,
-            patient_summary=patient_summary,
-            genomics_result=genomics_result
+            patient_summary=standard_patient_summary,
+            genomics_result=mock_genomics_result
         )
 
         result = await agent.run(input_data)
 
         assert len(result.discussion_points) > 0
 
-    def test_treatment_database(self, agent):
-        """Test that agent has treatment database."""
-        assert "EGFR_mutant" in agent.TREATMENT_DATABASE
-        assert "ALK_positive" in agent.TREATMENT_DATABASE
-        assert "chemotherapy" in agent.TREATMENT_DATABASE
-
 
 class TestPatientCommunicationAgent:
     """Tests for PatientCommunicationAgent."""
 
-    @pytest.fixture
-    def agent(self):
+    @pytest.fixture(scope="class")
+    def agent(self, llm_service_mock):
         """Create agent for testing."""
-        llm_service = LLMService(use_mock=True)
-        return PatientCommunicationAgent(llm_service=llm_service, use_mock=True)
-
-    @pytest.mark.asyncio
-    async def test_responds_to_treatment_question(self, agent):
-        """Test response to treatment question."""
-        input_data = PatientCommInput(
-            patient_id="P001",
-            message="What is osimertinib and how does it work?"
-        )
-
-        result = await agent.run(input_data)
-
-        assert len(result.response) > 0
-        assert result.escalate_to_human is False
-
-    @pytest.mark.asyncio
-    async def test_responds_to_side_effects_question(self, agent):
-        """Test response to side effects question."""
-        input_data = PatientCommInput(
-            patient_id="P001",
-            message="I'm feeling very nauseous, what can I do?"
-        )
-
-        result = await agent.run(input_data)
-
-        assert len(result.response) > 0
-        # Should have helpful suggestions
-        assert "nausea" in result.response.lower() or "help" in result.response.lower()
-
-    @pytest.mark.asyncio
-    async def test_escalates_crisis_keywords(self, agent):
-        """Test escalation on crisis keywords."""
-        input_data = PatientCommInput(
-            patient_id="P001",
-            message="I'm having severe chest pain and can't breathe"
-        )
-
-        result = await agent.run(input_data)
-
-        assert result.escalate_to_human is True
-        assert result.escalation_reason is not None
-        assert "911" in result.response or "emergency" in result.response.lower()
+        return PatientCommunicationAgent(llm_service=llm_service_mock, use_mock=True)
 
     @pytest.mark.asyncio
-    async def test_escalates_mental_health_crisis(self, agent):
-        """Test escalation on mental health crisis."""
-        input_data = PatientCommInput(
-            patient_id="P001",
-            message="I want to end my life"
-        )
-
-        result = await agent.run(input_data)
-
-        assert result.escalate_to_human is True
-        assert "988" in result.response  # Crisis hotline
-
-    @pytest.mark.asyncio
-    async def test_redirects_prognosis_questions(self, agent):
-        """Test redirection of prognosis questions."""
-        input_data = PatientCommInput(
-            patient_id="P001",
-            message="How long do I have to live?"
-        )
-
-        result = await agent.run(input_data)
-
-        # Should redirect to care team
-        assert "oncologist" in result.response.lower() or "care team" in result.response.lower()
-
-    @pytest.mark.asyncio
-    async def test_provides_emotional_support(self, agent):
-        """Test emotional support response."""
-        input_data = PatientCommInput(
-            patient_id="P001",
-            message="I'm scared about my diagnosis"
-        )
+    @pytest.mark.parametrize(
+        "message, expected",
+        [(message, expected) for _, message, expected in PATIENT_COMM_CASES],
+        ids=[case_id for case_id, _, _ in PATIENT_COMM_CASES]
+    )
+    async def test_communication(self, agent, message, expected):
+        """Test the agent's response to each kind of patient message."""
+        input_data = PatientCommInput(patient_id="P001", message=message)
 
         result = await agent.run(input_data)
 
         assert len(result.response) > 0
-        assert result.sentiment in ["concerned", "distressed", "neutral"]
-        # Should offer support or redirect to care team (which is also supportive)
-        response_lower = result.response.lower()
-        assert any(term in response_lower for term in ["support", "normal", "care team", "oncologist"])
-
-    @pytest.mark.asyncio
-    async def test_suggests_followup_questions(self, agent):
-        """Test that agent suggests follow-up questions."""
-        input_data = PatientCommInput(
-            patient_id="P001",
-            message="Tell me about my treatment options"
-        )
-
-        result = await agent.run(input_data)
-
-        # May have suggested followups
-        # This is optional based on topic
+        if "escalate" in expected:
+            assert result.escalate_to_human is expected["escalate"]
+        if expected.get("reason"):
+            assert result.escalation_reason is not None
+        if "mentions" in expected:
+            response_lower = result.response.lower()
+            assert any(term in response_lower for term in expected["mentions"])
+        if "sentiment" in expected:
+            assert result.sentiment in expected["sentiment"]
+        # Follow-ups are optional based on topic, but the list is always present
         assert result.suggested_followups is not None
-
-    def test_crisis_keywords_list(self, agent):
-        """Test that agent has crisis keywords."""
-        assert len(agent.CRISIS_KEYWORDS) > 0
-        assert "suicide" in agent.CRISIS_KEYWORDS
-        assert "chest pain" in agent.CRISIS_KEYWORDS
-
-    def test_restricted_topics_list(self, agent):
-        """Test that agent has restricted topics."""
-        assert len(agent.RESTRICTED_TOPICS) > 0
-        assert "prognosis" in agent.RESTRICTED_TOPICS
@@ -1,14 +1,45 @@
 """Tests for Analysis API endpoints."""
 
+import asyncio
+import json
 import pytest
-from fastapi.testclient import TestClient
-import time
+import pytest_asyncio
+
+pytestmark = pytest.mark.usefixtures("clean_analyses")
+
+
+async def stream_analysis_events(aclient, request_id, timeout=30):
+    """Collect an analysis' SSE progress events until it completes or fails."""
+    async def collect():
+        events = []
+        async with aclient.stream("GET", f"/api/v1/analysis/{request_id}/stream") as response:
+            async for line in response.aiter_lines():
+                if not line.startswith("data: "):
+                    continue
+                event = json.loads(line[len("data: "):])
+                events.append(event)
+                if event.get("status") in ("completed", "error"):
+                    break
+        return events
+
+    return await asyncio.wait_for(collect(), timeout=timeout)
+
+
+@pytest_asyncio.fixture(scope="session")
+async def started_analysis(aclient):
+    """Start one P001 analysis shared by the tests that only observe it.
+
+    Session-scoped so it starts on the same event loop as the tests.
+    """
+    response = await aclient.post("/api/v1/analysis/run", json={"patient_id": "P001"})
+    return response.json()["request_id"]
 
 
 class TestAnalysisAPI:
     """Tests for analysis endpoints."""
 
-    def test_run_analysis(self, client):
+    @pytest.mark.asyncio
+    async def test_run_analysis(self, aclient):
         """Test starting a new analysis."""
         request = {
             "patient_id": "P001",
@@ -16,7 +47,7 @@ class TestAnalysisAPI:
             "include_trials": True
         }
 
-        response = client.post("/api/v1/analysis/run", json=request)
+        response = await aclient.post("/api/v1/analysis/run", json=request)
         assert response.status_code == 200
 
         data = response.json()
@@ -24,67 +55,57 @@ class TestAnalysisAPI:
         assert data["patient_id"] == "P001"
         assert data["status"] == "initializing"
 
-    def test_run_analysis_minimal(self, client):
+    @pytest.mark.asyncio
+    async def test_run_analysis_minimal(self, aclient):
         """Test starting analysis with minimal params."""
         request = {"patient_id": "P001"}
 
-        response = client.post("/api/v1/analysis/run", json=request)
+        response = await aclient.post("/api/v1/analysis/run", json=request)
         assert response.status_code == 200
 
-    def test_get_analysis_status(self, client):
+    @pytest.mark.asyncio
+    async def test_get_analysis_status(self, started_analysis):
         """Test getting analysis status."""
-        # First start an analysis
-        request = {"patient_id": "P001"}
-        run_response = client.post("/api/v1/analysis/run", json=request)
-        request_id = run_response.json()["request_id"]
+        # The handler builds the AnalysisProgress itself; call it directly
+        from routers.analysis import get_analysis_status
 
-        # Get status
-        response = client.get(f"/api/v1/analysis/{request_id}/status")
-        assert response.status_code == 200
+        progress = await get_analysis_status(started_analysis)
 
-        data = response.json()
-        assert data["request_id"] == request_id
-        assert "status" in data
-        assert "progress_percent" in data
+        assert progress.request_id == started_analysis
+        assert progress.status
+        assert 0 <= progress.progress_percent <= 100
 
-    def test_get_analysis_status_not_found(self, client):
+    @pytest.mark.asyncio
+    async def test_get_analysis_status_not_found(self, aclient):
         """Test getting status for non-existent analysis."""
-        response = client.get("/api/v1/analysis/nonexistent-id/status")
+        response = await aclient.get("/api/v1/analysis/nonexistent-id/status")
         assert response.status_code == 404
 
-    def test_get_analysis_results_not_complete(self, client):
+    @pytest.mark.asyncio
+    async def test_get_analysis_results_not_complete(self, aclient, started_analysis):
         """Test getting results before analysis completes."""
-        # Start an analysis
-        request = {"patient_id": "P001"}
-        run_response = client.post("/api/v1/analysis/run", json=request)
-        request_id = run_response.json()["request_id"]
+        request_id = started_analysis
 
-        # Immediately try to get results
-        response = client.get(f"/api/v1/analysis/{request_id}/results")
+        # Try to get results
+        response = await aclient.get(f"/api/v1/analysis/{request_id}/results")
         # Should either be 400 (not complete) or 200 (if mock completes fast)
         assert response.status_code in [200, 400]
 
-    def test_analysis_progress_updates(self, client):
-        """Test that analysis progress updates over time."""
-        # Start an analysis
-        request = {"patient_id": "P001"}
-        run_response = client.post("/api/v1/analysis/run", json=request)
-        request_id = run_response.json()["request_id"]
-
-        # Wait a bit and check progress
-        time.sleep(0.5)
-
-        response = client.get(f"/api/v1/analysis/{request_id}/status")
-        data = response.json()
+    @pytest.mark.asyncio
+    async def test_analysis_progress_updates(self, aclient, started_analysis):
+        """Test that analysis progress updates are pushed over the stream."""
+        events = await stream_analysis_events(aclient, started_analysis)
 
         # Progress should have started
-        assert "progress_percent" in data
+        assert len(events) > 0
+        assert "progress_percent" in events[0]
 
 
 class TestAnalysisWorkflow:
     """Tests for complete analysis workflow."""
 
-    def test_full_analysis_workflow(self, client):
+    @pytest.mark.asyncio
+    async def test_full_analysis_workflow(self, aclient):
         """Test complete analysis workflow from start to finish."""
         # Start analysis
         request = {
@@ -92,65 +113,55 @@ class TestAnalysisWorkflow:
             "analysis_type": "full",
             "include_trials": True
         }
-        run_response = client.post("/api/v1/analysis/run", json=request)
+        run_response = await aclient.post("/api/v1/analysis/run", json=request)
         assert run_response.status_code == 200
         request_id = run_response.json()["request_id"]
 
-        # Poll for completion (with timeout)
-        max_wait = 30  # seconds
-        start_time = time.time()
-        status = "initializing"
-
-        while status not in ["completed", "error"] and (time.time() - start_time) < max_wait:
-            status_response = client.get(f"/api/v1/analysis/{request_id}/status")
-            status = status_response.json()["status"]
-            time.sleep(0.5)
+        # Follow the progress stream until the analysis finishes
+        events = await stream_analysis_events(aclient, request_id)
 
         # Analysis should complete
-        assert status == "completed" or (time.time() - start_time) >= max_wait
+        assert events[-1]["status"] == "completed"
 
-        # If completed, get results
-        if status == "completed":
-            results_response = client.get(f"/api/v1/analysis/{request_id}/results")
-            assert results_response.status_code == 200
+        results_response = await aclient.get(f"/api/v1/analysis/{request_id}/results")
+        assert results_response.status_code == 200
 
-            results = results_response.json()
-            assert "summary" in results
-            assert "key_findings" in results
-            assert "recommendations" in results
+        results = results_response.json()
+        assert "summary" in results
+        assert "key_findings" in results
+        assert "recommendations" in results
 
-    def test_analysis_step_tracking(self, client):
+    @pytest.mark.asyncio
+    async def test_analysis_step_tracking(self, aclient, started_analysis):
         """Test that analysis tracks steps correctly."""
-        request = {"patient_id": "P001"}
-        run_response = client.post("/api/v1/analysis/run", json=request)
-        request_id = run_response.json()["request_id"]
-
-        # Wait for some progress
-        time.sleep(2)
+        events = await stream_analysis_events(aclient, started_analysis)
 
-        status_response = client.get(f"/api/v1/analysis/{request_id}/status")
-        data = status_response.json()
+        # Progress events carry the completed and remaining steps
+        progress_events = [e for e in events if "steps_remaining" in e]
+        assert len(progress_events) > 0
+        assert all("steps_completed" in e for e in progress_events)
 
-        # Should have some completed steps
-        assert "steps_completed" in data
-        assert "steps_remaining" in data
+        # Steps should actually complete as the analysis advances
+        assert any(e["steps_completed"] for e in progress_events)
 
 
 class TestAnalysisValidation:
     """Tests for analysis request validation."""
 
-    def test_missing_patient_id(self, client):
+    @pytest.mark.asyncio
+    async def test_missing_patient_id(self, aclient):
         """Test rejection of request without patient_id."""
         request = {"analysis_type": "full"}
-        response = client.post("/api/v1/analysis/run", json=request)
+        response = await aclient.post("/api/v1/analysis/run", json=request)
         assert response.status_code == 422
 
-    def test_invalid_analysis_type(self, client):
+    @pytest.mark.asyncio
+    async def test_invalid_analysis_type(self, aclient):
         """Test handling of invalid analysis type."""
         request = {
             "patient_id": "P001",
             "analysis_type": "invalid_type"
         }
         # Should either accept (if not validated) or reject
-        response = client.post("/api/v1/analysis/run", json=request)
+        response = await aclient.post("/api/v1/analysis/run", json=request)
         assert response.status_code in [200, 400, 422]
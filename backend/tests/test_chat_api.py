@@ -1,19 +1,51 @@
 """Tests for Chat API endpoints."""
 
+import asyncio
+import re
 import pytest
-from fastapi.testclient import TestClient
+
+pytestmark = pytest.mark.usefixtures("clean_chat_history")
+
+# (case id, patient question, keyword the response must mention or None)
+CHAT_QUALITY_CASES = [
+    ("treatment", "Tell me about my treatment options", "treatment"),
+    ("side_effects", "What side effects might I experience?", None),
+    ("clinical_trials", "Are there any clinical trials I might be eligible for?", "trial"),
+    ("genomics", "What does my EGFR mutation mean?", None),
+]
+
+# Any of the ways a redirect to the patient's care team is phrased
+CARE_TEAM_RE = re.compile(r"care team|oncolog(?:ist|y team)", re.IGNORECASE)
+
+LONG_MESSAGE = "This is a test message. " * 1000
+
+
+@pytest.fixture
+def seeded_chat():
+    """Seed one message into P001's chat history and return the patient ID.
+
+    Writes straight to the database, so history tests don't pay for a full
+    chat round-trip; clean_chat_history removes it afterwards.
+    """
+    from database import SyncSessionLocal
+    from models.db_models import ChatMessageDB
+    with SyncSessionLocal() as db:
+        db.add(ChatMessageDB(patient_id="P001", role="patient", content="Hello"))
+        db.commit()
+    return "P001"
 
 
 class TestChatAPI:
     """Tests for chat endpoints."""
 
-    def test_send_message(self, client):
+    @pytest.mark.asyncio
+    async def test_send_message(self, aclient):
         """Test sending a chat message."""
         request = {
             "message": "What are my treatment options?"
         }
 
-        response = client.post("/api/v1/chat/P001/message", json=request)
+        response = await aclient.post("/api/v1/chat/P001/message", json=request)
         assert response.status_code == 200
 
         data = response.json()
@@ -21,84 +53,81 @@ class TestChatAPI:
         assert data["patient_id"] == "P001"
         assert data["escalate_to_human"] is False
 
-    def test_send_message_with_context(self, client):
+    @pytest.mark.asyncio
+    async def test_send_message_with_context(self, aclient):
         """Test sending a message with context."""
         request = {
             "message": "Tell me about targeted therapy",
             "context": {"include_genomics": True}
         }
 
-        response = client.post("/api/v1/chat/P001/message", json=request)
+        response = await aclient.post("/api/v1/chat/P001/message", json=request)
         assert response.status_code == 200
 
         data = response.json()
         assert "response" in data
 
-    def test_chat_history(self, client):
+    @pytest.mark.asyncio
+    async def test_chat_history(self, aclient, seeded_chat):
         """Test getting chat history."""
-        # First send a message
-        request = {"message": "Hello"}
-        client.post("/api/v1/chat/P001/message", json=request)
-
-        # Get history
-        response = client.get("/api/v1/chat/P001/history")
+        response = await aclient.get(f"/api/v1/chat/{seeded_chat}/history")
         assert response.status_code == 200
 
         data = response.json()
         assert "messages" in data
-        assert data["patient_id"] == "P001"
+        assert len(data["messages"]) >= 1
+        assert data["patient_id"] == seeded_chat
 
-    def test_clear_chat_history(self, client):
+    @pytest.mark.asyncio
+    async def test_clear_chat_history(self, aclient, seeded_chat):
         """Test clearing chat history."""
-        # Send a message first
-        client.post("/api/v1/chat/P001/message", json={"message": "Test"})
-
-        # Clear history
-        response = client.delete("/api/v1/chat/P001/history")
+        response = await aclient.delete(f"/api/v1/chat/{seeded_chat}/history")
         assert response.status_code == 200
 
         # Verify empty
-        history_response = client.get("/api/v1/chat/P001/history")
+        history_response = await aclient.get(f"/api/v1/chat/{seeded_chat}/history")
         assert len(history_response.json()["messages"]) == 0
 
 
 class TestChatSafety:
     """Tests for chat safety features."""
 
-    def test_escalation_on_crisis_keywords(self, client):
+    @pytest.mark.asyncio
+    async def test_escalation_on_crisis_keywords(self, aclient):
         """Test escalation triggered by crisis keywords."""
         request = {
             "message": "I'm having severe chest pain"
         }
 
-        response = client.post("/api/v1/chat/P001/message", json=request)
+        response = await aclient.post("/api/v1/chat/P001/message", json=request)
         assert response.status_code == 200
 
         data = response.json()
         assert data["escalate_to_human"] is True
         assert data["escalation_reason"] is not None
 
-    def test_restricted_topic_handling(self, client):
+    @pytest.mark.asyncio
+    async def test_restricted_topic_handling(self, aclient):
         """Test handling of restricted topics (prognosis)."""
         request = {
             "message": "How long do I have to live?"
         }
 
-        response = client.post("/api/v1/chat/P001/message", json=request)
+        response = await aclient.post("/api/v1/chat/P001/message", json=request)
         assert response.status_code == 200
 
         data = response.json()
         # Should redirect to care team (accepts various forms)
-        response_lower = data["response"].lower()
-        assert "care team" in response_lower or "oncologist" in response_lower or "oncology team" in response_lower
+        assert CARE_TEAM_RE.search(data["response"])
 
-    def test_normal_question_no_escalation(self, client):
+    @pytest.mark.asyncio
+    async def test_normal_question_no_escalation(self, aclient):
         """Test that normal questions don't trigger escalation."""
         request = {
             "message": "What side effects should I expect?"
         }
 
-        response = client.post("/api/v1/chat/P001/message", json=request)
+        response = await aclient.post("/api/v1/chat/P001/message", json=request)
         assert response.status_code == 200
 
         data = response.json()
@@ -108,62 +137,44 @@ class TestChatSafety:
 class TestChatResponses:
     """Tests for chat response quality."""
 
-    def test_treatment_question_response(self, client):
-        """Test response to treatment-related question."""
-        request = {
-            "message": "Tell me about my treatment options"
-        }
-
-        response = client.post("/api/v1/chat/P001/message", json=request)
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "message, keyword",
+        [(message, keyword) for _, message, keyword in CHAT_QUALITY_CASES],
+        ids=[case_id for case_id, _, _ in CHAT_QUALITY_CASES]
+    )
+    async def test_response_quality(self, aclient, message, keyword):
+        """Test that each kind of question gets a substantive response."""
+        response = await aclient.post("/api/v1/chat/P001/message", json={"message": message})
         data = response.json()
 
-        # Should have substantive response
         assert len(data["response"]) > 100
-        assert "treatment" in data["response"].lower()
-
-    def test_side_effects_question_response(self, client):
-        """Test response to side effects question."""
-        request = {
-            "message": "What side effects might I experience?"
-        }
-
-        response = client.post("/api/v1/chat/P001/message", json=request)
-        data = response.json()
-
-        assert len(data["response"]) > 100
-        # Should mention common side effects or symptom management
-
-    def test_clinical_trial_question_response(self, client):
-        """Test response to clinical trial question."""
-        request = {
-            "message": "Are there any clinical trials I might be eligible for?"
-        }
-
-        response = client.post("/api/v1/chat/P001/message", json=request)
-        data = response.json()
-
-        assert len(data["response"]) > 100
-        assert "trial" in data["response"].lower()
-
-    def test_genomics_question_response(self, client):
-        """Test response to genomics/mutation question."""
-        request = {
-            "message": "What does my EGFR mutation mean?"
-        }
-
-        response = client.post("/api/v1/chat/P001/message", json=request)
-        data = response.json()
-
-        assert len(data["response"]) > 100
-        # Should mention EGFR or mutation
-
-    def test_suggested_followups(self, client):
+        if keyword:
+            assert keyword in data["response"].lower()
+
+    @pytest.mark.asyncio
+    async def test_concurrent_chat_responses(self, aclient):
+        """Test that questions sent concurrently are each answered."""
+        responses = await asyncio.gather(*[
+            aclient.post("/api/v1/chat/P001/message", json={"message": message})
+            for _, message, _ in CHAT_QUALITY_CASES
+        ])
+
+        for response, (_, _, keyword) in zip(responses, CHAT_QUALITY_CASES):
+            assert response.status_code == 200
+            data = response.json()
+            assert len(data["response"]) > 100
+            if keyword:
+                assert keyword in data["response"].lower()
+
+    @pytest.mark.asyncio
+    async def test_suggested_followups(self, aclient):
         """Test that responses include suggested follow-ups."""
         request = {
             "message": "Hello, I have questions about my care"
         }
 
-        response = client.post("/api/v1/chat/P001/message", json=request)
+        response = await aclient.post("/api/v1/chat/P001/message", json=request)
         data = response.json()
 
         # Should have suggested follow-up questions
@@ -173,20 +184,22 @@ class TestChatResponses:
 class TestChatValidation:
     """Tests for chat input validation."""
 
-    def test_empty_message(self, client):
+    @pytest.mark.asyncio
+    async def test_empty_message(self, aclient):
         """Test handling of empty message."""
         request = {"message": ""}
 
-        response = client.post("/api/v1/chat/P001/message", json=request)
+        response = await aclient.post("/api/v1/chat/P001/message", json=request)
         # Should either handle gracefully or reject
         assert response.status_code in [200, 400, 422]
 
-    def test_very_long_message(self, client):
+    @pytest.mark.asyncio
+    async def test_very_long_message(self, aclient):
         """Test handling of very long message."""
         request = {
-            "message": "This is a test message. " * 1000  # Very long
+            "message": LONG_MESSAGE
         }
 
-        response = client.post("/api/v1/chat/P001/message", json=request)
+        response = await aclient.post("/api/v1/chat/P001/message", json=request)
         # Should handle without crashing
         assert response.status_code in [200, 400, 413]  # 413 = payload too large
@@ -23,6 +23,28 @@ from models.messages import (
 )
 
 
+# (enum member, its serialized value)
+ENUM_VALUES = [
+    (ECOGStatus.FULLY_ACTIVE, 0),
+    (ECOGStatus.RESTRICTED, 1),
+    (ECOGStatus.DISABLED, 4),
+    (AgentType.ORCHESTRATOR, "orchestrator"),
+    (AgentType.GENOMICS, "genomics"),
+    (MessageType.REQUEST, "request"),
+    (MessageType.RESPONSE, "response"),
+]
+
+
+@pytest.mark.parametrize(
+    "member, expected",
+    ENUM_VALUES,
+    ids=[f"{type(member).__name__}.{member.name}" for member, _ in ENUM_VALUES]
+)
+def test_enum_values(member, expected):
+    """Test the values enums serialize to in the API and database."""
+    assert member.value == expected
+
+
 class TestPatientModels:
     """Tests for patient-related models."""
 
@@ -33,6 +55,14 @@ class TestPatientModels:
         assert mock_patient.last_name == "Doe"
         assert mock_patient.full_name == "John Doe"
 
+    def test_mutable_patient_is_isolated(self, mock_patient, mutable_patient):
+        """Test that changes to a mutable_patient copy leave mock_patient intact."""
+        mutable_patient.first_name = "Jane"
+        mutable_patient.comorbidities.clear()
+
+        assert mock_patient.first_name == "John"
+        assert len(mock_patient.comorbidities) == 2
+
     def test_patient_age_calculation(self, mock_patient):
         """Test patient age calculation."""
         # Patient born in 1960
@@ -68,12 +98,6 @@ class TestPatientModels:
         assert comorb.condition == "Diabetes"
         assert len(comorb.treatment_implications) == 1
 
-    def test_ecog_status_values(self):
-        """Test ECOG status enum values."""
-        assert ECOGStatus.FULLY_ACTIVE.value == 0
-        assert ECOGStatus.RESTRICTED.value == 1
-        assert ECOGStatus.DISABLED.value == 4
-
     def test_patient_summary_creation(self, mock_patient):
         """Test creating patient summary."""
         summary = PatientSummary(
@@ -186,11 +210,6 @@ class TestTreatmentModels:
 class TestMessageModels:
     """Tests for message-related models."""
 
-    def test_agent_type_values(self):
-        """Test agent type enum values."""
-        assert AgentType.ORCHESTRATOR.value == "orchestrator"
-        assert AgentType.GENOMICS.value == "genomics"
-
     def test_agent_message_creation(self):
         """Test creating an agent message."""
         msg = AgentMessage(
@@ -241,15 +260,20 @@ class TestMessageModels:
 class TestModelSerialization:
     """Tests for model serialization."""
 
-    def test_patient_to_dict(self, mock_patient):
+    @pytest.fixture(scope="class")
+    def patient_dump(self, mock_patient):
+        """Serialize the shared mock patient once, to a dict and to JSON."""
+        return mock_patient.model_dump(), mock_patient.model_dump_json()
+
+    def test_patient_to_dict(self, patient_dump):
         """Test patient serialization to dict."""
-        data = mock_patient.model_dump()
+        data, _ = patient_dump
         assert data["id"] == "TEST001"
         assert "cancer_details" in data
 
-    def test_patient_to_json(self, mock_patient):
+    def test_patient_to_json(self, patient_dump):
         """Test patient serialization to JSON."""
-        json_str = mock_patient.model_dump_json()
+        _, json_str = patient_dump
         assert "TEST001" in json_str
         assert "John" in json_str
 
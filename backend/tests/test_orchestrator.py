@@ -1,38 +1,46 @@
 """Tests for Orchestrator Agent."""
 
 import pytest
+import pytest_asyncio
 from datetime import date
 
 from agents.orchestrator_agent import (
-    OrchestratorAgent, OrchestratorInput, AnalysisStep
+    OrchestratorAgent, OrchestratorInput, OrchestratorOutput, AnalysisStep
 )
-from services.llm_service import LLMService
-from services.patient_service import PatientService
+
+
+@pytest.fixture(scope="session")
+def orchestrator(llm_service_mock, patient_service):
+    """Create one orchestrator agent for these tests.
+
+    Each run keeps its state on the returned result, not on the agent, so
+    the tests can share it.
+    """
+    return OrchestratorAgent(
+        llm_service=llm_service_mock,
+        patient_service=patient_service,
+        use_mock=True
+    )
+
+
+# Session-scoped (like orchestrator) so it runs on the tests' event loop
+@pytest_asyncio.fixture(scope="session")
+async def full_analysis(orchestrator):
+    """Run one full analysis of P001 (trials and evidence included).
+
+    The tests that only read from a default run share this result instead
+    of each running the whole workflow again.
+    """
+    return await orchestrator.run_analysis(OrchestratorInput(patient_id="P001"))
 
 
 class TestOrchestratorAgent:
     """Tests for OrchestratorAgent."""
 
-    @pytest.fixture
-    def orchestrator(self, patient_service):
-        """Create orchestrator agent for testing."""
-        llm_service = LLMService(use_mock=True)
-        return OrchestratorAgent(
-            llm_service=llm_service,
-            patient_service=patient_service,
-            use_mock=True
-        )
-
     @pytest.mark.asyncio
-    async def test_run_analysis_success(self, orchestrator):
+    async def test_run_analysis_success(self, full_analysis):
         """Test successful analysis run."""
-        input_data = OrchestratorInput(
-            patient_id="P001",
-            include_trials=True,
-            include_evidence=True
-        )
-
-        result = await orchestrator.run_analysis(input_data)
+        result = full_analysis
 
         assert result.result is not None
         assert result.result.patient_id == "P001"
@@ -68,15 +76,9 @@ class TestOrchestratorAgent:
         assert "clinical_trials (skipped)" in result.state.steps_completed
 
     @pytest.mark.asyncio
-    async def test_run_analysis_state_progression(self, orchestrator):
+    async def test_run_analysis_state_progression(self, full_analysis):
         """Test that state progresses through all steps."""
-        input_data = OrchestratorInput(
-            patient_id="P001",
-            include_trials=True,
-            include_evidence=True
-        )
-
-        result = await orchestrator.run_analysis(input_data)
+        result = full_analysis
 
         # All steps should be completed
         expected_steps = {"medical_history", "genomics", "clinical_trials", "evidence", "treatment", "synthesizing"}
@@ -95,7 +97,12 @@ class TestOrchestratorAgent:
 
         progress_updates = []
         async for progress in orchestrator.run_streaming(input_data):
+            # The final OrchestratorOutput follows the completed update
+            if isinstance(progress, OrchestratorOutput):
+                break
             progress_updates.append(progress)
+            if progress.status in ("completed", "error"):
+                break
 
         # Should have received multiple updates
         assert len(progress_updates) > 1
@@ -108,53 +115,33 @@ class TestOrchestratorAgent:
         assert progress_updates[-1].status == "completed"
 
     @pytest.mark.asyncio
-    async def test_analysis_result_contains_key_findings(self, orchestrator):
+    async def test_analysis_result_contains_key_findings(self, full_analysis):
         """Test that result contains key findings."""
-        input_data = OrchestratorInput(
-            patient_id="P001",
-            include_trials=True
-        )
-
-        result = await orchestrator.run_analysis(input_data)
+        result = full_analysis
 
         assert result.result.key_findings is not None
         assert len(result.result.key_findings) > 0
 
     @pytest.mark.asyncio
-    async def test_analysis_result_contains_recommendations(self, orchestrator):
+    async def test_analysis_result_contains_recommendations(self, full_analysis):
         """Test that result contains recommendations."""
-        input_data = OrchestratorInput(
-            patient_id="P001",
-            include_trials=True
-        )
-
-        result = await orchestrator.run_analysis(input_data)
+        result = full_analysis
 
         assert result.result.recommendations is not None
         assert len(result.result.recommendations) > 0
 
     @pytest.mark.asyncio
-    async def test_analysis_result_contains_treatment_plan(self, orchestrator):
+    async def test_analysis_result_contains_treatment_plan(self, full_analysis):
         """Test that result contains treatment plan."""
-        input_data = OrchestratorInput(
-            patient_id="P001",
-            include_trials=True
-        )
-
-        result = await orchestrator.run_analysis(input_data)
+        result = full_analysis
 
         assert result.result.treatment_plan is not None
         assert result.result.treatment_plan["patient_id"] == "P001"
 
     @pytest.mark.asyncio
-    async def test_analysis_result_contains_clinical_trials(self, orchestrator):
+    async def test_analysis_result_contains_clinical_trials(self, full_analysis):
         """Test that result contains clinical trials when requested."""
-        input_data = OrchestratorInput(
-            patient_id="P001",
-            include_trials=True
-        )
-
-        result = await orchestrator.run_analysis(input_data)
+        result = full_analysis
 
         assert result.result.clinical_trials is not None
         # May or may not have trials depending on patient profile
@@ -184,16 +171,6 @@ class TestOrchestratorAgent:
 class TestOrchestratorState:
     """Tests for orchestrator state management."""
 
-    @pytest.fixture
-    def orchestrator(self, patient_service):
-        """Create orchestrator for testing."""
-        llm_service = LLMService(use_mock=True)
-        return OrchestratorAgent(
-            llm_service=llm_service,
-            patient_service=patient_service,
-            use_mock=True
-        )
-
     @pytest.mark.asyncio
     async def test_state_tracks_intermediate_outputs(self, orchestrator):
         """Test that state tracks all intermediate agent outputs."""
@@ -3,6 +3,55 @@
 import pytest
 from fastapi.testclient import TestClient
 
+pytestmark = pytest.mark.usefixtures("clean_test_patients")
+
+# (case, payload, accepted status codes) for TestPatientValidation
+INVALID_PATIENT_CASES = [
+    # Missing required fields
+    ("missing_fields", {"id": "TEST"}, (422,)),
+    # Bad request or validation error
+    ("invalid_date", {
+        "id": "TEST-INVALID",
+        "first_name": "Test",
+        "last_name": "Invalid",
+        "date_of_birth": "invalid-date",
+        "sex": "Male"
+    }, (400, 422)),
+    # Should either reject or accept - depends on validation rules
+    ("empty_required_fields", {
+        "id": "",
+        "first_name": "",
+        "last_name": "Test",
+        "date_of_birth": "1990-01-01",
+        "sex": "Male"
+    }, (201, 400, 422)),
+]
+
+
+@pytest.fixture(scope="module")
+def seeded_patients():
+    """Insert the patients the update and delete tests work on and return their IDs.
+
+    Writes straight to the database, like seeded_chat, so those tests don't
+    each pay for a full create request; clean_test_patients removes them.
+    """
+    from database import SyncSessionLocal
+    from models.db_models import PatientDB
+    patient_ids = {"update": "TEST-UPDATE-001", "delete": "TEST-DELETE-001"}
+    with SyncSessionLocal() as db:
+        db.add_all([
+            PatientDB(
+                id=patient_id,
+                first_name="Seeded",
+                last_name="Test",
+                date_of_birth="1980-01-01",
+                sex="Male"
+            )
+            for patient_id in patient_ids.values()
+        ])
+        db.commit()
+    return patient_ids
+
 
 class TestPatientsAPI:
     """Tests for patient CRUD endpoints."""
@@ -19,6 +68,13 @@ class TestPatientsAPI:
         assert "page_size" in data
         assert "total_pages" in data
 
+    @pytest.mark.asyncio
+    async def test_list_patients_async(self, aclient):
+        """Test listing patients through the in-process ASGI client."""
+        response = await aclient.get("/api/v1/patients")
+        assert response.status_code == 200
+        assert "items" in response.json()
+
     def test_list_patients_with_pagination(self, client):
         """Test patient list pagination."""
         response = client.get("/api/v1/patients?page=1&page_size=10")
@@ -73,35 +129,14 @@ class TestPatientsAPI:
         assert data["id"] == "TEST-NEW-001"
         assert data["first_name"] == "Jane"
 
-    def test_create_patient_invalid_data(self, client):
-        """Test creating a patient with invalid data."""
-        invalid_patient = {
-            "id": "TEST",
-            # Missing required fields
-        }
-
-        response = client.post("/api/v1/patients", json=invalid_patient)
-        assert response.status_code == 422  # Validation error
-
-    def test_update_patient(self, client):
+    def test_update_patient(self, client, seeded_patients):
         """Test updating a patient."""
-        # First create a patient
-        new_patient = {
-            "id": "TEST-UPDATE-001",
-            "first_name": "Update",
-            "last_name": "Test",
-            "date_of_birth": "1980-01-01",
-            "sex": "Male"
-        }
-        client.post("/api/v1/patients", json=new_patient)
-
-        # Update the patient
         update_data = {
             "first_name": "Updated",
             "email": "updated@test.com"
         }
 
-        response = client.put("/api/v1/patients/TEST-UPDATE-001", json=update_data)
+        response = client.put(f"/api/v1/patients/{seeded_patients['update']}", json=update_data)
         assert response.status_code == 200
 
         data = response.json()
@@ -114,24 +149,14 @@ class TestPatientsAPI:
         response = client.put("/api/v1/patients/NONEXISTENT", json=update_data)
         assert response.status_code == 404
 
-    def test_delete_patient(self, client):
+    def test_delete_patient(self, client, seeded_patients):
         """Test deleting a patient."""
-        # First create a patient
-        new_patient = {
-            "id": "TEST-DELETE-001",
-            "first_name": "Delete",
-            "last_name": "Test",
-            "date_of_birth": "1990-01-01",
-            "sex": "Female"
-        }
-        client.post("/api/v1/patients", json=new_patient)
-
-        # Delete the patient
-        response = client.delete("/api/v1/patients/TEST-DELETE-001")
+        patient_id = seeded_patients["delete"]
+        response = client.delete(f"/api/v1/patients/{patient_id}")
         assert response.status_code == 204
 
         # Verify deletion
-        get_response = client.get("/api/v1/patients/TEST-DELETE-001")
+        get_response = client.get(f"/api/v1/patients/{patient_id}")
         assert get_response.status_code == 404
 
     def test_delete_patient_not_found(self, client):
@@ -164,29 +189,12 @@ class TestPatientFiltering:
 class TestPatientValidation:
     """Tests for patient data validation."""
 
-    def test_invalid_date_format(self, client):
-        """Test rejection of invalid date format."""
-        invalid_patient = {
-            "id": "TEST-INVALID",
-            "first_name": "Test",
-            "last_name": "Invalid",
-            "date_of_birth": "invalid-date",
-            "sex": "Male"
-        }
-
-        response = client.post("/api/v1/patients", json=invalid_patient)
-        assert response.status_code in [400, 422]  # Bad request or validation error
-
-    def test_empty_required_fields(self, client):
-        """Test rejection of empty required fields."""
-        invalid_patient = {
-            "id": "",
-            "first_name": "",
-            "last_name": "Test",
-            "date_of_birth": "1990-01-01",
-            "sex": "Male"
-        }
-
-        response = client.post("/api/v1/patients", json=invalid_patient)
-        # Should either reject or accept - depends on validation rules
-        assert response.status_code in [201, 400, 422]
+    @pytest.mark.parametrize(
+        "payload, expected_statuses",
+        [(payload, statuses) for _, payload, statuses in INVALID_PATIENT_CASES],
+        ids=[case_id for case_id, _, _ in INVALID_PATIENT_CASES]
+    )
+    def test_invalid_payloads(self, client, payload, expected_statuses):
+        """Test creating patients from invalid or borderline payloads."""
+        response = client.post("/api/v1/patients", json=payload)
+        assert response.status_code in expected_statuses
@@ -2,8 +2,8 @@
 
 import pytest
 import asyncio
+import numpy as np
 
-from rag.embeddings import EmbeddingService
 from rag.vector_store import VectorStore, SearchResult, VectorDocument
 from rag.retriever import Retriever, RetrievalConfig
 from rag.reranker import Reranker, RerankerConfig
@@ -13,11 +13,6 @@ from rag.ingestion import DataIngestion
 class TestEmbeddingService:
     """Tests for EmbeddingService."""
 
-    @pytest.fixture
-    def embedding_service(self):
-        """Create embedding service for testing."""
-        return EmbeddingService(use_mock=True)
-
     @pytest.mark.asyncio
     async def test_embed_text(self, embedding_service):
         """Test single text embedding."""
@@ -25,7 +20,7 @@ class TestEmbeddingService:
         embedding = await embedding_service.embed_text(text)
 
         assert len(embedding) == embedding_service.EMBEDDING_DIM
-        assert all(isinstance(v, float) for v in embedding)
+        assert set(map(type, embedding)) == {float}
 
     @pytest.mark.asyncio
     async def test_embed_batch(self, embedding_service):
@@ -44,19 +39,97 @@ class TestEmbeddingService:
     async def test_embedding_determinism(self, embedding_service):
         """Test that same text produces same embedding."""
         text = "Test text for embedding"
-        emb1 = await embedding_service.embed_text(text)
-        emb2 = await embedding_service.embed_text(text)
+        emb1, emb2 = await embedding_service.embed_batch([text, text])
 
         assert emb1 == emb2
+        # Recompute rather than reading the cache back
+        embedding_service.clear_cache()
+        assert await embedding_service.embed_text(text) == emb1
 
     @pytest.mark.asyncio
     async def test_different_texts_different_embeddings(self, embedding_service):
         """Test that different texts produce different embeddings."""
-        emb1 = await embedding_service.embed_text("Text one")
-        emb2 = await embedding_service.embed_text("Completely different text")
+        emb1, emb2 = await embedding_service.embed_batch(
+            ["Text one", "Completely different text"]
+        )
 
         assert emb1 != emb2
 
+    @pytest.mark.asyncio
+    async def test_embed_text_cache(self, embedding_service, monkeypatch):
+        """Test repeated texts are served from the embedding cache."""
+        embedding_service.clear_cache()
+        calls = 0
+        mock_embedding = embedding_service._mock_embedding
+
+        def counting_embedding(text):
+            nonlocal calls
+            calls += 1
+            return mock_embedding(text)
+
+        monkeypatch.setattr(embedding_service, "_mock_embedding", counting_embedding)
+
+        emb1 = await embedding_service.embed_text("EGFR mutation")
+        emb2 = await embedding_service.embed_text("EGFR mutation")
+
+        assert emb1 == emb2
+        assert calls == 1
+
+    @pytest.mark.asyncio
+    async def test_embed_batch_deduplicates(self, embedding_service, monkeypatch):
+        """Test batches embed each distinct uncached text once."""
+        embedding_service.clear_cache()
+        await embedding_service.embed_text("ALK fusion")
+
+        embedded = []
+        mock_embedding = embedding_service._mock_embedding
+
+        def recording_embedding(text):
+            embedded.append(text)
+            return mock_embedding(text)
+
+        monkeypatch.setattr(embedding_service, "_mock_embedding", recording_embedding)
+
+        texts = ["Grade 2 nausea", "ALK fusion", "Grade 2 nausea", "KRAS G12C"]
+        embeddings = await embedding_service.embed_batch(texts)
+
+        assert embedded == ["Grade 2 nausea", "KRAS G12C"]
+        assert embeddings[0] == embeddings[2]
+        assert embeddings[1] == mock_embedding("ALK fusion")
+
+    def test_text_similarity_uses_cache(self, embedding_service, monkeypatch):
+        """Test text_similarity embeds each distinct uncached text once."""
+        embedding_service.clear_cache()
+        embedded = []
+        mock_embedding = embedding_service._mock_embedding
+
+        def recording_embedding(text):
+            embedded.append(text)
+            return mock_embedding(text)
+
+        monkeypatch.setattr(embedding_service, "_mock_embedding", recording_embedding)
+
+        embedding_service.text_similarity("EGFR mutation", "EGFR mutation")
+        embedding_service.text_similarity("EGFR mutation", "ALK fusion")
+
+        assert embedded == ["EGFR mutation", "ALK fusion"]
+
+    def test_mock_embedding_matches_stepwise_lcg(self, embedding_service):
+        """Test the vectorized mock embedding reproduces the stepwise generator."""
+        import hashlib
+        import math
+
+        text = "egfr mutation"
+        seed_value = int.from_bytes(hashlib.md5(text.encode()).digest(), byteorder="big")
+        expected = []
+        for _ in range(embedding_service.EMBEDDING_DIM):
+            seed_value = (seed_value * 1103515245 + 12345) % (2 ** 31)
+            expected.append(seed_value / (2 ** 30) - 1.0)
+        magnitude = math.sqrt(sum(v * v for v in expected))
+        expected = [v / magnitude for v in expected]
+
+        assert embedding_service._mock_embedding(text) == pytest.approx(expected, abs=1e-12)
+
     def test_cosine_similarity(self, embedding_service):
         """Test cosine similarity calculation."""
         vec1 = [1.0, 0.0, 0.0]
@@ -64,9 +137,14 @@ class TestEmbeddingService:
         vec3 = [0.0, 1.0, 0.0]
 
         # Same vector
-        assert embedding_service.cosine_similarity(vec1, vec2) == 1.0
+        assert embedding_service.cosine_similarity(vec1, vec2) == pytest.approx(1.0)
         # Orthogonal vectors
-        assert embedding_service.cosine_similarity(vec1, vec3) == 0.0
+        assert embedding_service.cosine_similarity(vec1, vec3) == pytest.approx(0.0, abs=1e-6)
+        # Arrays are accepted as well as lists
+        assert embedding_service.cosine_similarity(np.array(vec1), vec2) == pytest.approx(1.0)
+
+        with pytest.raises(ValueError):
+            embedding_service.cosine_similarity(vec1, [1.0, 0.0])
 
     def test_text_similarity(self, embedding_service):
         """Test text similarity calculation."""
@@ -74,7 +152,7 @@ class TestEmbeddingService:
             "EGFR mutation lung cancer",
             "EGFR mutation lung cancer"
         )
-        assert sim == 1.0
+        assert sim == pytest.approx(1.0)
 
         # Different texts should have lower similarity
         sim2 = embedding_service.text_similarity(
@@ -87,10 +165,6 @@ class TestEmbeddingService:
 class TestVectorStore:
     """Tests for VectorStore."""
 
-    @pytest.fixture
-    def embedding_service(self):
-        return EmbeddingService(use_mock=True)
-
     @pytest.fixture
     def vector_store(self, embedding_service):
         """Create vector store for testing."""
@@ -116,9 +190,11 @@ class TestVectorStore:
     async def test_query_documents(self, vector_store):
         """Test document query."""
         # Insert documents
-        await vector_store.upsert("doc1", "EGFR mutation targeted therapy", {"type": "genomics"})
-        await vector_store.upsert("doc2", "ALK fusion treatment options", {"type": "genomics"})
-        await vector_store.upsert("doc3", "Immunotherapy for lung cancer", {"type": "treatment"})
+        await asyncio.gather(
+            vector_store.upsert("doc1", "EGFR mutation targeted therapy", {"type": "genomics"}),
+            vector_store.upsert("doc2", "ALK fusion treatment options", {"type": "genomics"}),
+            vector_store.upsert("doc3", "Immunotherapy for lung cancer", {"type": "treatment"}),
+        )
 
         # Query
         results = await vector_store.query("EGFR mutation", top_k=2)
@@ -130,8 +206,10 @@ class TestVectorStore:
     @pytest.mark.asyncio
     async def test_query_with_filter(self, vector_store):
         """Test document query with metadata filter."""
-        await vector_store.upsert("doc1", "EGFR treatment", {"type": "genomics"})
-        await vector_store.upsert("doc2", "EGFR treatment", {"type": "treatment"})
+        await asyncio.gather(
+            vector_store.upsert("doc1", "EGFR treatment", {"type": "genomics"}),
+            vector_store.upsert("doc2", "EGFR treatment", {"type": "treatment"}),
+        )
 
         results = await vector_store.query(
             "EGFR",
@@ -140,6 +218,20 @@ class TestVectorStore:
 
         assert all(r.metadata.get("type") == "genomics" for r in results)
 
+    @pytest.mark.asyncio
+    async def test_filter_exact_metadata(self, vector_store):
+        """Test exact metadata lookup without a query."""
+        await asyncio.gather(
+            vector_store.upsert("doc1", "EGFR L858R", {"gene": "EGFR"}),
+            vector_store.upsert("doc2", "EGFR exon 19 deletion", {"gene": "EGFR"}),
+            vector_store.upsert("doc3", "KRAS G12C", {"gene": "KRAS"}),
+        )
+
+        results = await vector_store.filter({"gene": "EGFR"})
+
+        assert sorted(r.doc_id for r in results) == ["doc1", "doc2"]
+        assert all(r.score == 1.0 for r in results)
+
     @pytest.mark.asyncio
     async def test_delete_document(self, vector_store):
         """Test document deletion."""
@@ -153,8 +245,10 @@ class TestVectorStore:
     @pytest.mark.asyncio
     async def test_clear_store(self, vector_store):
         """Test clearing all documents."""
-        await vector_store.upsert("doc1", "Content 1")
-        await vector_store.upsert("doc2", "Content 2")
+        await asyncio.gather(
+            vector_store.upsert("doc1", "Content 1"),
+            vector_store.upsert("doc2", "Content 2"),
+        )
         assert vector_store.count == 2
 
         result = await vector_store.clear()
@@ -164,21 +258,55 @@ class TestVectorStore:
     @pytest.mark.asyncio
     async def test_query_min_score(self, vector_store):
         """Test query with minimum score threshold."""
-        await vector_store.upsert("doc1", "EGFR mutation")
-        await vector_store.upsert("doc2", "Completely unrelated content xyz")
+        await asyncio.gather(
+            vector_store.upsert("doc1", "EGFR mutation"),
+            vector_store.upsert("doc2", "Completely unrelated content xyz"),
+        )
 
         results = await vector_store.query("EGFR mutation", min_score=0.5)
 
         assert all(r.score >= 0.5 for r in results)
 
+    @pytest.mark.asyncio
+    async def test_int8_quantized_query_matches_float32(self, embedding_service, vector_store):
+        """Test int8-quantized store ranks and scores like the float32 store."""
+        quantized = VectorStore(embedding_service, use_mock=True, namespace="test_i8", quantize="int8")
+        for i in range(50):
+            await vector_store.upsert(f"doc{i}", f"Document number {i}")
+            await quantized.upsert(f"doc{i}", f"Document number {i}")
+
+        expected = await vector_store.query("Document number 7", top_k=5)
+        results = await quantized.query("Document number 7", top_k=5)
+
+        assert [r.doc_id for r in results] == [r.doc_id for r in expected]
+        assert results[0].doc_id == "doc7"
+        assert results[0].score == pytest.approx(expected[0].score)
+
+    @pytest.mark.asyncio
+    async def test_float16_query_matches_float32(self, embedding_service, vector_store):
+        """Test float16-stored store ranks and scores like the float32 store."""
+        half = VectorStore(embedding_service, use_mock=True, namespace="test_f16", quantize="float16")
+        for i in range(50):
+            await vector_store.upsert(f"doc{i}", f"Document number {i}")
+            await half.upsert(f"doc{i}", f"Document number {i}")
+
+        expected = await vector_store.query("Document number 7", top_k=5)
+        results = await half.query("Document number 7", top_k=5)
+
+        assert [r.doc_id for r in results] == [r.doc_id for r in expected]
+        assert results[0].score == pytest.approx(expected[0].score)
+
+    def test_top_k_matches_stable_sort(self):
+        """Test partition-based top-k keeps the order of a full stable sort, ties included."""
+        scores = np.array([0.2, 0.9, 0.5, 0.9, 0.5, 0.1, 0.5], dtype=np.float32)
+        for k in range(0, len(scores) + 2):
+            expected = np.argsort(-scores, kind="stable")[:k]
+            assert VectorStore._top_k(scores, k).tolist() == expected.tolist()
+
 
 class TestRetriever:
     """Tests for Retriever."""
 
-    @pytest.fixture
-    def embedding_service(self):
-        return EmbeddingService(use_mock=True)
-
     @pytest.fixture
     def vector_stores(self, embedding_service):
         """Create vector stores for testing."""
@@ -200,8 +328,10 @@ class TestRetriever:
     @pytest.mark.asyncio
     async def test_retrieve_from_multiple_namespaces(self, retriever, vector_stores):
         """Test retrieval from multiple namespaces."""
-        await vector_stores["evidence"].upsert("ev1", "EGFR targeted therapy evidence")
-        await vector_stores["trials"].upsert("tr1", "EGFR clinical trial recruiting")
+        await asyncio.gather(
+            vector_stores["evidence"].upsert("ev1", "EGFR targeted therapy evidence"),
+            vector_stores["trials"].upsert("tr1", "EGFR clinical trial recruiting"),
+        )
 
         results = await retriever.retrieve("EGFR", namespaces=["evidence", "trials"])
 
@@ -209,6 +339,19 @@ class TestRetriever:
         namespaces = {r.metadata.get("namespace") for r in results}
         # May have results from one or both depending on scores
 
+    @pytest.mark.asyncio
+    async def test_retrieve_single_namespace(self, retriever, vector_stores):
+        """Test single-namespace retrieval tags the namespace and matches the store's ranking."""
+        for i in range(5):
+            await vector_stores["trials"].upsert(f"tr{i}", f"Clinical trial number {i}")
+
+        config = RetrievalConfig(top_k=3, expand_query=False, min_score=0.0)
+        results = await retriever.retrieve("Clinical trial number 2", namespaces=["trials"], config=config)
+        expected = await vector_stores["trials"].query("Clinical trial number 2", top_k=3)
+
+        assert [r.doc_id for r in results] == [r.doc_id for r in expected]
+        assert all(r.metadata["namespace"] == "trials" for r in results)
+
     @pytest.mark.asyncio
     async def test_query_expansion(self, retriever, vector_stores):
         """Test query expansion with synonyms."""
@@ -231,6 +374,18 @@ class TestRetriever:
         assert "egfr" in retriever.MEDICAL_SYNONYMS
         assert "immunotherapy" in retriever.MEDICAL_SYNONYMS
 
+    def test_expand_query(self, retriever):
+        """Test expansions are limited per term and not shared between calls."""
+        expanded = retriever._expand_query("NSCLC treatment")
+        assert expanded == [
+            "non-small cell lung cancer treatment",
+            "lung adenocarcinoma treatment",
+        ]
+
+        # Callers get their own list even when the expansion is cached
+        expanded.clear()
+        assert len(retriever._expand_query("NSCLC treatment")) == 2
+
     @pytest.mark.asyncio
     async def test_retrieve_for_treatment(self, retriever, vector_stores):
         """Test specialized treatment retrieval."""
@@ -264,10 +419,6 @@ class TestRetriever:
 class TestReranker:
     """Tests for Reranker."""
 
-    @pytest.fixture
-    def embedding_service(self):
-        return EmbeddingService(use_mock=True)
-
     @pytest.fixture
     def reranker(self, embedding_service):
         """Create reranker for testing."""
@@ -340,6 +491,21 @@ class TestReranker:
 
         # More recent should be boosted
 
+    @pytest.mark.asyncio
+    async def test_rerank_min_score(self, reranker):
+        """Test that reranking drops results below the configured threshold."""
+        results = [
+            SearchResult(doc_id="d1", content="EGFR mutation treatment", score=0.7),
+            SearchResult(doc_id="d2", content="Random content about weather", score=0.3),
+            SearchResult(doc_id="d3", content="Unrelated", score=0.01)
+        ]
+
+        config = RerankerConfig(min_score=0.5)
+        reranked = await reranker.rerank("EGFR mutation", results, config)
+
+        assert [r.doc_id for r in reranked] == ["d1"]
+        assert all(r.score >= 0.5 for r in reranked)
+
     def test_source_weights(self, reranker):
         """Test that reranker has source weights."""
         assert reranker.SOURCE_WEIGHTS["nccn_guidelines"] > reranker.SOURCE_WEIGHTS["default"]
@@ -358,6 +524,10 @@ class TestReranker:
         assert len(filtered) == 2
         assert all(r.score >= 0.4 for r in filtered)
 
+        # max_results keeps the first passing results in input order
+        limited = reranker.filter_by_relevance(results, min_score=0.4, max_results=1)
+        assert [r.doc_id for r in limited] == ["d1"]
+
     def test_group_by_source(self, reranker):
         """Test grouping results by source."""
         results = [
@@ -376,10 +546,6 @@ class TestReranker:
 class TestDataIngestion:
     """Tests for DataIngestion."""
 
-    @pytest.fixture
-    def embedding_service(self):
-        return EmbeddingService(use_mock=True)
-
     @pytest.fixture
     def vector_stores(self, embedding_service):
         return {
@@ -404,6 +570,15 @@ class TestDataIngestion:
         # Should have loaded some data
         assert sum(results.values()) > 0
 
+    @pytest.mark.asyncio
+    async def test_load_namespace(self, ingestion, vector_stores):
+        """Test loading a single namespace's mock data."""
+        count = await ingestion.load_namespace("genomics")
+
+        assert count > 0
+        assert vector_stores["genomics"].count == count
+        assert vector_stores["evidence"].count == 0
+
     def test_chunk_text(self, ingestion):
         """Test text chunking."""
         long_text = "This is a sentence. " * 100
@@ -1,68 +1,324 @@
 """Tests for service layer."""
 
+import asyncio
+import httpx
+import orjson
 import pytest
+import pytest_asyncio
 from datetime import date
+from types import SimpleNamespace
 
 from services.llm_service import LLMService
-from services.patient_service import PatientService
+from services.tracing import get_tracer
 from services.analysis_service import AnalysisService
+from services import pubmed_service
+from services.pubmed_service import PubMedService
 from services.vector_store_service import VectorStoreService
 from models.messages import AnalysisRequest
+from models.patient import PatientSummary
+
+# Upper bound on a mock P001 analysis, start to finish; generous for slow CI
+# machines but far below what any per-step sleep would add up to
+MOCK_ANALYSIS_BUDGET_SECONDS = 10
+
+# Two-article eFetch response: a structured abstract with inline markup, a DOI
+# that only appears under PubmedData, and an author without a LastName
+PUBMED_EFETCH_XML = b"""<?xml version="1.0" ?>
+<PubmedArticleSet>
+<PubmedArticle>
+  <MedlineCitation>
+    <PMID>111</PMID>
+    <Article>
+      <Journal>
+        <Title>The New England journal of medicine</Title>
+        <JournalIssue><PubDate><Year>2018</Year><Month>Jan</Month><Day>11</Day></PubDate></JournalIssue>
+      </Journal>
+      <ArticleTitle>Osimertinib in Untreated EGFR-Mutated Advanced NSCLC</ArticleTitle>
+      <Abstract>
+        <AbstractText Label="BACKGROUND">Osimertinib is an EGFR-TKI.</AbstractText>
+        <AbstractText Label="RESULTS">Median PFS was <i>18.9</i> months.</AbstractText>
+      </Abstract>
+      <AuthorList>
+        <Author><LastName>Soria</LastName><ForeName>Jean-Charles</ForeName></Author>
+        <Author><CollectiveName>FLAURA Investigators</CollectiveName></Author>
+        <Author><LastName>Ohe</LastName><ForeName>Yuichiro</ForeName></Author>
+      </AuthorList>
+      <PublicationTypeList><PublicationType>Randomized Controlled Trial</PublicationType></PublicationTypeList>
+    </Article>
+    <MeshHeadingList>
+      <MeshHeading><DescriptorName>Carcinoma, Non-Small-Cell Lung</DescriptorName></MeshHeading>
+    </MeshHeadingList>
+  </MedlineCitation>
+  <PubmedData>
+    <ArticleIdList>
+      <ArticleId IdType="pubmed">111</ArticleId>
+      <ArticleId IdType="doi">10.1056/NEJMoa1713137</ArticleId>
+    </ArticleIdList>
+  </PubmedData>
+</PubmedArticle>
+<PubmedArticle>
+  <MedlineCitation>
+    <PMID>222</PMID>
+    <Article>
+      <ArticleTitle>An unusual EGFR case</ArticleTitle>
+      <PublicationTypeList><PublicationType>Case Reports</PublicationType></PublicationTypeList>
+    </Article>
+  </MedlineCitation>
+</PubmedArticle>
+</PubmedArticleSet>
+"""
+
+PUBMED_ESUMMARY = {
+    "result": {
+        "uids": ["111", "222"],
+        "111": {"title": "Osimertinib in Untreated EGFR-Mutated Advanced NSCLC",
+                "pubtype": ["Randomized Controlled Trial"]},
+        "222": {"title": "An unusual EGFR case", "pubtype": ["Case Reports"]},
+    }
+}
+
+# (fetch_mode, E-utilities endpoints a filtered search should call)
+PUBMED_FETCH_MODE_CASES = [
+    ("summary", ["esearch", "esummary"]),
+    ("full", ["esearch", "efetch"]),
+]
+
+
+def _ncbi_handler(calls, failures=None):
+    """Build a MockTransport handler serving canned E-utilities responses.
+
+    Args:
+        calls: List every requested endpoint name is appended to
+        failures: Optional endpoint -> list of responses returned before the canned one
+    """
+    failures = failures or {}
+
+    def handler(request):
+        endpoint = request.url.path.rsplit("/", 1)[-1].removesuffix(".fcgi")
+        calls.append(endpoint)
+        if failures.get(endpoint):
+            return failures[endpoint].pop(0)
+        if endpoint == "esearch":
+            return httpx.Response(200, content=orjson.dumps({"esearchresult": {"idlist": ["111", "222"]}}))
+        if endpoint == "esummary":
+            return httpx.Response(200, content=orjson.dumps(PUBMED_ESUMMARY))
+        if endpoint == "efetch":
+            return httpx.Response(200, content=PUBMED_EFETCH_XML)
+        return httpx.Response(404)
+
+    return handler
+
+
+# (case, LLMService.complete keyword arguments)
+COMPLETE_CASES = [
+    ("returns_string", {
+        "prompt": "What is the treatment for EGFR+ NSCLC?",
+        "system_prompt": "You are a medical assistant."
+    }),
+    ("with_temperature", {
+        "prompt": "Generate treatment options",
+        "temperature": 0.7
+    }),
+]
+
+# (case, VectorStoreService method, keyword arguments) for the read-only search tests
+SEARCH_CASES = [
+    ("search", "search", {
+        "query": "EGFR mutation treatment", "namespaces": ["evidence"], "top_k": 5
+    }),
+    # All namespaces
+    ("search_all_namespaces", "search", {
+        "query": "lung cancer", "namespaces": None, "top_k": 10
+    }),
+    ("search_evidence", "search_evidence", {
+        "treatment": "osimertinib", "cancer_type": "NSCLC", "mutations": ["EGFR"]
+    }),
+    ("search_trials", "search_trials", {
+        "cancer_type": "NSCLC", "mutations": ["EGFR"], "status": "Recruiting"
+    }),
+    ("search_mutations", "search_mutations", {"gene": "EGFR", "variant": "L858R"}),
+]
+
+
+# Session-scoped so it runs on the tests' event loop
+@pytest_asyncio.fixture(scope="session")
+async def completed_analysis(llm_service_mock, patient_service):
+    """Run one P001 analysis to completion and return its service and request ID.
+
+    Uses its own AnalysisService so per-test services stay empty; shared by
+    the tests that only read a finished analysis.
+    """
+    service = AnalysisService(
+        llm_service=llm_service_mock,
+        patient_service=patient_service,
+        use_mock=True
+    )
+    request_id = await service.start_analysis(AnalysisRequest(
+        patient_id="P001",
+        include_trials=True,
+        include_evidence=True
+    ))
+    async for _ in service.stream_progress(request_id):
+        pass
+    return service, request_id
+
+
+# Session-scoped so it runs on the tests' event loop
+@pytest_asyncio.fixture(scope="session")
+async def initialized_vector_service():
+    """Create a vector store service loaded with the mock data once.
+
+    Shared by tests that only search; tests that index, delete or clear
+    documents use their own vector_service instead.
+    """
+    service = VectorStoreService(use_mock=True)
+    await service.initialize()
+    return service
 
 
 class TestLLMService:
     """Tests for LLMService."""
 
-    @pytest.fixture
-    def llm_service(self):
-        """Create LLM service for testing."""
-        return LLMService(use_mock=True)
-
     @pytest.mark.asyncio
-    async def test_complete_returns_string(self, llm_service):
-        """Test that complete returns a string response."""
-        response = await llm_service.complete(
-            prompt="What is the treatment for EGFR+ NSCLC?",
-            system_prompt="You are a medical assistant."
-        )
+    @pytest.mark.parametrize(
+        "kwargs",
+        [kwargs for _, kwargs in COMPLETE_CASES],
+        ids=[case_id for case_id, _ in COMPLETE_CASES]
+    )
+    async def test_complete(self, llm_service_mock, kwargs):
+        """Test that complete returns a non-empty string for each call shape."""
+        response = await llm_service_mock.complete(**kwargs)
 
         assert isinstance(response, str)
         assert len(response) > 0
 
+    def test_mock_mode_enabled(self, llm_service_mock):
+        """Test that mock mode is properly set."""
+        assert llm_service_mock._use_mock is True
+
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_requests_share_one_call(self, monkeypatch):
+        """Test that identical in-flight requests are de-duplicated."""
+        service = LLMService(use_mock=True)
+        service._use_mock = False
+        calls = []
+
+        async def fake_remote(prompt, system_prompt, temperature, max_tokens):
+            calls.append(prompt)
+            await asyncio.sleep(0.01)
+            return "shared response"
+
+        monkeypatch.setattr(service, "_complete_remote", fake_remote)
+
+        results = await asyncio.gather(*(service.complete("Same prompt") for _ in range(5)))
+
+        assert results == ["shared response"] * 5
+        assert len(calls) == 1
+
     @pytest.mark.asyncio
-    async def test_complete_with_context(self, llm_service):
-        """Test complete with additional context."""
-        response = await llm_service.complete(
-            prompt="Summarize the patient case",
-            system_prompt="You are a medical assistant.",
-            context={"patient_id": "P001", "diagnosis": "NSCLC"}
+    async def test_cancelled_leader_does_not_cancel_followers(self, monkeypatch):
+        """Test that cancelling the call doing the request lets waiting callers retry it."""
+        service = LLMService(use_mock=True)
+        service._use_mock = False
+        calls = []
+
+        async def fake_remote(prompt, system_prompt, temperature, max_tokens):
+            calls.append(prompt)
+            await asyncio.sleep(0.01)
+            return "retried response"
+
+        monkeypatch.setattr(service, "_complete_remote", fake_remote)
+
+        leader = asyncio.create_task(service.complete("Same prompt"))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(service.complete("Same prompt"))
+        await asyncio.sleep(0)
+        leader.cancel()
+
+        assert await follower == "retried response"
+        assert leader.cancelled()
+        assert len(calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_json_streaming_keeps_usage_after_close(self, monkeypatch):
+        """Test that the usage chunk sent after the closing brace is still recorded."""
+        def content_chunk(text):
+            delta = SimpleNamespace(content=text)
+            return SimpleNamespace(choices=[SimpleNamespace(delta=delta)], usage=None)
+
+        usage_chunk = SimpleNamespace(
+            choices=[],
+            usage=SimpleNamespace(prompt_tokens=12, completion_tokens=7, total_tokens=19)
         )
 
-        assert isinstance(response, str)
+        class FakeStream:
+            def __init__(self, chunks):
+                self._chunks = iter(chunks)
+
+            def __aiter__(self):
+                return self
+
+            async def __anext__(self):
+                try:
+                    return next(self._chunks)
+                except StopIteration:
+                    raise StopAsyncIteration
+
+            async def close(self):
+                pass
+
+        async def create(**kwargs):
+            return FakeStream([
+                content_chunk('{"a": '),
+                content_chunk("1}"),
+                content_chunk(" trailing"),
+                usage_chunk,
+            ])
+
+        service = LLMService(use_mock=True)
+        service._client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+        recorded = {}
+        tracer = get_tracer()
+        monkeypatch.setattr(
+            tracer, "complete_llm_span",
+            lambda span, response_text=None, usage=None: recorded.update(text=response_text, usage=usage)
+        )
+
+        text = await service._complete_json_streaming("Return JSON", None, 0.3, 100)
+
+        assert text == '{"a": 1}'
+        assert recorded["usage"] == {"prompt_tokens": 12, "completion_tokens": 7, "total_tokens": 19}
 
     @pytest.mark.asyncio
-    async def test_complete_with_temperature(self, llm_service):
-        """Test complete with temperature setting."""
-        response = await llm_service.complete(
-            prompt="Generate treatment options",
-            temperature=0.7
+    async def test_structured_batch_round_trip(self, llm_service_mock):
+        """Test submitting and polling a structured batch in mock mode."""
+        batch_id = await llm_service_mock.submit_structured_batch(
+            [
+                {"custom_id": "P001", "prompt": "Summarize patient P001"},
+                {"custom_id": "P002", "prompt": "Summarize patient P002"},
+            ],
+            output_model=PatientSummary
         )
 
-        assert isinstance(response, str)
+        results = await llm_service_mock.poll_structured_batch(batch_id, PatientSummary)
 
-    def test_mock_mode_enabled(self, llm_service):
-        """Test that mock mode is properly set."""
-        assert llm_service._use_mock is True
+        assert set(results) == {"P001", "P002"}
+        assert all(isinstance(r, PatientSummary) for r in results.values())
+
+        # A finished batch can be polled again, like a real one
+        assert await llm_service_mock.poll_structured_batch(batch_id, PatientSummary) == results
+
+    @pytest.mark.asyncio
+    async def test_poll_unknown_batch(self, llm_service_mock):
+        """Test that polling a batch that was never submitted raises."""
+        with pytest.raises(ValueError, match="Unknown LLM batch"):
+            await llm_service_mock.poll_structured_batch("mock-batch-missing", PatientSummary)
 
 
 class TestPatientService:
     """Tests for PatientService."""
 
-    @pytest.fixture
-    def patient_service(self):
-        """Create patient service for testing."""
-        return PatientService()
-
     @pytest.mark.asyncio
     async def test_get_all_patients(self, patient_service):
         """Test getting all patients."""
@@ -86,6 +342,16 @@ class TestPatientService:
 
         assert patient is None
 
+    @pytest.mark.asyncio
+    async def test_request_session_released_after_read(self, patient_service):
+        """Test that a read on the shared request session doesn't keep its transaction open."""
+        from database import request_session
+
+        async with request_session() as session:
+            await patient_service.get_by_id("NONEXISTENT")
+
+            assert not session.in_transaction()
+
     @pytest.mark.asyncio
     async def test_get_patients_with_cancer_type_filter(self, patient_service):
         """Test filtering patients by cancer type."""
@@ -93,6 +359,21 @@ class TestPatientService:
 
         assert all("nsclc" in p.cancer_details.cancer_type.lower() for p in patients)
 
+    @pytest.mark.asyncio
+    async def test_get_all_with_cancer_filters(self, patient_service):
+        """Test cancer type and stage filters narrow to exactly the matching patients."""
+        everyone = await patient_service.get_all()
+        expected = [
+            p.id for p in everyone
+            if p.cancer_details and p.cancer_details.cancer_type.value == "NSCLC"
+            and p.cancer_details.stage and p.cancer_details.stage.value == "Stage IIIA"
+        ]
+
+        patients = await patient_service.get_all({"cancer_type": "NSCLC", "stage": "Stage IIIA"})
+
+        assert expected
+        assert [p.id for p in patients] == expected
+
     @pytest.mark.asyncio
     async def test_get_patients_with_status_filter(self, patient_service):
         """Test filtering patients by status."""
@@ -130,11 +411,14 @@ class TestAnalysisService:
     """Tests for AnalysisService."""
 
     @pytest.fixture
-    def analysis_service(self, patient_service):
-        """Create analysis service for testing."""
-        llm_service = LLMService(use_mock=True)
+    def analysis_service(self, llm_service_mock, patient_service):
+        """Create analysis service for testing.
+
+        Function-scoped since it tracks the analyses each test starts; the
+        LLM and patient services underneath are shared by the session.
+        """
         return AnalysisService(
-            llm_service=llm_service,
+            llm_service=llm_service_mock,
             patient_service=patient_service,
             use_mock=True
         )
@@ -155,10 +439,9 @@ class TestAnalysisService:
         assert "P001" in request_id
 
     @pytest.mark.asyncio
-    async def test_get_status(self, analysis_service):
+    async def test_get_status(self, completed_analysis):
         """Test getting analysis status."""
-        request = AnalysisRequest(patient_id="P001")
-        request_id = await analysis_service.start_analysis(request)
+        analysis_service, request_id = completed_analysis
 
         status = await analysis_service.get_status(request_id)
 
@@ -173,16 +456,15 @@ class TestAnalysisService:
         assert status is None
 
     @pytest.mark.asyncio
-    async def test_run_analysis_complete(self, analysis_service):
-        """Test running analysis to completion."""
-        request = AnalysisRequest(
-            patient_id="P001",
-            include_trials=True,
-            include_evidence=True
-        )
+    async def test_run_analysis_complete(self, completed_analysis):
+        """Test a finished analysis reports completion and returns its results."""
+        analysis_service, request_id = completed_analysis
 
-        request_id = await analysis_service.start_analysis(request)
-        result = await analysis_service.run_analysis(request_id)
+        status = await analysis_service.get_status(request_id)
+        assert status.status == "completed", status.error_message
+        assert status.progress_percent == 100
+
+        result = await analysis_service.get_results(request_id)
 
         assert result is not None
         assert result.patient_id == "P001"
@@ -204,9 +486,14 @@ class TestAnalysisService:
         request = AnalysisRequest(patient_id="P001")
         request_id = await analysis_service.start_analysis(request)
 
-        progress_updates = []
-        async for progress in analysis_service.stream_progress(request_id):
-            progress_updates.append(progress)
+        async def collect():
+            return [progress async for progress in analysis_service.stream_progress(request_id)]
+
+        # Mock runs have no pacing, so a slow stream means pacing crept back in
+        progress_updates = await asyncio.wait_for(collect(), timeout=MOCK_ANALYSIS_BUDGET_SECONDS)
+
+        # The budget only means something for a run that actually finished
+        assert progress_updates[-1].status == "completed", progress_updates[-1].error_message
 
         # Should have multiple progress updates
         assert len(progress_updates) > 1
@@ -215,21 +502,6 @@ class TestAnalysisService:
         progress_values = [p.progress_percent for p in progress_updates]
         assert progress_values[-1] >= progress_values[0]
 
-    @pytest.mark.asyncio
-    async def test_get_results(self, analysis_service):
-        """Test getting analysis results."""
-        request = AnalysisRequest(patient_id="P001")
-        request_id = await analysis_service.start_analysis(request)
-
-        # Run to completion
-        await analysis_service.run_analysis(request_id)
-
-        # Get results
-        result = await analysis_service.get_results(request_id)
-
-        assert result is not None
-        assert result.patient_id == "P001"
-
     @pytest.mark.asyncio
     async def test_get_results_not_found(self, analysis_service):
         """Test getting results for non-existent request."""
@@ -268,114 +540,120 @@ class TestVectorStoreService:
         assert "trials" in results
 
     @pytest.mark.asyncio
-    async def test_index_document(self, vector_service):
-        """Test indexing a document."""
+    @pytest.mark.parametrize(
+        "namespace, expected_success",
+        [("evidence", True), ("invalid", False)],
+        ids=["known_namespace", "invalid_namespace"]
+    )
+    async def test_index_document(self, vector_service, namespace, expected_success):
+        """Test indexing a document into a known and an unknown namespace."""
         success = await vector_service.index_document(
-            namespace="evidence",
+            namespace=namespace,
             doc_id="test_doc",
             content="EGFR mutation treatment with osimertinib",
             metadata={"source": "test"}
         )
 
-        assert success is True
+        assert success is expected_success
 
     @pytest.mark.asyncio
-    async def test_index_document_invalid_namespace(self, vector_service):
-        """Test indexing to invalid namespace."""
-        success = await vector_service.index_document(
-            namespace="invalid",
-            doc_id="test_doc",
-            content="Test content"
-        )
+    @pytest.mark.parametrize(
+        "method, kwargs",
+        [(method, kwargs) for _, method, kwargs in SEARCH_CASES],
+        ids=[case_id for case_id, _, _ in SEARCH_CASES]
+    )
+    async def test_search_variants(self, initialized_vector_service, method, kwargs):
+        """Test each search entry point returns a list."""
+        results = await getattr(initialized_vector_service, method)(**kwargs)
 
-        assert success is False
+        assert isinstance(results, list)
 
     @pytest.mark.asyncio
-    async def test_search(self, vector_service):
-        """Test searching documents."""
-        # Initialize with mock data
-        await vector_service.initialize()
-
-        results = await vector_service.search(
-            query="EGFR mutation treatment",
-            namespaces=["evidence"],
-            top_k=5
+    async def test_delete_document(self, vector_service):
+        """Test deleting a document."""
+        # Index a document first
+        await vector_service.index_document(
+            namespace="evidence",
+            doc_id="to_delete",
+            content="Temporary content"
         )
 
-        assert isinstance(results, list)
+        # Delete it
+        success = await vector_service.delete_document("evidence", "to_delete")
+
+        assert success is True
 
     @pytest.mark.asyncio
-    async def test_search_all_namespaces(self, vector_service):
-        """Test searching all namespaces."""
+    async def test_repeated_search_uses_query_cache(self, vector_service, monkeypatch):
+        """Test repeated searches are served from the semantic cache until the namespace changes."""
         await vector_service.initialize()
 
-        results = await vector_service.search(
-            query="lung cancer",
-            namespaces=None,  # All namespaces
-            top_k=10
-        )
+        calls = 0
+        retrieve = vector_service.retriever.retrieve
 
-        assert isinstance(results, list)
+        async def counting_retrieve(*args, **kwargs):
+            nonlocal calls
+            calls += 1
+            return await retrieve(*args, **kwargs)
 
-    @pytest.mark.asyncio
-    async def test_search_evidence(self, vector_service):
-        """Test searching for treatment evidence."""
-        await vector_service.initialize()
+        monkeypatch.setattr(vector_service.retriever, "retrieve", counting_retrieve)
 
-        results = await vector_service.search_evidence(
-            treatment="osimertinib",
-            cancer_type="NSCLC",
-            mutations=["EGFR"]
-        )
+        first = await vector_service.search("EGFR mutation treatment", namespaces=["evidence"], top_k=5)
+        second = await vector_service.search("EGFR mutation treatment", namespaces=["evidence"], top_k=5)
 
-        assert isinstance(results, list)
+        assert calls == 1
+        assert [r.doc_id for r in second] == [r.doc_id for r in first]
+
+        await vector_service.index_document("evidence", "new_doc", "EGFR exon 19 deletion")
+        await vector_service.search("EGFR mutation treatment", namespaces=["evidence"], top_k=5)
+
+        assert calls == 2
 
     @pytest.mark.asyncio
-    async def test_search_trials(self, vector_service):
-        """Test searching for clinical trials."""
+    async def test_variant_searches_do_not_share_cache(self, vector_service, monkeypatch):
+        """Test near-identical variant queries are never served each other's cached results."""
         await vector_service.initialize()
 
-        results = await vector_service.search_trials(
-            cancer_type="NSCLC",
-            mutations=["EGFR"],
-            status="Recruiting"
-        )
+        calls = 0
+        retrieve = vector_service.retriever.retrieve
 
-        assert isinstance(results, list)
+        async def counting_retrieve(*args, **kwargs):
+            nonlocal calls
+            calls += 1
+            return await retrieve(*args, **kwargs)
 
-    @pytest.mark.asyncio
-    async def test_search_mutations(self, vector_service):
-        """Test searching for mutation information."""
-        await vector_service.initialize()
+        monkeypatch.setattr(vector_service.retriever, "retrieve", counting_retrieve)
 
-        results = await vector_service.search_mutations(
-            gene="EGFR",
-            variant="L858R"
-        )
+        await vector_service.search_mutations("EGFR", "L858R")
+        await vector_service.search_mutations("EGFR", "T790M")
+        assert calls == 2
 
-        assert isinstance(results, list)
+        # The identical query is still served from the cache
+        await vector_service.search_mutations("EGFR", "L858R")
+        assert calls == 2
 
     @pytest.mark.asyncio
-    async def test_delete_document(self, vector_service):
-        """Test deleting a document."""
-        # Index a document first
-        await vector_service.index_document(
-            namespace="evidence",
-            doc_id="to_delete",
-            content="Temporary content"
+    async def test_search_canonical_sort(self, initialized_vector_service):
+        """Test canonical_sort returns the same documents ordered by namespace and doc_id."""
+        vector_service = initialized_vector_service
+        by_score = await vector_service.search("EGFR lung cancer", top_k=5, min_score=0.0)
+        canonical = await vector_service.search(
+            "EGFR lung cancer", top_k=5, min_score=0.0, canonical_sort=True
         )
 
-        # Delete it
-        success = await vector_service.delete_document("evidence", "to_delete")
-
-        assert success is True
+        assert sorted(r.doc_id for r in canonical) == sorted(r.doc_id for r in by_score)
+        keys = [(r.metadata.get("namespace", ""), r.doc_id) for r in canonical]
+        assert keys == sorted(keys)
 
     @pytest.mark.asyncio
     async def test_clear_namespace(self, vector_service):
         """Test clearing a namespace."""
-        # Index some documents
-        await vector_service.index_document("evidence", "doc1", "Content 1")
-        await vector_service.index_document("evidence", "doc2", "Content 2")
+        # Index some documents in one batch
+        indexed = await vector_service.index_documents("evidence", [
+            {"doc_id": "doc1", "content": "Content 1"},
+            {"doc_id": "doc2", "content": "Content 2"},
+        ])
+        assert indexed == 2
 
         # Clear namespace
         success = await vector_service.clear_namespace("evidence")
@@ -413,3 +691,81 @@ class TestVectorStoreService:
         assert health["status"] == "healthy"
         assert "namespaces" in health
         assert "document_counts" in health
+
+
+class TestPubMedService:
+    """Tests for PubMedService, driven by an httpx MockTransport."""
+
+    @pytest.fixture(autouse=True)
+    def no_redis(self, monkeypatch):
+        """Keep the result cache off so every test sees its own NCBI calls."""
+        from config import settings
+        monkeypatch.setattr(settings, "REDIS_URL", "")
+
+    @pytest.mark.asyncio
+    async def test_full_mode_parses_efetch_records(self):
+        """Test eFetch XML parsing of abstract sections, authors and the PubmedData DOI."""
+        calls = []
+        service = PubMedService(transport=httpx.MockTransport(_ncbi_handler(calls)))
+
+        publications = await service.search_publications("osimertinib", fetch_mode="full")
+        await service.close()
+
+        assert [pub.pmid for pub in publications] == ["111", "222"]
+        pub = publications[0]
+        assert pub.title == "Osimertinib in Untreated EGFR-Mutated Advanced NSCLC"
+        assert pub.abstract == "BACKGROUND: Osimertinib is an EGFR-TKI. RESULTS: Median PFS was 18.9 months."
+        assert pub.authors == ["Soria Jean-Charles", "Ohe Yuichiro"]
+        assert pub.doi == "10.1056/NEJMoa1713137"
+        assert pub.journal == "The New England journal of medicine"
+        assert pub.publication_date == "2018-Jan-11"
+        assert pub.mesh_terms == ["Carcinoma, Non-Small-Cell Lung"]
+        assert publications[1].abstract == ""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "fetch_mode,expected_calls",
+        PUBMED_FETCH_MODE_CASES,
+        ids=[mode for mode, _ in PUBMED_FETCH_MODE_CASES]
+    )
+    async def test_publication_type_filter_call_count(self, fetch_mode, expected_calls):
+        """Test each fetch mode filters publication types with one request after eSearch."""
+        calls = []
+        service = PubMedService(transport=httpx.MockTransport(_ncbi_handler(calls)))
+
+        publications = await service.search_publications(
+            "osimertinib",
+            publication_types=["Randomized Controlled Trial"],
+            fetch_mode=fetch_mode
+        )
+        await service.close()
+
+        assert [pub.pmid for pub in publications] == ["111"]
+        assert calls == expected_calls
+
+    @pytest.mark.asyncio
+    async def test_retries_after_rate_limit(self):
+        """Test a 429 with Retry-After is retried and the next success is used."""
+        calls = []
+        failures = {"esearch": [httpx.Response(429, headers={"Retry-After": "0"})]}
+        service = PubMedService(transport=httpx.MockTransport(_ncbi_handler(calls, failures)))
+
+        publications = await service.search_publications("osimertinib", fetch_mode="full")
+        await service.close()
+
+        assert len(publications) == 2
+        assert calls == ["esearch", "esearch", "efetch"]
+
+    @pytest.mark.asyncio
+    async def test_retries_exhausted_raises(self, monkeypatch):
+        """Test that running out of retries raises httpx.HTTPError to the caller."""
+        monkeypatch.setattr(pubmed_service, "MAX_RETRIES", 2)
+        calls = []
+        failures = {"esearch": [httpx.Response(429, headers={"Retry-After": "0"}) for _ in range(3)]}
+        service = PubMedService(transport=httpx.MockTransport(_ncbi_handler(calls, failures)))
+
+        with pytest.raises(httpx.HTTPError):
+            await service.search_publications("osimertinib")
+        await service.close()
+
+        assert calls == ["esearch"] * 3